@@ -0,0 +1,329 @@
+import contextlib
+import copy
+import datetime
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+#usage python3 benchmark.py [--scales 1,10,100] [--repeat 3] [--output results.json] [--baseline baseline.json]
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Test cases shipped with the repo; each folder holds the original test.svg
+CORPORA = {
+    'chai': os.path.join(SCRIPT_DIR, 'chai test case', 'test.svg'),
+    'pasta': os.path.join(SCRIPT_DIR, 'pasta test case', 'test.svg'),
+}
+
+DEFAULT_SCALES = (1, 10, 100)
+
+
+def _load_modules() -> dict:
+    """Import the stages of decomposition.py and cdr-pdf.py."""
+    if SCRIPT_DIR not in sys.path:
+        sys.path.insert(0, SCRIPT_DIR)
+    import cdr_decomposition
+    return {'mater': cdr_decomposition.load_module('decomposition'), 'cdr_pdf': cdr_decomposition.load_module('cdr_pdf')}
+
+
+# Benchmarked stage -> (input file it reads, function(modules, input_path, output_dir))
+# Inputs name the files produced by _prepare_inputs.
+STAGES = {
+    'mater.remove_raster_from_svg': ('original', lambda m, src, out: m['mater'].remove_raster_from_svg(
+        src, os.path.join(out, 'vectors.svg'))),
+    'mater.remove_raster_from_svg[streaming]': ('original', lambda m, src, out: m['mater'].remove_raster_from_svg(
+        src, os.path.join(out, 'vectors.svg'), streaming=True)),
+    'mater.convert_svg_to_greyscale': ('vectors', lambda m, src, out: m['mater'].convert_svg_to_greyscale(
+        src, os.path.join(out, 'greyscale.svg'))),
+    'mater.invert_svg_colors': ('greyscale', lambda m, src, out: m['mater'].invert_svg_colors(
+        src, os.path.join(out, 'inverted.svg'))),
+    'mater.extract_bijection_bw_elements': ('greyscale', lambda m, src, out: m['mater'].extract_bijection_bw_elements(
+        src, output_svg_path=os.path.join(out, 'bijection.svg'))),
+    'mater.extract_bijection_bw_elements[inverted file]': ('greyscale', lambda m, src, out: m['mater'].extract_bijection_bw_elements(
+        src, src.replace('greyscale.svg', 'inverted.svg'), os.path.join(out, 'bijection.svg'))),
+    'mater.filter_to_geometric_shapes': ('bijection', lambda m, src, out: m['mater'].filter_to_geometric_shapes(
+        src, os.path.join(out, 'geometric.svg'))),
+    'mater.run_svg_pipeline': ('original', lambda m, src, out: m['mater'].run_svg_pipeline(
+        src, output_dir=out)),
+    'cdr_pdf.remove_raster_from_svg': ('original', lambda m, src, out: m['cdr_pdf'].remove_raster_from_svg(
+        src, os.path.join(out, 'vectors.svg'))),
+    'cdr_pdf.remove_colors_from_svg': ('vectors', lambda m, src, out: m['cdr_pdf'].remove_colors_from_svg(
+        src, os.path.join(out, 'outlines.svg'))),
+    'cdr_pdf.create_black_white_svg': ('vectors', lambda m, src, out: m['cdr_pdf'].create_black_white_svg(
+        src, os.path.join(out, 'bw.svg'))),
+}
+
+
+def scale_svg(svg_path: str, factor: int, output_svg_path: str) -> str:
+    """
+    Write a copy of an SVG with factor times as many vector elements.
+
+    Every top-level child is repeated factor times with its ids suffixed so
+    they stay unique. Raster elements are kept only once, so the file grows
+    with its element count rather than with duplicated bitmaps.
+    """
+    tree = ET.parse(svg_path)
+    root = tree.getroot()
+    originals = list(root)
+
+    for copy_index in range(1, factor):
+        for child in originals:
+            if 'image' in child.tag.lower():
+                continue
+            duplicate = copy.deepcopy(child)
+            for elem in duplicate.iter():
+                if 'image' in elem.tag.lower():
+                    continue
+                elem_id = elem.get('id')
+                if elem_id:
+                    elem.set('id', f"{elem_id}_x{copy_index}")
+            root.append(duplicate)
+
+    tree.write(output_svg_path, encoding='utf-8', xml_declaration=True)
+    return output_svg_path
+
+
+def _count_elements(svg_path: str) -> int:
+    count = 0
+    for _, elem in ET.iterparse(svg_path):
+        count += 1
+        elem.clear()
+    return count
+
+
+def _prepare_inputs(modules: dict, corpus_svg: str, scale: int, work_dir: str) -> dict:
+    """Build the scaled original and every intermediate file the stages read."""
+    os.makedirs(work_dir, exist_ok=True)
+    original = os.path.join(work_dir, 'original.svg')
+    if scale == 1:
+        shutil.copyfile(corpus_svg, original)
+    else:
+        scale_svg(corpus_svg, scale, original)
+
+    mater = modules['mater']
+    inputs = {'original': original}
+    with contextlib.redirect_stdout(io.StringIO()):
+        inputs['vectors'] = mater.remove_raster_from_svg(original, os.path.join(work_dir, 'vectors.svg'))
+        inputs['greyscale'] = mater.convert_svg_to_greyscale(inputs['vectors'], os.path.join(work_dir, 'greyscale.svg'))
+        inputs['inverted'] = mater.invert_svg_colors(inputs['greyscale'], os.path.join(work_dir, 'inverted.svg'))
+        inputs['bijection'] = mater.extract_bijection_bw_elements(
+            inputs['greyscale'], output_svg_path=os.path.join(work_dir, 'bijection.svg'))
+    return inputs
+
+
+def _output_bytes(output_dir: str) -> int:
+    total = 0
+    for folder, _, files in os.walk(output_dir):
+        for name in files:
+            total += os.path.getsize(os.path.join(folder, name))
+    return total
+
+
+def _run_stage(modules: dict, function, input_path: str, measure_memory: bool = False) -> dict:
+    """Run one stage call in a fresh output folder and measure it."""
+    output_dir = tempfile.mkdtemp(prefix="bench_out_")
+    try:
+        if measure_memory:
+            tracemalloc.start()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(modules, input_path, output_dir)
+        measurement = {
+            'wall_s': time.perf_counter() - wall_start,
+            'cpu_s': time.process_time() - cpu_start,
+        }
+        if measure_memory:
+            measurement['peak_mb'] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+        measurement['output_bytes'] = _output_bytes(output_dir)
+        return measurement
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def machine_info() -> dict:
+    """Describe the machine and code version a benchmark ran on."""
+    info = {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+    }
+    try:
+        with open('/proc/meminfo') as f:
+            info['memory_kb'] = int(f.readline().split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=SCRIPT_DIR, capture_output=True, text=True)
+        if result.returncode == 0:
+            info['git_commit'] = result.stdout.strip()
+    except OSError:
+        pass
+    return info
+
+
+def run_benchmarks(corpora=None, scales=DEFAULT_SCALES, stages=None, repeat: int = 3,
+                   work_dir: str = None) -> dict:
+    """
+    Time and memory-profile the public stages on the test-case corpora.
+
+    Each stage is run repeat times for timing and once more under tracemalloc
+    for its peak Python memory, so profiling overhead never skews the times.
+
+    Args:
+        corpora: Corpus name -> original SVG path (defaults to CORPORA)
+        scales: Element-count multipliers for the synthetic variants
+        stages: Stage names from STAGES (defaults to all)
+        repeat: Timed runs per stage; min and median are reported
+        work_dir: Folder for the scaled inputs (defaults to a temporary folder)
+
+    Returns:
+        Dict with 'machine', 'timestamp', 'repeat' and 'results' (one dict per
+        corpus, scale and stage)
+
+    Raises:
+        ValueError: If a stage name is unknown or repeat is not positive
+    """
+    corpora = corpora or CORPORA
+    stages = list(stages or STAGES)
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown benchmark stages: {', '.join(unknown)}")
+    if repeat < 1:
+        raise ValueError(f"repeat must be positive, got {repeat}")
+
+    modules = _load_modules()
+    cleanup = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="bench_")
+    results = []
+
+    try:
+        for corpus, corpus_svg in corpora.items():
+            for scale in scales:
+                print(f"[Bench] Preparing {corpus} x{scale}")
+                inputs = _prepare_inputs(modules, corpus_svg, scale, os.path.join(work_dir, f"{corpus}_x{scale}"))
+
+                for stage in stages:
+                    input_name, function = STAGES[stage]
+                    input_path = inputs[input_name]
+                    runs = [_run_stage(modules, function, input_path) for _ in range(repeat)]
+                    memory_run = _run_stage(modules, function, input_path, measure_memory=True)
+                    walls = [run['wall_s'] for run in runs]
+                    cpus = [run['cpu_s'] for run in runs]
+
+                    result = {
+                        'corpus': corpus,
+                        'scale': scale,
+                        'stage': stage,
+                        'elements': _count_elements(input_path),
+                        'input_bytes': os.path.getsize(input_path),
+                        'output_bytes': runs[0]['output_bytes'],
+                        'wall_s_min': min(walls),
+                        'wall_s_median': statistics.median(walls),
+                        'cpu_s_median': statistics.median(cpus),
+                        'peak_mb': memory_run['peak_mb'],
+                    }
+                    results.append(result)
+                    print(f"[Bench] {corpus} x{scale} {stage}: {result['wall_s_median']:.3f}s, "
+                          f"peak {result['peak_mb']:.1f} MB")
+    finally:
+        if cleanup:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'machine': machine_info(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare_to_baseline(current: dict, baseline: dict, tolerance: float = 0.10,
+                        min_delta_s: float = 0.005) -> list:
+    """
+    Find stages that got slower than the baseline.
+
+    A stage regresses when its median wall time grew by more than tolerance
+    (relative) and by more than min_delta_s (absolute, to ignore timer noise).
+    Peak memory growing by more than tolerance is flagged as well.
+
+    Returns:
+        List of dicts describing each regression, empty if none
+    """
+    baseline_results = {
+        (r['corpus'], r['scale'], r['stage']): r for r in baseline.get('results', [])
+    }
+    regressions = []
+    for result in current['results']:
+        base = baseline_results.get((result['corpus'], result['scale'], result['stage']))
+        if base is None:
+            continue
+        for metric, min_delta in (('wall_s_median', min_delta_s), ('peak_mb', 0.5)):
+            old, new = base.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > min_delta:
+                regressions.append({
+                    'corpus': result['corpus'],
+                    'scale': result['scale'],
+                    'stage': result['stage'],
+                    'metric': metric,
+                    'baseline': old,
+                    'current': new,
+                    'change': (new - old) / old if old else float('inf'),
+                })
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the decomposition stages on the chai and pasta test cases.")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="Comma-separated element-count multipliers (default: 1,10,100)")
+    parser.add_argument("--corpus", action="append", choices=sorted(CORPORA), help="Only run this corpus (repeatable)")
+    parser.add_argument("--stage", action="append", choices=sorted(STAGES), help="Only run this stage (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (default: 3)")
+    parser.add_argument("--output", "-o", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=None, help="Earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown before flagging (default: 0.10)")
+    parser.add_argument("--work-dir", default=None, help="Keep the scaled inputs in this folder")
+    args = parser.parse_args()
+
+    corpora = {name: CORPORA[name] for name in args.corpus} if args.corpus else None
+    try:
+        scales = [int(s) for s in args.scales.split(",")]
+        report = run_benchmarks(corpora, scales, args.stage, args.repeat, args.work_dir)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"[OK] Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        for r in regressions:
+            print(f"[Regression] {r['corpus']} x{r['scale']} {r['stage']} {r['metric']}: "
+                  f"{r['baseline']:.3f} -> {r['current']:.3f} ({r['change']:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"[OK] No regressions against {args.baseline}")
@@ -0,0 +1,236 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+from svg_stats import StageResult
+from svg_traversal import skip_subtrees
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+# Written into every output folder the cache has seen: output file name -> how it was built
+MANIFEST_NAME = '.cdr_build_cache.json'
+
+# The stage code; editing any of these files makes every cached output stale
+SOURCE_FILES = (
+    'decomposition.py', 'cdr-pdf.py', 'cdr_batch.py',
+    'svg_colors.py', 'svg_columnar.py', 'svg_index.py', 'svg_paths.py', 'svg_rasters.py', 'svg_stats.py',
+    'svg_segments.py', 'svg_spatial.py', 'svg_stream.py', 'svg_traversal.py', 'svg_xml.py',
+)
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+HASH_CHUNK_SIZE = 1 << 20
+
+_local = threading.local()
+_code_version = None
+
+
+def active() -> "BuildCache":
+    """Return the BuildCache activated in this thread, or None."""
+    return getattr(_local, 'cache', None)
+
+
+def code_version() -> str:
+    """Hash of the stage source files, computed once per process."""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for name in SOURCE_FILES:
+            path = os.path.join(SOURCE_DIR, name)
+            if os.path.exists(path):
+                digest.update(name.encode())
+                digest.update(file_digest(path).encode())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def file_digest(path: str) -> str:
+    """sha256 of a file's content, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """
+    Remembers how every stage output was built, so a re-run can skip the
+    stages whose output is still up to date, make-style.
+
+    A stage's key is a hash of the content of its inputs, its parameters
+    (thresholds, raster options), the skip policy (see svg_traversal.py) and
+    the stage code (see SOURCE_FILES). The
+    key, statistics and file size and mtime of each output are kept in a
+    manifest in the output's folder. An output is up to date while its
+    recorded key matches, the file on disk is the one that was recorded and
+    the files written along with it (extracted rasters) still exist.
+    Chained stages read the previous stage's output, so after a change only
+    the stages downstream of it are run again.
+
+    Usage:
+        cache = BuildCache()
+        with cache.activate():
+            vectors = remove_raster_from_svg("test.svg")   # skipped if up to date
+            greyscale = convert_svg_to_greyscale(vectors, black_threshold=60)
+    """
+
+    def __init__(self, version: str = None):
+        self.version = version or code_version()
+        self._manifests = {}  # Output folder -> {file name: entry}
+        self._digests = {}  # (path, size, mtime_ns) -> content hash
+
+    @contextmanager
+    def activate(self):
+        """Make this the cache that stages in this thread consult."""
+        previous = active()
+        _local.cache = self
+        try:
+            yield self
+        finally:
+            _local.cache = previous
+
+    def input_digest(self, path: str) -> str:
+        """Content hash of an input file, remembered while the file is unchanged."""
+        path = os.path.abspath(path)
+        info = os.stat(path)
+        marker = (path, info.st_size, info.st_mtime_ns)
+        if marker not in self._digests:
+            self._digests[marker] = file_digest(path)
+        return self._digests[marker]
+
+    def key(self, stage: str, inputs, **params) -> str:
+        """Key of a stage run on inputs (content hashes or earlier keys) with params."""
+        text = json.dumps([self.version, stage, list(inputs), params, sorted(skip_subtrees())], sort_keys=True)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def file_key(self, stage: str, input_paths, **params) -> str:
+        """Key of a stage run on input files, from their content."""
+        return self.key(stage, [self.input_digest(path) for path in input_paths if path], **params)
+
+    def lookup(self, output_path: str, key: str) -> StageResult:
+        """Return the recorded result if output_path is up to date for key, else None."""
+        output_path = os.path.abspath(output_path)
+        entry = self._manifest(os.path.dirname(output_path)).get(os.path.basename(output_path))
+        if entry is None or entry['key'] != key:
+            return None
+        return _result_if_current(output_path, entry)
+
+    def find(self, directory: str, key: str) -> StageResult:
+        """Return the up-to-date output in directory that was built with key, or None."""
+        directory = os.path.abspath(directory)
+        for name, entry in self._manifest(directory).items():
+            if entry['key'] == key:
+                result = _result_if_current(os.path.join(directory, name), entry)
+                if result is not None:
+                    return result
+        return None
+
+    def store(self, output_path: str, key: str, result, extra_paths=()):
+        """
+        Record that output_path (a stage's returned path or StageResult) was
+        built with key. extra_paths are files written along with it (e.g.
+        extracted rasters or RasterStore objects); the output is stale once
+        any of them is gone.
+        """
+        output_path = os.path.abspath(output_path)
+        info = os.stat(output_path)
+        directory = os.path.dirname(output_path)
+        self._manifest(directory)[os.path.basename(output_path)] = {
+            'key': key,
+            'size': info.st_size,
+            'mtime_ns': info.st_mtime_ns,
+            'bytes_in': getattr(result, 'bytes_in', None),
+            'stats': getattr(result, 'stats', None) or {},
+            'counts': getattr(result, 'counts', None) or {},
+            'extra_paths': sorted(set(os.path.abspath(path) for path in extra_paths)),
+        }
+        self._save(directory)
+
+    def extra_paths(self, output_path: str) -> list:
+        """The files recorded as written along with output_path."""
+        output_path = os.path.abspath(output_path)
+        entry = self._manifest(os.path.dirname(output_path)).get(os.path.basename(output_path))
+        return list(entry.get('extra_paths', ())) if entry is not None else []
+
+    def _manifest(self, directory: str) -> dict:
+        if directory not in self._manifests:
+            self._manifests[directory] = _read_manifest(directory)
+        return self._manifests[directory]
+
+    def _save(self, directory: str):
+        # Other processes may share the folder (flat output layout), so merge
+        # with what is on disk and replace the file in one step, holding the
+        # folder's lock so no other writer reads the old manifest meanwhile
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+        with _locked(f"{manifest_path}.lock"):
+            entries = _read_manifest(directory)
+            entries.update(self._manifests[directory])
+            self._manifests[directory] = entries
+            temp_path = f"{manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump({'outputs': entries}, f, indent=1, sort_keys=True)
+            os.replace(temp_path, manifest_path)
+
+
+@contextmanager
+def _locked(lock_path: str):
+    """Hold an exclusive lock on lock_path (a sidecar file) across processes."""
+    if fcntl is None:
+        # No advisory locks: the merge still keeps other writers' entries
+        # unless two of them save at the same moment
+        yield
+        return
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_manifest(directory: str) -> dict:
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            return json.load(f).get('outputs', {})
+    except (OSError, ValueError):
+        # Missing or unreadable: everything is rebuilt and the manifest rewritten
+        return {}
+
+
+def _result_if_current(path: str, entry: dict) -> StageResult:
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    if info.st_size != entry['size'] or info.st_mtime_ns != entry['mtime_ns']:
+        return None
+    if not all(os.path.exists(extra_path) for extra_path in entry.get('extra_paths', ())):
+        return None
+    return StageResult(path, entry['stats'], entry['counts'], entry['bytes_in'], info.st_size)
+
+
+def stage_key(stage: str, *input_paths, **params) -> str:
+    """Key of a file-based stage for the active cache, or None when no cache is active."""
+    cache = active()
+    if cache is None:
+        return None
+    return cache.file_key(stage, input_paths, **params)
+
+
+def cached_output(output_path: str, key: str) -> StageResult:
+    """Return the up-to-date result for a key from stage_key, or None if the stage has to run."""
+    if key is None:
+        return None
+    return active().lookup(output_path, key)
+
+
+def store_output(output_path: str, key: str, result, extra_paths=()):
+    """Record a freshly built output under a key from stage_key, with the files written along with it."""
+    if key is not None:
+        active().store(output_path, key, result, extra_paths)
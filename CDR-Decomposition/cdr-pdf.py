@@ -2,18 +2,30 @@ import os
 import shutil
 import subprocess
 import xml.etree.ElementTree as ET
-import base64
 import json
-import re
 from urllib.parse import urlparse
 
-def cdr_to_pdf(cdr_path: str, pdf_path: str) -> str:
+from instrumentation import instrumented, note, note_elements
+from reporting import detail, error, last_counts, record_counts, summary, warning
+from svg_colors import to_black_white
+from svg_columnar import convert_colors
+from svg_index import SVGIndex
+from svg_rasters import RasterStore, data_url_mime_type, decode_data_url_to_file
+from svg_stats import SVGStats, stage_result
+from svg_traversal import defs_of, iter_rendered
+from svg_xml import PARSE_ERRORS, parse_svg, write_svg
+
+@instrumented('cdr_pdf.cdr_to_pdf')
+def cdr_to_pdf(cdr_path: str, pdf_path: str, pool=None) -> str:
     """
     Convert a CorelDRAW .cdr file to both SVG and PDF using LibreOffice Draw.
 
     Uses LibreOffice Draw to first convert CDR to SVG (preserving vectors),
     then converts the SVG to PDF. Both SVG and PDF files are kept.
     
+    When a started LibreOfficePool (libreoffice_pool.py) is passed, both steps
+    run on its long-lived workers instead of two fresh LibreOffice processes.
+    
     Returns the absolute path to the generated PDF.
     Raises RuntimeError if conversion fails.
     """
@@ -23,6 +35,22 @@ def cdr_to_pdf(cdr_path: str, pdf_path: str) -> str:
     if not os.path.exists(cdr_path):
         raise FileNotFoundError(f"Input file not found: {cdr_path}")
 
+    if pool is not None:
+        svg_path = os.path.join(
+            os.path.dirname(pdf_path),
+            os.path.splitext(os.path.basename(cdr_path))[0] + ".svg"
+        )
+        # The workers write where they are told; unlike --outdir they don't create the folder
+        os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+        summary(f"[Step 1] Converting {cdr_path} -> {svg_path} (pooled worker)")
+        pool.convert(cdr_path, svg_path, 'svg')
+        summary(f"[Step 2] Converting {svg_path} -> {pdf_path} (pooled worker)")
+        pool.convert(svg_path, pdf_path, 'pdf')
+        summary(f"[OK] Final conversion complete:")
+        summary(f"  SVG file: {svg_path}")
+        summary(f"  PDF file: {pdf_path}")
+        return pdf_path
+
     # Check if LibreOffice is available
     libreoffice = shutil.which("libreoffice")
     if libreoffice is None:
@@ -37,7 +65,7 @@ def cdr_to_pdf(cdr_path: str, pdf_path: str) -> str:
         os.path.splitext(os.path.basename(cdr_path))[0] + ".svg"
     )
     
-    print(f"[Step 1] Converting {cdr_path} -> {svg_path}")
+    summary(f"[Step 1] Converting {cdr_path} -> {svg_path}")
     cmd_svg = [
         libreoffice,
         "--headless",
@@ -58,10 +86,10 @@ def cdr_to_pdf(cdr_path: str, pdf_path: str) -> str:
     if expected_svg != svg_path:
         shutil.move(expected_svg, svg_path)
     
-    print(f"[OK] CDR -> SVG conversion completed: {svg_path}")
+    summary(f"[OK] CDR -> SVG conversion completed: {svg_path}")
 
     # Step 2: Convert SVG to PDF using LibreOffice Draw
-    print(f"[Step 2] Converting {svg_path} -> {pdf_path}")
+    summary(f"[Step 2] Converting {svg_path} -> {pdf_path}")
     cmd_pdf = [
         libreoffice,
         "--headless",
@@ -82,15 +110,16 @@ def cdr_to_pdf(cdr_path: str, pdf_path: str) -> str:
     if expected_pdf != pdf_path:
         shutil.move(expected_pdf, pdf_path)
     
-    print(f"[OK] SVG -> PDF conversion completed: {pdf_path}")
+    summary(f"[OK] SVG -> PDF conversion completed: {pdf_path}")
     
-    print(f"[OK] Final conversion complete:")
-    print(f"  SVG file: {svg_path}")
-    print(f"  PDF file: {pdf_path}")
+    summary(f"[OK] Final conversion complete:")
+    summary(f"  SVG file: {svg_path}")
+    summary(f"  PDF file: {pdf_path}")
     return pdf_path
 
 
-def remove_raster_from_svg(svg_path: str, output_svg_path: str = None, save_rasters: bool = True) -> str:
+@instrumented('cdr_pdf.remove_raster_from_svg')
+def remove_raster_from_svg(svg_path: str, output_svg_path: str = None, save_rasters: bool = True, raster_store=None) -> str:
     """
     Remove all raster components from an SVG file, keeping only vector elements.
     
@@ -98,13 +127,19 @@ def remove_raster_from_svg(svg_path: str, output_svg_path: str = None, save_rast
     all vector graphics (paths, text, shapes, etc.). Optionally saves extracted
     raster images to a separate folder for reconstruction workflow.
     
+    With a raster_store (a RasterStore or its folder, see svg_rasters.py),
+    each distinct image is written once to the shared store and the
+    extraction folder only gets per-occurrence metadata pointing at it.
+    
     Args:
         svg_path: Path to the input SVG file
         output_svg_path: Path for the cleaned SVG (defaults to input_vectors.svg)
         save_rasters: Whether to save extracted raster images (default: True)
+        raster_store: Shared store for extracted rasters (default: None)
     
     Returns:
-        Path to the cleaned SVG file
+        Path to the cleaned SVG file, as a StageResult with the output's
+        element and color statistics (see svg_stats.py)
         
     Raises:
         FileNotFoundError: If input SVG doesn't exist
@@ -133,14 +168,19 @@ def remove_raster_from_svg(svg_path: str, output_svg_path: str = None, save_rast
             f"{base_name}_extracted_rasters"
         )
         os.makedirs(raster_folder, exist_ok=True)
-        print(f"[Setup] Raster extraction folder: {raster_folder}")
+        summary(f"[Setup] Raster extraction folder: {raster_folder}")
+        if isinstance(raster_store, str):
+            raster_store = RasterStore(raster_store)
+        if raster_store is not None:
+            summary(f"[Setup] Raster store: {raster_store.root}")
     
-    print(f"[Processing] Removing raster elements from {svg_path}")
+    summary(f"[Processing] Removing raster elements from {svg_path}")
     
     try:
         # Parse the SVG file
-        tree = ET.parse(svg_path)
+        tree = parse_svg(svg_path)
         root = tree.getroot()
+        note_elements('elements_in', root)
         
         # Counter for removed elements
         removed_count = 0
@@ -148,8 +188,11 @@ def remove_raster_from_svg(svg_path: str, output_svg_path: str = None, save_rast
         
         # Find all elements to remove (iterate through all elements)
         elements_to_remove = []
+        stats = SVGStats()
         
-        for elem in root.iter():
+        for elem in iter_rendered(root, stats.add_subtree):
+            stats.add(elem)
+            
             # Check if element is an image tag (handle both namespaced and non-namespaced)
             if elem.tag.endswith('image') or 'image' in elem.tag.lower():
                 elements_to_remove.append((elem, 'image_tag'))
@@ -162,38 +205,41 @@ def remove_raster_from_svg(svg_path: str, output_svg_path: str = None, save_rast
                 continue
         
         # Remove the identified elements and save raster data
+        index = SVGIndex(root)
         for elem_to_remove, removal_type in elements_to_remove:
             # Save raster data before removing
             if save_rasters and raster_folder:
-                saved_file = _save_raster_element(elem_to_remove, raster_folder, saved_count + 1)
+                saved_file = _save_raster_element(elem_to_remove, raster_folder, saved_count + 1, raster_store)
                 if saved_file:
                     saved_count += 1
-                    print(f"[Saved] Raster image: {saved_file}")
+                    detail("[Saved] Raster image: %s", saved_file)
             
-            # Find the parent and remove the element
-            for parent in root.iter():
-                if elem_to_remove in list(parent):
-                    parent.remove(elem_to_remove)
-                    removed_count += 1
-                    print(f"[Removed] {removal_type}: {elem_to_remove.tag}")
-                    break
-        
-        print(f"[OK] Removed {removed_count} raster elements")
+            # Remove the element from its parent
+            if index.remove(elem_to_remove):
+                removed_count += 1
+                stats.discard_subtree(elem_to_remove)
+                detail("[Removed] %s: %s", removal_type, elem_to_remove.tag)
+        
+        summary(f"[OK] Removed {removed_count} raster elements")
         if save_rasters:
-            print(f"[OK] Saved {saved_count} raster images to {raster_folder}")
+            summary(f"[OK] Saved {saved_count} raster images to {raster_folder}")
+        record_counts('raster', removed=removed_count, saved=saved_count)
         
         # Write the cleaned SVG
-        tree.write(output_svg_path, encoding='utf-8', xml_declaration=True)
+        write_svg(tree, output_svg_path)
         
-        print(f"[OK] Vector-only SVG saved to: {output_svg_path}")
-        return output_svg_path
+        summary(f"[OK] Vector-only SVG saved to: {output_svg_path}")
+        result = stage_result(output_svg_path, stats, last_counts('raster'), svg_path)
+        note(elements_out=result.stats['elements'])
+        return result
         
-    except ET.ParseError as e:
+    except PARSE_ERRORS as e:
         raise RuntimeError(f"Failed to parse SVG file: {e}")
     except Exception as e:
         raise RuntimeError(f"Failed to process SVG file: {e}")
 
 
+@instrumented('cdr_pdf.remove_colors_from_svg')
 def remove_colors_from_svg(svg_path: str, output_svg_path: str = None, save_colors: bool = True) -> str:
     """
     Remove fill colors from an SVG file while preserving vector outlines.
@@ -208,7 +254,8 @@ def remove_colors_from_svg(svg_path: str, output_svg_path: str = None, save_colo
         save_colors: Whether to save extracted color data (default: True)
     
     Returns:
-        Path to the outline-only SVG file
+        Path to the outline-only SVG file, as a StageResult with the output's
+        element and color statistics
         
     Raises:
         FileNotFoundError: If input SVG doesn't exist
@@ -237,14 +284,15 @@ def remove_colors_from_svg(svg_path: str, output_svg_path: str = None, save_colo
             f"{base_name}_extracted_colors"
         )
         os.makedirs(color_folder, exist_ok=True)
-        print(f"[Setup] Color extraction folder: {color_folder}")
+        summary(f"[Setup] Color extraction folder: {color_folder}")
     
-    print(f"[Processing] Removing colors from {svg_path}")
+    summary(f"[Processing] Removing colors from {svg_path}")
     
     try:
         # Parse the SVG file
-        tree = ET.parse(svg_path)
+        tree = parse_svg(svg_path)
         root = tree.getroot()
+        note_elements('elements_in', root)
         
         # Data structures for color extraction
         color_data = {
@@ -255,28 +303,31 @@ def remove_colors_from_svg(svg_path: str, output_svg_path: str = None, save_colo
         }
         
         element_index = 0
+        stats = SVGStats()
+        elements = list(iter_rendered(root, stats.add_subtree))
         
         # First pass: Extract gradient and pattern definitions
-        defs_elements = root.findall(".//{http://www.w3.org/2000/svg}defs") + root.findall(".//defs")
+        defs_elements = defs_of(elements)
         for defs in defs_elements:
             for child in list(defs):
                 if child.tag.endswith('linearGradient') or child.tag.endswith('radialGradient'):
                     gradient_id = child.get('id')
                     if gradient_id:
                         color_data["gradients"][gradient_id] = _extract_gradient_data(child)
-                        print(f"[Extracted] Gradient: {gradient_id}")
+                        detail("[Extracted] Gradient: %s", gradient_id)
                 
                 elif child.tag.endswith('pattern'):
                     pattern_id = child.get('id')
                     if pattern_id:
                         color_data["patterns"][pattern_id] = _extract_pattern_data(child)
-                        print(f"[Extracted] Pattern: {pattern_id}")
+                        detail("[Extracted] Pattern: %s", pattern_id)
         
         # Second pass: Process all elements and remove colors
-        for elem in root.iter():
+        for elem in elements:
             # Skip defs, gradients, and patterns (already processed)
             if (elem.tag.endswith('defs') or elem.tag.endswith('linearGradient') or 
                 elem.tag.endswith('radialGradient') or elem.tag.endswith('pattern')):
+                stats.add(elem)
                 continue
             
             element_colors = _extract_element_colors(elem, element_index)
@@ -286,6 +337,7 @@ def remove_colors_from_svg(svg_path: str, output_svg_path: str = None, save_colo
             
             # Remove color attributes
             _remove_color_attributes(elem)
+            stats.add(elem)
         
         # Remove gradient and pattern definitions from defs
         for defs in defs_elements:
@@ -297,21 +349,26 @@ def remove_colors_from_svg(svg_path: str, output_svg_path: str = None, save_colo
             
             for child in children_to_remove:
                 defs.remove(child)
+                stats.discard_subtree(child)
         
         # Save color data
         if save_colors and color_folder:
             _save_color_data(color_data, color_folder)
         
-        print(f"[OK] Removed fill colors from {len(color_data['elements'])} elements (preserved outlines)")
-        print(f"[OK] Extracted {len(color_data['gradients'])} gradients and {len(color_data['patterns'])} patterns")
+        summary(f"[OK] Removed fill colors from {len(color_data['elements'])} elements (preserved outlines)")
+        summary(f"[OK] Extracted {len(color_data['gradients'])} gradients and {len(color_data['patterns'])} patterns")
+        record_counts('colors', elements=len(color_data['elements']), gradients=len(color_data['gradients']),
+                      patterns=len(color_data['patterns']))
         
         # Write the outline-only SVG
-        tree.write(output_svg_path, encoding='utf-8', xml_declaration=True)
+        write_svg(tree, output_svg_path)
         
-        print(f"[OK] Outline-only SVG saved to: {output_svg_path}")
-        return output_svg_path
+        summary(f"[OK] Outline-only SVG saved to: {output_svg_path}")
+        result = stage_result(output_svg_path, stats, last_counts('colors'), svg_path)
+        note(elements_out=result.stats['elements'])
+        return result
         
-    except ET.ParseError as e:
+    except PARSE_ERRORS as e:
         raise RuntimeError(f"Failed to parse SVG file: {e}")
     except Exception as e:
         raise RuntimeError(f"Failed to process SVG file: {e}")
@@ -491,7 +548,7 @@ def _save_color_data(color_data: dict, color_folder: str):
     color_file = os.path.join(color_folder, "color_data.json")
     with open(color_file, 'w') as f:
         json.dump(color_data, f, indent=2)
-    print(f"[Saved] Color data: {color_file}")
+    summary(f"[Saved] Color data: {color_file}")
     
     # Save human-readable summary
     summary_file = os.path.join(color_folder, "color_summary.txt")
@@ -527,10 +584,11 @@ def _save_color_data(color_data: dict, color_folder: str):
         if len(color_data['elements']) > 10:
             f.write(f"  ... and {len(color_data['elements']) - 10} more elements\n")
     
-        print(f"[Saved] Color summary: {summary_file}")
+        summary(f"[Saved] Color summary: {summary_file}")
 
 
-def create_black_white_svg(svg_path: str, output_svg_path: str = None) -> str:
+@instrumented('cdr_pdf.create_black_white_svg')
+def create_black_white_svg(svg_path: str, output_svg_path: str = None, use_numpy: bool = False) -> str:
     """
     Convert all non-black colors in an SVG to white.
     
@@ -540,9 +598,12 @@ def create_black_white_svg(svg_path: str, output_svg_path: str = None) -> str:
     Args:
         svg_path: Path to the input SVG file
         output_svg_path: Path for the black/white SVG (defaults to input_bw.svg)
+        use_numpy: Convert the colors as NumPy array operations (optional
+            dependency, for very large documents; see svg_columnar.py)
     
     Returns:
-        Path to the black and white SVG file
+        Path to the black and white SVG file, as a StageResult with the
+        output's element and color statistics
         
     Raises:
         FileNotFoundError: If input SVG doesn't exist
@@ -562,81 +623,54 @@ def create_black_white_svg(svg_path: str, output_svg_path: str = None) -> str:
     
     output_svg_path = os.path.abspath(output_svg_path)
     
-    print(f"[Processing] Converting non-black colors to white in {svg_path}")
+    summary(f"[Processing] Converting non-black colors to white in {svg_path}")
     
     try:
         # Parse the SVG file
-        tree = ET.parse(svg_path)
+        tree = parse_svg(svg_path)
         root = tree.getroot()
+        note_elements('elements_in', root)
         
         converted_count = 0
+        stats = SVGStats()
+        elements = list(iter_rendered(root, stats.add_subtree))
         
         # Process gradients in defs first
-        defs_elements = root.findall(".//{http://www.w3.org/2000/svg}defs") + root.findall(".//defs")
-        for defs in defs_elements:
+        for defs in defs_of(elements):
             for child in defs:
                 if child.tag.endswith('linearGradient') or child.tag.endswith('radialGradient'):
                     _convert_gradient_to_bw(child)
                     converted_count += 1
         
         # Process all elements
-        for elem in root.iter():
-            # Convert element colors
-            if _convert_element_colors_to_bw(elem):
-                converted_count += 1
+        if use_numpy:
+            converted_count += convert_colors(elements, 'bw')['converted']
+            for elem in elements:
+                stats.add(elem)
+        else:
+            for elem in elements:
+                # Convert element colors
+                if _convert_element_colors_to_bw(elem):
+                    converted_count += 1
+                stats.add(elem)
         
-        print(f"[OK] Converted {converted_count} elements (non-black → white)")
+        summary(f"[OK] Converted {converted_count} elements (non-black → white)")
+        record_counts('black_white', converted=converted_count)
         
         # Write the black/white SVG
-        tree.write(output_svg_path, encoding='utf-8', xml_declaration=True)
+        write_svg(tree, output_svg_path)
         
-        print(f"[OK] Black/white SVG saved to: {output_svg_path}")
-        return output_svg_path
+        summary(f"[OK] Black/white SVG saved to: {output_svg_path}")
+        result = stage_result(output_svg_path, stats, last_counts('black_white'), svg_path)
+        note(elements_out=result.stats['elements'])
+        return result
         
-    except ET.ParseError as e:
+    except PARSE_ERRORS as e:
         raise RuntimeError(f"Failed to parse SVG file: {e}")
     except Exception as e:
         raise RuntimeError(f"Failed to process SVG file: {e}")
 
 
-def _color_to_bw(color_value: str) -> str:
-    """Convert a color value: keep black, change everything else to white."""
-    if not color_value or color_value in ['none', 'transparent', 'inherit', 'currentColor']:
-        return color_value
-    
-    # Keep black colors as black
-    if color_value.lower() in ['#000000', '#000', 'black']:
-        return '#000000'
-    
-    # Convert everything else to white
-    try:
-        # Check if it's actually black in different formats
-        if color_value.startswith('#'):
-            # Hex color
-            hex_color = color_value[1:]
-            if len(hex_color) == 3:
-                hex_color = ''.join([c*2 for c in hex_color])  # Convert #RGB to #RRGGBB
-            
-            if len(hex_color) == 6 and hex_color.lower() == '000000':
-                return '#000000'  # Keep pure black
-        
-        elif color_value.startswith('rgb'):
-            # RGB color
-            import re
-            rgb_match = re.search(r'rgb\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)', color_value)
-            if rgb_match:
-                r, g, b = map(int, rgb_match.groups())
-                if r == 0 and g == 0 and b == 0:
-                    return '#000000'  # Keep pure black
-        
-        # Everything else becomes white
-        return '#ffffff'
-        
-    except:
-        # Fallback to white for unparseable colors
-        return '#ffffff'
-
-
 def _convert_element_colors_to_bw(element) -> bool:
     """Convert all non-black colors in an element to white. Returns True if any changes made."""
     changed = False
@@ -644,7 +678,7 @@ def _convert_element_colors_to_bw(element) -> bool:
     # Convert fill
     fill = element.get('fill')
     if fill:
-        new_fill = _color_to_bw(fill)
+        new_fill = to_black_white(fill)
         if new_fill != fill:
             element.set('fill', new_fill)
             changed = True
@@ -652,7 +686,7 @@ def _convert_element_colors_to_bw(element) -> bool:
     # Convert stroke
     stroke = element.get('stroke')
     if stroke:
-        new_stroke = _color_to_bw(stroke)
+        new_stroke = to_black_white(stroke)
         if new_stroke != stroke:
             element.set('stroke', new_stroke)
             changed = True
@@ -670,7 +704,7 @@ def _convert_element_colors_to_bw(element) -> bool:
                 value = value.strip()
                 
                 if key in ['fill', 'stroke', 'stop-color']:
-                    new_value = _color_to_bw(value)
+                    new_value = to_black_white(value)
                     new_style_parts.append(f"{key}: {new_value}")
                     if new_value != value:
                         changed = True
@@ -685,7 +719,7 @@ def _convert_element_colors_to_bw(element) -> bool:
     # Convert stop-color for gradient stops
     stop_color = element.get('stop-color')
     if stop_color:
-        new_stop_color = _color_to_bw(stop_color)
+        new_stop_color = to_black_white(stop_color)
         if new_stop_color != stop_color:
             element.set('stop-color', new_stop_color)
             changed = True
@@ -698,7 +732,7 @@ def _convert_gradient_to_bw(gradient_elem):
     # Find all stop elements
     for stop in gradient_elem.findall(".//{http://www.w3.org/2000/svg}stop") + gradient_elem.findall(".//stop"):
         _convert_element_colors_to_bw(stop)
-def _save_raster_element(element, raster_folder: str, image_index: int) -> str:
+def _save_raster_element(element, raster_folder: str, image_index: int, raster_store: RasterStore = None) -> str:
     """
     Save a raster element (image) from SVG to a file.
     
@@ -706,6 +740,8 @@ def _save_raster_element(element, raster_folder: str, image_index: int) -> str:
         element: XML element containing image data
         raster_folder: Folder to save extracted images
         image_index: Index for naming the image file
+        raster_store: Optional shared store; embedded images go there instead
+            of raster_folder, and the metadata points at them by hash
     
     Returns:
         Path to saved image file, or None if failed
@@ -715,16 +751,15 @@ def _save_raster_element(element, raster_folder: str, image_index: int) -> str:
         href = element.get('href') or element.get('{http://www.w3.org/1999/xlink}href')
         
         if not href:
-            print(f"[Warning] No href found in image element")
+            warning(f"[Warning] No href found in image element")
             return None
         
         if href.startswith('data:image/'):
             # Handle embedded base64 data
             try:
                 # Parse data URL: data:image/png;base64,iVBORw0KGgo...
-                header, data = href.split(',', 1)
-                mime_part = header.split(';')[0].split(':')[1]  # Extract mime type
-                
+                mime_part = data_url_mime_type(href)  # Extract mime type
+
                 # Determine file extension from mime type
                 if 'png' in mime_part.lower():
                     ext = 'png'
@@ -737,21 +772,30 @@ def _save_raster_element(element, raster_folder: str, image_index: int) -> str:
                 else:
                     ext = 'bin'  # Unknown format
                 
-                # Create filename
-                filename = f"raster_{image_index:03d}.{ext}"
-                filepath = os.path.join(raster_folder, filename)
-                
-                # Decode and save
-                image_data = base64.b64decode(data)
-                with open(filepath, 'wb') as f:
-                    f.write(image_data)
+                if raster_store is not None:
+                    # Written only if no identical image is stored yet
+                    stored = raster_store.add_data_url(href, ext)
+                    filepath = stored['path']
+                    image_size, image_hash = stored['size'], stored['sha256']
+                    if not stored['new']:
+                        detail("[Info] Raster %03d already stored as %s", image_index, filepath)
+                else:
+                    # Create filename
+                    filename = f"raster_{image_index:03d}.{ext}"
+                    filepath = os.path.join(raster_folder, filename)
+                    
+                    # Decode and save chunk by chunk, never holding the whole image
+                    image_size, image_hash = decode_data_url_to_file(href, filepath)
                 
                 # Also save metadata
                 metadata_file = os.path.join(raster_folder, f"raster_{image_index:03d}_metadata.txt")
                 with open(metadata_file, 'w') as f:
                     f.write(f"Original href: {href[:100]}...\n")
                     f.write(f"MIME type: {mime_part}\n")
-                    f.write(f"File size: {len(image_data)} bytes\n")
+                    f.write(f"File size: {image_size} bytes\n")
+                    f.write(f"SHA-256: {image_hash}\n")
+                    if raster_store is not None:
+                        f.write(f"Stored at: {filepath}\n")
                     # Save element attributes
                     f.write("Element attributes:\n")
                     for key, value in element.attrib.items():
@@ -761,7 +805,7 @@ def _save_raster_element(element, raster_folder: str, image_index: int) -> str:
                 return filepath
                 
             except Exception as e:
-                print(f"[Error] Failed to decode base64 image: {e}")
+                error(f"[Error] Failed to decode base64 image: {e}")
                 return None
                 
         elif href.startswith('http://') or href.startswith('https://'):
@@ -775,7 +819,7 @@ def _save_raster_element(element, raster_folder: str, image_index: int) -> str:
                 for key, value in element.attrib.items():
                     f.write(f"  {key}: {value}\n")
             
-            print(f"[Info] External URL saved as reference: {filepath}")
+            detail("[Info] External URL saved as reference: %s", filepath)
             return filepath
             
         else:
@@ -792,7 +836,7 @@ def _save_raster_element(element, raster_folder: str, image_index: int) -> str:
             return filepath
             
     except Exception as e:
-        print(f"[Error] Failed to save raster element: {e}")
+        error(f"[Error] Failed to save raster element: {e}")
         return None
 
 
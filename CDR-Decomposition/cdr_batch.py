@@ -0,0 +1,149 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+#usage python3 cdr_batch.py <cdr_file_or_dir>... --output-dir out/ [--chunk-size 50]
+
+
+def collect_cdr_files(inputs) -> list:
+    """Expand a mix of CDR files and directories into a sorted list of CDR paths."""
+    cdr_files = []
+    for item in inputs:
+        item = os.path.abspath(item)
+        if os.path.isdir(item):
+            for name in sorted(os.listdir(item)):
+                if name.lower().endswith('.cdr'):
+                    cdr_files.append(os.path.join(item, name))
+        else:
+            cdr_files.append(item)
+    return cdr_files
+
+
+def cdr_to_svg_batch(paths, output_dir: str, chunk_size: int = 50, timeout: float = None) -> dict:
+    """
+    Convert many CorelDRAW .cdr files to SVG with few LibreOffice invocations.
+
+    LibreOffice accepts many input files per --convert-to call, so the inputs
+    are split into chunks of chunk_size and each chunk costs one process start.
+    Every output is mapped back to its input; a file that fails to convert is
+    reported without aborting the rest of its chunk.
+
+    Args:
+        paths: CDR file paths and/or directories containing CDR files
+        output_dir: Directory for the SVG files
+        chunk_size: Maximum number of files per LibreOffice invocation
+        timeout: Optional timeout in seconds for each invocation
+
+    Returns:
+        Dict with 'converted' (input path -> SVG path) and
+        'failed' (input path -> error message)
+
+    Raises:
+        ValueError: If chunk_size is not positive
+        RuntimeError: If LibreOffice is not installed
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+
+    libreoffice = shutil.which("libreoffice")
+    if libreoffice is None:
+        raise RuntimeError("LibreOffice not found. Install with: sudo apt install libreoffice")
+
+    output_dir = os.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    converted = {}
+    failed = {}
+
+    # Outputs are named after the input stem, so two inputs with the same stem would overwrite each other
+    expected = {}
+    owners = {}
+    for cdr_path in collect_cdr_files(paths):
+        if not os.path.exists(cdr_path):
+            failed[cdr_path] = "Input file not found"
+            continue
+        svg_path = os.path.join(output_dir, os.path.splitext(os.path.basename(cdr_path))[0] + ".svg")
+        if svg_path in owners:
+            failed[cdr_path] = f"Output name collides with {owners[svg_path]}"
+            continue
+        owners[svg_path] = cdr_path
+        expected[cdr_path] = svg_path
+
+    inputs = list(expected)
+    chunks = [inputs[i:i + chunk_size] for i in range(0, len(inputs), chunk_size)]
+    print(f"[Batch] Converting {len(inputs)} CDR files in {len(chunks)} LibreOffice invocations")
+
+    # One private profile for the whole batch so concurrent batches don't share a profile lock
+    profile_dir = tempfile.mkdtemp(prefix="cdr_batch_profile_")
+    try:
+        for chunk_index, chunk in enumerate(chunks, 1):
+            # Remember existing outputs so stale files from an earlier run are not counted as success
+            previous_mtimes = {}
+            for cdr_path in chunk:
+                svg_path = expected[cdr_path]
+                if os.path.exists(svg_path):
+                    previous_mtimes[svg_path] = os.stat(svg_path).st_mtime_ns
+
+            cmd = [
+                libreoffice,
+                "--headless",
+                f"-env:UserInstallation={Path(profile_dir).as_uri()}",
+                "--convert-to", "svg",
+                "--outdir", output_dir,
+            ] + chunk
+
+            error = ""
+            try:
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+                if result.returncode != 0:
+                    error = result.stderr.strip() or f"LibreOffice exited with code {result.returncode}"
+            except subprocess.TimeoutExpired:
+                error = f"LibreOffice timed out after {timeout}s"
+
+            chunk_ok = 0
+            for cdr_path in chunk:
+                svg_path = expected[cdr_path]
+                written = os.path.exists(svg_path) and (
+                    svg_path not in previous_mtimes
+                    or os.stat(svg_path).st_mtime_ns != previous_mtimes[svg_path]
+                )
+                if written:
+                    converted[cdr_path] = svg_path
+                    chunk_ok += 1
+                else:
+                    failed[cdr_path] = error or "LibreOffice produced no SVG for this file"
+
+            print(f"[Batch] Chunk {chunk_index}/{len(chunks)}: {chunk_ok}/{len(chunk)} converted")
+    finally:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+    print(f"[OK] Converted {len(converted)} files, {len(failed)} failed")
+    return {'converted': converted, 'failed': failed}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert many CDR files to SVG in chunked LibreOffice invocations.")
+    parser.add_argument("inputs", nargs="+", help="CDR files or directories containing CDR files")
+    parser.add_argument("--output-dir", "-o", required=True, help="Directory for the SVG files")
+    parser.add_argument("--chunk-size", type=int, default=50, help="Files per LibreOffice invocation (default: 50)")
+    parser.add_argument("--timeout", type=float, default=None, help="Timeout in seconds per invocation")
+    args = parser.parse_args()
+
+    try:
+        results = cdr_to_svg_batch(args.inputs, args.output_dir, args.chunk_size, args.timeout)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"\n=== BATCH CONVERSION COMPLETE ===")
+    for cdr_path, svg_path in results['converted'].items():
+        print(f"[OK] {cdr_path} -> {svg_path}")
+    for cdr_path, error in results['failed'].items():
+        print(f"[Failed] {cdr_path}: {error}")
+
+    sys.exit(1 if results['failed'] else 0)
@@ -0,0 +1,103 @@
+"""
+CDR decomposition stages as an importable package.
+
+Importing the package loads nothing else: each name below is imported from
+its module on first use, so worker processes and command line tools only pay
+for the stages they call, and no notebook cell ever runs.
+
+Usage:
+    import cdr_decomposition as cdr
+    vectors = cdr.remove_raster_from_svg("design.svg")
+    print(vectors.stats['elements'])
+"""
+import importlib
+import importlib.util
+import os
+import sys
+
+# The modules live next to this package folder
+SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Module name -> file, for modules whose file name isn't importable as is
+_MODULE_FILES = {
+    'cdr_pdf': 'cdr-pdf.py',
+}
+
+# Public name -> module it is defined in
+_EXPORTS = {
+    'cdr_to_svg': 'decomposition',
+    'remove_raster_from_svg': 'decomposition',
+    'convert_svg_to_greyscale': 'decomposition',
+    'invert_svg_colors': 'decomposition',
+    'extract_bijection_bw_elements': 'decomposition',
+    'filter_to_geometric_shapes': 'decomposition',
+    'run_svg_pipeline': 'decomposition',
+    'load_svg_document': 'decomposition',
+    'SVGDocument': 'decomposition',
+    'PIPELINE_STAGES': 'decomposition',
+    'DEFAULT_PIPELINE': 'decomposition',
+    'cdr_to_pdf': 'cdr_pdf',
+    'remove_colors_from_svg': 'cdr_pdf',
+    'create_black_white_svg': 'cdr_pdf',
+    'cdr_to_svg_batch': 'cdr_batch',
+    'LibreOfficePool': 'libreoffice_pool',
+    'process_document': 'pipeline_runner',
+    'iter_pipeline_batch': 'pipeline_runner',
+    'run_pipeline_batch': 'pipeline_runner',
+    'RasterStore': 'svg_rasters',
+    'SVGStats': 'svg_stats',
+    'BuildCache': 'build_cache',
+    'ThresholdSweep': 'threshold_sweep',
+    'convert_colors': 'svg_columnar',
+    'SpatialIndex': 'svg_spatial',
+    'consolidate_segments': 'svg_segments',
+    'set_skip_subtrees': 'svg_traversal',
+    'iter_rendered': 'svg_traversal',
+    'parse_svg': 'svg_xml',
+    'write_svg': 'svg_xml',
+    'StageResult': 'svg_stats',
+    'Instrumentation': 'instrumentation',
+    'set_log_level': 'reporting',
+    'last_counts': 'reporting',
+}
+
+__all__ = sorted(_EXPORTS) + ['load_module']
+
+
+def load_module(name: str):
+    """
+    Import one of the decomposition modules by name, e.g. 'decomposition' or 'cdr_pdf'.
+
+    cdr-pdf.py is loaded from its file and registered as 'cdr_pdf', so it is
+    only executed once per process like any other module.
+    """
+    if SOURCE_DIR not in sys.path:
+        sys.path.insert(0, SOURCE_DIR)
+
+    if name not in _MODULE_FILES:
+        return importlib.import_module(name)
+
+    module = sys.modules.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(SOURCE_DIR, _MODULE_FILES[name]))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[name]
+            raise
+    return module
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(load_module(_EXPORTS[name]), name)
+    # Cache it so the next lookup doesn't come back here
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,5 @@
+import sys
+
+from cdr_decomposition.cli import main
+
+sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+The cdr-decompose command: run any choice of stages on many CDR/SVG files
+in parallel and stream progress as JSON lines on stdout.
+
+Usage:
+    cdr-decompose 'jobs/**/*.cdr' --stages raster,bw,pdf -o out/ --jobs 8
+    python -m cdr_decomposition designs/ --layout flat -o out/
+
+Each line is one JSON object with an 'event' field:
+    start: 'documents' and 'jobs'
+    document: 'input', 'ok', 'seconds' and 'outputs' (stage -> 'path',
+        'bytes_out' and 'elements'), or 'error' and 'log' on failure
+    done: 'completed', 'failed' and 'seconds'
+The exit status is 1 if any document failed.
+"""
+import argparse
+import json
+import os
+import time
+
+from cdr_decomposition import load_module
+
+
+def _emit(event: str, **fields):
+    print(json.dumps({'event': event, **fields}), flush=True)
+
+
+def _describe_output(path) -> dict:
+    """Path plus what a StageResult knows about it; plain paths (PDFs) only get the path."""
+    stats = getattr(path, 'stats', None) or {}
+    return {
+        'path': str(path),
+        'bytes_out': getattr(path, 'bytes_out', None),
+        'elements': stats.get('elements'),
+    }
+
+
+def _parse_stages(value: str, known) -> list:
+    stages = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in stages if name not in known]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown stages: {', '.join(unknown)} (choose from {', '.join(known)})")
+    return stages
+
+
+def _threshold(value: str) -> int:
+    threshold = int(value)
+    if not 0 <= threshold <= 255:
+        raise argparse.ArgumentTypeError(f"threshold must be 0-255, got {threshold}")
+    return threshold
+
+
+def build_parser() -> argparse.ArgumentParser:
+    decomposition = load_module('decomposition')
+    pipeline_runner = load_module('pipeline_runner')
+    known = tuple(decomposition.PIPELINE_STAGES) + pipeline_runner.FILE_STAGES
+
+    parser = argparse.ArgumentParser(
+        prog="cdr-decompose",
+        description="Decompose CDR/SVG files into their raster, greyscale, bijection, geometric, outline and black/white layers.",
+    )
+    parser.add_argument("inputs", nargs="+", help="CDR/SVG files, directories containing them or glob patterns (quote them)")
+    parser.add_argument("--stages", type=lambda value: _parse_stages(value, known),
+                        default=list(decomposition.DEFAULT_PIPELINE),
+                        help=f"Comma-separated stages to run, from: {', '.join(known)} "
+                             f"(default: {','.join(decomposition.DEFAULT_PIPELINE)})")
+    parser.add_argument("--black-threshold", type=_threshold, default=50, help="Greyscale luminance at or below which a color becomes black (default: 50)")
+    parser.add_argument("--white-threshold", type=_threshold, default=200, help="Greyscale luminance at or above which a color becomes white (default: 200)")
+    parser.add_argument("--output-dir", "-o", default=None, help="Parent directory for outputs (default: next to each input)")
+    parser.add_argument("--layout", choices=pipeline_runner.LAYOUTS, default="per-document",
+                        help="Subfolder per document under --output-dir, or all outputs in one folder (default: per-document)")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--write-intermediates", action="store_true", help="Also write the output of every pipeline stage, not only the last")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip conversions and stages whose outputs are up to date with the input, thresholds and code")
+    parser.add_argument("--numpy", action="store_true",
+                        help="Convert colors with the NumPy columnar backend, for very large documents (needs numpy)")
+    parser.add_argument("--spatial-index", action="store_true",
+                        help="Save a spatial index of the geometric output next to it (<name>.spatial.json)")
+    parser.add_argument("--consolidate", action="store_true",
+                        help="Merge collinear segments that overlap or touch and drop duplicate shapes in the geometric output")
+    parser.add_argument("--skip-subtrees", default=None, metavar="TAGS",
+                        help="Comma-separated tags whose subtrees every stage passes through untouched "
+                             "(default: font,font-face,glyph,missing-glyph,clipPath; '' for none)")
+    parser.add_argument("--no-rasters", action="store_true", help="Don't save extracted raster images")
+    parser.add_argument("--no-colors", action="store_true", help="Don't save the colors removed by the outlines stage")
+    parser.add_argument("--raster-store", default=None, help="Shared content-addressed folder for extracted rasters")
+    return parser
+
+
+def main(argv=None) -> int:
+    """
+    Run the command.
+
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+
+    Returns:
+        Exit status: 0 if every document was decomposed, 1 otherwise
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error(f"--jobs must be positive, got {args.jobs}")
+
+    if args.skip_subtrees is not None:
+        load_module('svg_traversal').configure_skip_subtrees(args.skip_subtrees)
+    pipeline_runner = load_module('pipeline_runner')
+    inputs = pipeline_runner.collect_inputs(args.inputs)
+    jobs = min(args.jobs or os.cpu_count() or 1, max(len(inputs), 1))
+    _emit('start', documents=len(inputs), jobs=jobs, stages=args.stages)
+
+    started = time.perf_counter()
+    completed = failed = 0
+    for result in pipeline_runner.iter_pipeline_batch(
+        inputs, args.output_dir, jobs,
+        layout=args.layout,
+        stages=args.stages,
+        black_threshold=args.black_threshold,
+        white_threshold=args.white_threshold,
+        write_intermediates=args.write_intermediates,
+        save_rasters=not args.no_rasters,
+        raster_store=args.raster_store,
+        incremental=args.incremental,
+        use_numpy=args.numpy,
+        spatial_index=args.spatial_index,
+        consolidate=args.consolidate,
+        save_colors=not args.no_colors,
+    ):
+        fields = {'input': result['input'], 'ok': result['ok'], 'seconds': round(result['seconds'], 3)}
+        if result['ok']:
+            completed += 1
+            fields['outputs'] = {name: _describe_output(path) for name, path in result['outputs'].items()}
+        else:
+            failed += 1
+            fields['error'] = result['error']
+            fields['log'] = result['log']
+        _emit('document', **fields)
+
+    _emit('done', completed=completed, failed=failed, seconds=round(time.perf_counter() - started, 3))
+    return 1 if failed else 0
@@ -0,0 +1,1878 @@
+import copy
+import os
+import xml.etree.ElementTree as ET
+
+from build_cache import active as active_cache, cached_output, stage_key, store_output
+from instrumentation import instrumented, note, note_elements, stage as instrument_stage
+from reporting import detail, error, last_counts, record_counts, summary, warning
+from svg_colors import GreyscaleLUT, invert_color, is_black_color, is_white_color
+from svg_columnar import convert_colors
+from svg_index import SVGIndex
+from svg_paths import classify_path, classify_points
+from svg_segments import consolidate_segments
+from svg_spatial import SpatialIndex, spatial_index_path
+from svg_stats import SVGStats, stage_result
+from svg_traversal import defs_of, iter_rendered
+from svg_xml import PARSE_ERRORS, parse_svg, write_svg
+
+# The decomposition stages that mater_script.py walks through step by step.
+# Importing this module runs nothing: LibreOffice, the raster helpers and the
+# streaming parser are only loaded by the stages that use them, so worker
+# processes can import it cheaply.
+
+
+@instrumented('mater.cdr_to_svg')
+def cdr_to_svg(cdr_path: str, output_dir: str = None, pool=None) -> str:
+    """
+    Convert a CorelDRAW .cdr file to SVG using LibreOffice Draw.
+    
+    Args:
+        cdr_path: Path to the input CDR file
+        output_dir: Directory for output (defaults to same as input)
+        pool: Optional started LibreOfficePool (libreoffice_pool.py); the conversion
+            then runs on a long-lived worker instead of a fresh LibreOffice process
+    
+    Returns:
+        Path to the generated SVG file
+        
+    Raises:
+        FileNotFoundError: If input file doesn't exist
+        RuntimeError: If LibreOffice conversion fails
+    """
+    cdr_path = os.path.abspath(cdr_path)
+    
+    # Validate input file
+    if not os.path.exists(cdr_path):
+        raise FileNotFoundError(f"CDR file not found: {cdr_path}")
+    
+    # Set output directory
+    if output_dir is None:
+        output_dir = os.path.dirname(cdr_path)
+    
+    if pool is not None:
+        expected_svg = os.path.join(
+            os.path.abspath(output_dir),
+            os.path.splitext(os.path.basename(cdr_path))[0] + ".svg"
+        )
+        summary(f"🔄 Converting CDR to SVG on pooled LibreOffice worker...")
+        pool.convert(cdr_path, expected_svg, 'svg')
+        summary(f"📄 SVG file created: {expected_svg}")
+        return expected_svg
+    
+    import shutil
+    import subprocess
+    
+    # Check LibreOffice availability
+    libreoffice = shutil.which("libreoffice")
+    if libreoffice is None:
+        raise RuntimeError("LibreOffice not found. Install with: sudo apt install libreoffice")
+    
+    summary(f"🔄 Converting CDR to SVG...")
+    summary(f"📁 Input:  {cdr_path}")
+    summary(f"📁 Output: {output_dir}")
+    
+    # Execute LibreOffice conversion
+    cmd = [
+        libreoffice,
+        "--headless",
+        "--convert-to", "svg",
+        "--outdir", output_dir,
+        cdr_path
+    ]
+    
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    
+    # Check if conversion succeeded
+    expected_svg = os.path.join(
+        output_dir,
+        os.path.splitext(os.path.basename(cdr_path))[0] + ".svg"
+    )
+    
+    if result.returncode != 0 or not os.path.exists(expected_svg):
+        error(f"❌ Conversion failed!")
+        error(f"Command: {' '.join(cmd)}")
+        error(f"Error: {result.stderr}")
+        raise RuntimeError(f"LibreOffice failed to convert CDR to SVG")
+    
+    summary(f"✅ Conversion successful!")
+    summary(f"📄 SVG file created: {expected_svg}")
+    
+    return expected_svg
+
+
+@instrumented('mater.remove_raster_from_svg')
+def remove_raster_from_svg(svg_path: str, output_svg_path: str = None, save_rasters: bool = True, streaming: bool = False,
+                           raster_store=None) -> str:
+    """
+    Remove all raster components from an SVG file, keeping only vector elements.
+    
+    With streaming=True the file is never held in memory as a whole: vector
+    content is written to the output as it is parsed and each raster is saved
+    and released as soon as its tag has been read (see svg_stream.py). Use it
+    for exports with hundreds of MB of embedded bitmaps. The output file is
+    identical in both modes.
+    
+    With a raster_store (a RasterStore or its folder, see svg_rasters.py),
+    each distinct image is written once to the shared store and the
+    extraction folder only gets per-occurrence metadata pointing at it.
+    
+    Args:
+        svg_path: Path to the input SVG file
+        output_svg_path: Path for the cleaned SVG (defaults to input_vectors.svg)
+        save_rasters: Whether to save extracted raster images (default: True)
+        streaming: Stream the file instead of parsing it into a tree (default: False)
+        raster_store: Shared store for extracted rasters (default: None)
+    
+    Returns:
+        Path to the cleaned SVG file, as a StageResult with the output's
+        element and color statistics (see svg_stats.py)
+    """
+    svg_path = os.path.abspath(svg_path)
+    
+    if not os.path.exists(svg_path):
+        raise FileNotFoundError(f"SVG file not found: {svg_path}")
+    
+    if output_svg_path is None:
+        base_name = os.path.splitext(os.path.basename(svg_path))[0]
+        output_svg_path = os.path.join(
+            os.path.dirname(svg_path),
+            f"{base_name}_vectors.svg"
+        )
+    
+    output_svg_path = os.path.abspath(output_svg_path)
+    
+    key = stage_key('raster', svg_path, save_rasters=save_rasters, raster_store=_raster_store_root(raster_store))
+    cached = _up_to_date(output_svg_path, key)
+    if cached is not None:
+        return cached
+    
+    # Create raster extraction folder
+    raster_folder = None
+    if save_rasters:
+        base_name = os.path.splitext(os.path.basename(svg_path))[0]
+        raster_folder = os.path.join(
+            os.path.dirname(svg_path),
+            f"{base_name}_extracted_rasters"
+        )
+        os.makedirs(raster_folder, exist_ok=True)
+        summary(f"📁 Raster extraction folder: {raster_folder}")
+        if isinstance(raster_store, str):
+            from svg_rasters import RasterStore
+            raster_store = RasterStore(raster_store)
+        if raster_store is not None:
+            summary(f"📦 Raster store: {raster_store.root}")
+    
+    summary(f"🔄 Removing raster elements from SVG...")
+
+    stats = SVGStats()
+    # Saved rasters are part of the output: it isn't up to date once they are gone
+    saved_files = []
+    try:
+        if streaming:
+            _stream_remove_raster(svg_path, output_svg_path, raster_folder, raster_store, stats, saved_files)
+            summary(f"📄 Vector-only SVG saved to: {output_svg_path}")
+            result = stage_result(output_svg_path, stats, last_counts('raster'), svg_path)
+            store_output(output_svg_path, key, result, saved_files)
+            return result
+
+        # Parse the SVG file
+        tree = parse_svg(svg_path)
+        note_elements('elements_in', tree.getroot())
+
+        _remove_raster_from_tree(tree.getroot(), raster_folder, raster_store=raster_store, stats=stats,
+                                 written=saved_files)
+
+        # Write the cleaned SVG
+        write_svg(tree, output_svg_path)
+
+        summary(f"📄 Vector-only SVG saved to: {output_svg_path}")
+        result = stage_result(output_svg_path, stats, last_counts('raster'), svg_path)
+        note(elements_out=result.stats['elements'])
+        store_output(output_svg_path, key, result, saved_files)
+        return result
+
+    except PARSE_ERRORS as e:
+        raise RuntimeError(f"Failed to parse SVG file: {e}")
+    except Exception as e:
+        raise RuntimeError(f"Failed to process SVG file: {e}")
+
+
+def _up_to_date(output_svg_path: str, key: str):
+    """Return the recorded result if the active build cache says the output is up to date (see build_cache.py)."""
+    result = cached_output(output_svg_path, key)
+    if result is not None:
+        summary(f"⏭️ {os.path.basename(output_svg_path)} is up to date, skipping")
+        note(cached=True, elements_out=result.stats.get('elements'))
+    return result
+
+
+def _raster_store_root(raster_store) -> str:
+    """Folder of a RasterStore or its path, as recorded in build cache keys."""
+    if raster_store is None or isinstance(raster_store, str):
+        return raster_store and os.path.abspath(raster_store)
+    return raster_store.root
+
+
+def _remove_raster_from_tree(root, raster_folder: str = None, index: SVGIndex = None, raster_store: "RasterStore" = None,
+                             stats: SVGStats = None, written: list = None) -> tuple:
+    """
+    Remove all raster elements from an already parsed SVG tree, in place.
+    Rasters are saved to raster_folder (or raster_store) first when a folder is given,
+    and the files saved are appended to written, if given.
+    The remaining elements are tallied into stats, if given.
+
+    Returns: (removed_count, saved_count)
+    """
+    if index is None:
+        index = SVGIndex(root)
+
+    # Counter for removed elements
+    removed_count = 0
+    saved_count = 0
+
+    # Find all elements to remove
+    elements_to_remove = []
+
+    for elem in iter_rendered(root, stats.add_subtree if stats is not None else None):
+        if stats is not None:
+            stats.add(elem)
+        removal_type = _raster_removal_type(elem)
+        if removal_type:
+            elements_to_remove.append((elem, removal_type))
+
+    # Remove the identified elements and save raster data
+    for elem_to_remove, removal_type in elements_to_remove:
+        # Save raster data before removing
+        if raster_folder:
+            saved_file = _save_raster_element(elem_to_remove, raster_folder, saved_count + 1, raster_store, written)
+            if saved_file:
+                saved_count += 1
+                detail("💾 Saved raster: %s", os.path.basename(saved_file))
+
+        # Remove the element from its parent
+        if index.remove(elem_to_remove):
+            removed_count += 1
+            if stats is not None:
+                stats.discard_subtree(elem_to_remove)
+            detail("🗑️  Removed %s: %s", removal_type, elem_to_remove.tag)
+
+    summary(f"✅ Removed {removed_count} raster elements")
+    if raster_folder:
+        summary(f"💾 Saved {saved_count} raster images")
+
+    record_counts('raster', removed=removed_count, saved=saved_count)
+    return removed_count, saved_count
+
+
+# Rasters queued for the background saver before parsing waits for it
+MAX_PENDING_RASTERS = 2
+
+
+def _stream_remove_raster(svg_path: str, output_svg_path: str, raster_folder: str = None, raster_store: "RasterStore" = None,
+                          stats: SVGStats = None, written: list = None) -> tuple:
+    """
+    Streaming version of _remove_raster_from_tree that reads svg_path and
+    writes output_svg_path without building the tree. Rasters are saved in
+    the same order and under the same names as in tree mode.
+
+    Rasters are decoded on a background thread while parsing carries on. At
+    most MAX_PENDING_RASTERS wait their turn, so a run of large images can't
+    pile up in memory. A raster that fails to decode leaves a gap in the
+    numbering instead of passing its number on to the next one. The written
+    elements are tallied into stats, if given, and the saved files appended
+    to written.
+
+    Returns: (removed_count, saved_count)
+    """
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+    from svg_stream import stream_filter_svg
+
+    removed_count = 0
+    saved_count = 0
+    submitted_count = 0
+    pending = deque()
+
+    def collect(future):
+        nonlocal saved_count
+        saved_file = future.result()
+        if saved_file:
+            saved_count += 1
+            detail("💾 Saved raster: %s", os.path.basename(saved_file))
+
+    with ThreadPoolExecutor(max_workers=1) as saver:
+
+        def drop_raster(elem):
+            nonlocal removed_count, submitted_count
+            removal_type = _raster_removal_type(elem)
+            if not removal_type:
+                return False
+
+            # Elements without an href are skipped here so they don't take a number
+            if raster_folder and (elem.get('href') or elem.get('{http://www.w3.org/1999/xlink}href')):
+                submitted_count += 1
+                pending.append(saver.submit(_save_raster_element, elem, raster_folder, submitted_count, raster_store,
+                                            written))
+                while len(pending) > MAX_PENDING_RASTERS:
+                    collect(pending.popleft())
+
+            removed_count += 1
+            detail("🗑️  Removed %s: %s", removal_type, elem.tag)
+            return True
+
+        try:
+            counts = stream_filter_svg(svg_path, output_svg_path, drop_raster, stats.add if stats is not None else None)
+            note(elements_out=counts['written'])
+        finally:
+            while pending:
+                collect(pending.popleft())
+
+    summary(f"✅ Removed {removed_count} raster elements")
+    if raster_folder:
+        summary(f"💾 Saved {saved_count} raster images")
+
+    record_counts('raster', removed=removed_count, saved=saved_count)
+    return removed_count, saved_count
+
+
+def _raster_removal_type(elem) -> str:
+    """Return why elem counts as a raster ('image_tag' or 'data_url'), or None."""
+    # Check if element is an image tag
+    if elem.tag.endswith('image') or 'image' in elem.tag.lower():
+        return 'image_tag'
+
+    # Check for data URL in href attributes
+    href = elem.get('href') or elem.get('{http://www.w3.org/1999/xlink}href')
+    if href and href.startswith('data:image/'):
+        return 'data_url'
+
+    return None
+
+
+def _save_raster_element(element, raster_folder: str, image_index: int, raster_store: "RasterStore" = None,
+                         written: list = None) -> str:
+    """
+    Save a raster element (image) from SVG to a file.
+
+    With a raster_store, embedded images go into the shared content-addressed
+    store instead, and the per-occurrence metadata file in raster_folder
+    points at the stored image by hash. Every file the raster depends on
+    (image, store object, metadata) is appended to written, if given.
+    """
+    from svg_rasters import data_url_mime_type, decode_data_url_to_file
+
+    try:
+        # Get image data from href attributes
+        href = element.get('href') or element.get('{http://www.w3.org/1999/xlink}href')
+        
+        if not href:
+            warning(f"⚠️  No href found in image element")
+            return None
+        
+        if href.startswith('data:image/'):
+            # Handle embedded base64 data
+            try:
+                # Parse data URL: data:image/png;base64,iVBORw0KGgo...
+                mime_part = data_url_mime_type(href)  # Extract mime type
+                
+                # Determine file extension from mime type
+                if 'png' in mime_part.lower():
+                    ext = 'png'
+                elif 'jpeg' in mime_part.lower() or 'jpg' in mime_part.lower():
+                    ext = 'jpg'
+                elif 'gif' in mime_part.lower():
+                    ext = 'gif'
+                elif 'svg' in mime_part.lower():
+                    ext = 'svg'
+                else:
+                    ext = 'bin'  # Unknown format
+                
+                if raster_store is not None:
+                    # Written only if no identical image is stored yet
+                    stored = raster_store.add_data_url(href, ext)
+                    filepath = stored['path']
+                    image_size, image_hash = stored['size'], stored['sha256']
+                    if not stored['new']:
+                        detail("♻️  Raster %03d already stored as %s", image_index, os.path.basename(filepath))
+                else:
+                    # Create filename
+                    filename = f"raster_{image_index:03d}.{ext}"
+                    filepath = os.path.join(raster_folder, filename)
+                    
+                    # Decode and save chunk by chunk, never holding the whole image
+                    image_size, image_hash = decode_data_url_to_file(href, filepath)
+                
+                # Save metadata
+                metadata_file = os.path.join(raster_folder, f"raster_{image_index:03d}_metadata.txt")
+                with open(metadata_file, 'w') as f:
+                    f.write(f"MIME type: {mime_part}\n")
+                    f.write(f"File size: {image_size} bytes\n")
+                    f.write(f"SHA-256: {image_hash}\n")
+                    if raster_store is not None:
+                        f.write(f"Stored at: {filepath}\n")
+                    f.write("Element attributes:\n")
+                    for key, value in element.attrib.items():
+                        if not key.endswith('href'):  # Skip the long data URL
+                            f.write(f"  {key}: {value}\n")
+                
+                if written is not None:
+                    written.extend([filepath, metadata_file])
+                return filepath
+                
+            except Exception as e:
+                error(f"❌ Failed to decode base64 image: {e}")
+                return None
+                
+        else:
+            # Handle file references or external URLs
+            filename = f"raster_{image_index:03d}_reference.txt"
+            filepath = os.path.join(raster_folder, filename)
+            
+            with open(filepath, 'w') as f:
+                f.write(f"Image reference: {href}\n")
+                f.write("Element attributes:\n")
+                for key, value in element.attrib.items():
+                    f.write(f"  {key}: {value}\n")
+            
+            if written is not None:
+                written.append(filepath)
+            return filepath
+            
+    except Exception as e:
+        error(f"❌ Failed to save raster element: {e}")
+        return None
+
+
+@instrumented('mater.convert_svg_to_greyscale')
+def convert_svg_to_greyscale(svg_path: str, output_svg_path: str = None, black_threshold: int = 50, white_threshold: int = 200,
+                             use_numpy: bool = False) -> str:
+    """
+    Convert all colors in an SVG to greyscale values using luminance calculation.
+    Colors close to black are converted to perfect black for die-line isolation.
+    Colors close to white are converted to perfect white for background isolation.
+    
+    Args:
+        svg_path: Path to the input SVG file
+        output_svg_path: Path for the greyscale SVG (defaults to input_greyscale.svg)
+        black_threshold: Luminance threshold below which colors become pure black (0-255)
+        white_threshold: Luminance threshold above which colors become pure white (0-255)
+        use_numpy: Convert the colors as NumPy array operations (optional
+            dependency, for very large documents; see svg_columnar.py)
+    
+    Returns:
+        Path to the greyscale SVG file, as a StageResult with the output's
+        element and color statistics
+    """
+    svg_path = os.path.abspath(svg_path)
+    
+    if not os.path.exists(svg_path):
+        raise FileNotFoundError(f"SVG file not found: {svg_path}")
+    
+    if output_svg_path is None:
+        base_name = os.path.splitext(os.path.basename(svg_path))[0]
+        output_svg_path = os.path.join(
+            os.path.dirname(svg_path),
+            f"{base_name}_greyscale.svg"
+        )
+    
+    output_svg_path = os.path.abspath(output_svg_path)
+    
+    key = stage_key('greyscale', svg_path, black_threshold=black_threshold, white_threshold=white_threshold)
+    cached = _up_to_date(output_svg_path, key)
+    if cached is not None:
+        return cached
+    
+    summary(f"🔄 Converting colors to greyscale (black ≤ {black_threshold}, white ≥ {white_threshold})...")
+    
+    try:
+        # Parse the SVG file
+        tree = parse_svg(svg_path)
+        note_elements('elements_in', tree.getroot())
+
+        stats = SVGStats()
+        _convert_tree_to_greyscale(tree.getroot(), black_threshold, white_threshold, stats, use_numpy)
+
+        # Write the greyscale SVG
+        write_svg(tree, output_svg_path)
+        
+        summary(f"📄 Greyscale SVG saved to: {output_svg_path}")
+        result = stage_result(output_svg_path, stats, last_counts('greyscale'), svg_path)
+        note(elements_out=result.stats['elements'])
+        store_output(output_svg_path, key, result)
+        return result
+        
+    except PARSE_ERRORS as e:
+        raise RuntimeError(f"Failed to parse SVG file: {e}")
+    except Exception as e:
+        raise RuntimeError(f"Failed to process SVG file: {e}")
+
+
+# Color attributes and style properties the greyscale stage converts
+GREYSCALE_ATTRIBUTES = ('fill', 'stroke', 'stop-color')
+GREYSCALE_STYLE_PROPERTIES = ('fill', 'stroke', 'stop-color', 'color')
+
+
+def collect_greyscale_palette(root) -> list:
+    """Every distinct color value the greyscale stage would convert, in document order."""
+    palette = {}
+    for elem in iter_rendered(root):
+        for name in GREYSCALE_ATTRIBUTES:
+            value = elem.get(name)
+            if value:
+                palette[value] = None
+        style = elem.get('style')
+        if style:
+            for prop in style.split(';'):
+                if ':' in prop:
+                    key, value = prop.split(':', 1)
+                    if key.strip() in GREYSCALE_STYLE_PROPERTIES:
+                        palette[value.strip()] = None
+    return list(palette)
+
+
+def _convert_tree_to_greyscale(root, black_threshold: int = 50, white_threshold: int = 200, stats: SVGStats = None,
+                               use_numpy: bool = False) -> tuple:
+    """
+    Convert all colors in an already parsed SVG tree to greyscale, in place,
+    tallying the converted elements into stats if given.
+
+    Colors go through a GreyscaleLUT: each distinct color of the palette is
+    converted once and every attribute after that is a dictionary lookup.
+    With use_numpy the elements are converted by the columnar backend (see
+    svg_columnar.py), which pays off for documents with hundreds of
+    thousands of colored elements or tens of thousands of colors.
+    Returns: (converted_count, black_count, white_count)
+    """
+    converted_count = 0
+    black_count = 0
+    white_count = 0
+    lut = GreyscaleLUT((), black_threshold, white_threshold)
+    elements = list(iter_rendered(root, stats.add_subtree if stats is not None else None))
+
+    # Process gradients in defs first
+    for defs in defs_of(elements):
+        for child in defs:
+            if child.tag.endswith('linearGradient') or child.tag.endswith('radialGradient'):
+                result = _convert_gradient_to_greyscale(child, black_threshold, white_threshold, lut)
+                converted_count += result[0]
+                black_count += result[1]
+                white_count += result[2]
+
+    # Process all elements
+    if use_numpy:
+        result = convert_colors(elements, 'greyscale', black_threshold, white_threshold)
+        converted_count += result['converted']
+        black_count += result['black']
+        white_count += result['white']
+        if stats is not None:
+            for elem in elements:
+                stats.add(elem)
+    else:
+        for elem in elements:
+            result = _convert_element_colors_to_greyscale(elem, black_threshold, white_threshold, lut)
+            if result[0]:  # If any changes were made
+                converted_count += 1
+            black_count += result[1]
+            white_count += result[2]
+            if stats is not None:
+                stats.add(elem)
+
+    summary(f"✅ Converted {converted_count} elements to greyscale")
+    summary(f"🖤 Converted {black_count} colors to pure black (die-lines)")
+    summary(f"🤍 Converted {white_count} colors to pure white (backgrounds)")
+
+    record_counts('greyscale', converted=converted_count, black=black_count, white=white_count)
+    return converted_count, black_count, white_count
+
+
+def _convert_element_colors_to_greyscale(element, black_threshold: int = 50, white_threshold: int = 200,
+                                         lut: GreyscaleLUT = None) -> tuple:
+    """
+    Convert all colors in an element to greyscale, looking them up in lut
+    (a GreyscaleLUT for the same thresholds) if given.
+    Returns: (changed, black_count, white_count)
+    """
+    if lut is None:
+        lut = GreyscaleLUT((), black_threshold, white_threshold)
+    changed = False
+    black_count = 0
+    white_count = 0
+    
+    # Convert fill
+    fill = element.get('fill')
+    if fill:
+        new_fill, was_black, was_white = lut[fill]
+        if new_fill != fill:
+            element.set('fill', new_fill)
+            changed = True
+            if was_black:
+                black_count += 1
+            elif was_white:
+                white_count += 1
+    
+    # Convert stroke
+    stroke = element.get('stroke')
+    if stroke:
+        new_stroke, was_black, was_white = lut[stroke]
+        if new_stroke != stroke:
+            element.set('stroke', new_stroke)
+            changed = True
+            if was_black:
+                black_count += 1
+            elif was_white:
+                white_count += 1
+    
+    # Convert style attribute
+    style = element.get('style')
+    if style:
+        new_style_parts = []
+        properties = [prop.strip() for prop in style.split(';') if prop.strip()]
+        
+        for prop in properties:
+            if ':' in prop:
+                key, value = prop.split(':', 1)
+                key = key.strip()
+                value = value.strip()
+                
+                if key in ['fill', 'stroke', 'stop-color', 'color']:
+                    new_value, was_black, was_white = lut[value]
+                    new_style_parts.append(f"{key}: {new_value}")
+                    if new_value != value:
+                        changed = True
+                        if was_black:
+                            black_count += 1
+                        elif was_white:
+                            white_count += 1
+                else:
+                    new_style_parts.append(prop)
+            else:
+                new_style_parts.append(prop)
+        
+        if changed:
+            element.set('style', '; '.join(new_style_parts))
+    
+    # Convert stop-color for gradient stops
+    stop_color = element.get('stop-color')
+    if stop_color:
+        new_stop_color, was_black, was_white = lut[stop_color]
+        if new_stop_color != stop_color:
+            element.set('stop-color', new_stop_color)
+            changed = True
+            if was_black:
+                black_count += 1
+            elif was_white:
+                white_count += 1
+    
+    return changed, black_count, white_count
+
+
+def _convert_gradient_to_greyscale(gradient_elem, black_threshold: int = 50, white_threshold: int = 200,
+                                   lut: GreyscaleLUT = None) -> tuple:
+    """
+    Convert all colors in a gradient to greyscale.
+    Returns: (converted_count, black_count, white_count)
+    """
+    converted_count = 0
+    black_count = 0
+    white_count = 0
+    
+    for stop in gradient_elem.findall(".//{http://www.w3.org/2000/svg}stop") + gradient_elem.findall(".//stop"):
+        result = _convert_element_colors_to_greyscale(stop, black_threshold, white_threshold, lut)
+        if result[0]:
+            converted_count += 1
+        black_count += result[1]
+        white_count += result[2]
+    
+    return converted_count, black_count, white_count
+
+
+@instrumented('mater.invert_svg_colors')
+def invert_svg_colors(svg_path: str, output_svg_path: str = None, use_numpy: bool = False) -> str:
+    """
+    Invert all colors in an SVG file - black becomes white, white becomes black, etc.
+    
+    Args:
+        svg_path: Path to the input SVG file
+        output_svg_path: Path for the inverted SVG (defaults to input_inverted.svg)
+        use_numpy: Invert the colors as NumPy array operations (optional
+            dependency, for very large documents; see svg_columnar.py)
+    
+    Returns:
+        Path to the inverted SVG file, as a StageResult with the output's
+        element and color statistics
+    """
+    svg_path = os.path.abspath(svg_path)
+    
+    if not os.path.exists(svg_path):
+        raise FileNotFoundError(f"SVG file not found: {svg_path}")
+    
+    if output_svg_path is None:
+        base_name = os.path.splitext(os.path.basename(svg_path))[0]
+        output_svg_path = os.path.join(
+            os.path.dirname(svg_path),
+            f"{base_name}_inverted.svg"
+        )
+    
+    output_svg_path = os.path.abspath(output_svg_path)
+    
+    key = stage_key('invert', svg_path)
+    cached = _up_to_date(output_svg_path, key)
+    if cached is not None:
+        return cached
+    
+    summary(f"🔄 Inverting colors in SVG...")
+    
+    try:
+        # Parse the SVG file
+        tree = parse_svg(svg_path)
+        note_elements('elements_in', tree.getroot())
+
+        stats = SVGStats()
+        _invert_tree_colors(tree.getroot(), stats, use_numpy)
+
+        # Write the inverted SVG
+        write_svg(tree, output_svg_path)
+
+        summary(f"📄 Inverted SVG saved to: {output_svg_path}")
+        result = stage_result(output_svg_path, stats, last_counts('invert'), svg_path)
+        note(elements_out=result.stats['elements'])
+        store_output(output_svg_path, key, result)
+        return result
+
+    except PARSE_ERRORS as e:
+        raise RuntimeError(f"Failed to parse SVG file: {e}")
+    except Exception as e:
+        raise RuntimeError(f"Failed to process SVG file: {e}")
+
+
+def _invert_tree_colors(root, stats: SVGStats = None, use_numpy: bool = False) -> int:
+    """
+    Invert all colors in an already parsed SVG tree, in place, tallying the
+    inverted elements into stats if given. With use_numpy the elements are
+    inverted by the columnar backend. Returns the inverted element count.
+    """
+    inverted_count = 0
+    elements = list(iter_rendered(root, stats.add_subtree if stats is not None else None))
+
+    # Process gradients in defs first
+    for defs in defs_of(elements):
+        for child in defs:
+            if child.tag.endswith('linearGradient') or child.tag.endswith('radialGradient'):
+                if _invert_gradient_colors(child):
+                    inverted_count += 1
+
+    # Process all elements
+    if use_numpy:
+        inverted_count += convert_colors(elements, 'invert')['converted']
+        if stats is not None:
+            for elem in elements:
+                stats.add(elem)
+    else:
+        for elem in elements:
+            if _invert_element_colors(elem):
+                inverted_count += 1
+            if stats is not None:
+                stats.add(elem)
+
+    summary(f"✅ Inverted colors in {inverted_count} elements")
+
+    record_counts('invert', inverted=inverted_count)
+    return inverted_count
+
+
+def _invert_element_colors(element) -> bool:
+    """Invert all colors in an element. Returns True if any changes made."""
+    changed = False
+    
+    # Invert fill
+    fill = element.get('fill')
+    if fill:
+        new_fill = invert_color(fill)
+        if new_fill != fill:
+            element.set('fill', new_fill)
+            changed = True
+    
+    # Invert stroke
+    stroke = element.get('stroke')
+    if stroke:
+        new_stroke = invert_color(stroke)
+        if new_stroke != stroke:
+            element.set('stroke', new_stroke)
+            changed = True
+    
+    # Invert style attribute
+    style = element.get('style')
+    if style:
+        new_style_parts = []
+        properties = [prop.strip() for prop in style.split(';') if prop.strip()]
+        
+        for prop in properties:
+            if ':' in prop:
+                key, value = prop.split(':', 1)
+                key = key.strip()
+                value = value.strip()
+                
+                if key in ['fill', 'stroke', 'stop-color', 'color']:
+                    new_value = invert_color(value)
+                    new_style_parts.append(f"{key}: {new_value}")
+                    if new_value != value:
+                        changed = True
+                else:
+                    new_style_parts.append(prop)
+            else:
+                new_style_parts.append(prop)
+        
+        if changed:
+            element.set('style', '; '.join(new_style_parts))
+    
+    # Invert stop-color for gradient stops
+    stop_color = element.get('stop-color')
+    if stop_color:
+        new_stop_color = invert_color(stop_color)
+        if new_stop_color != stop_color:
+            element.set('stop-color', new_stop_color)
+            changed = True
+    
+    # Invert color attribute (for text elements)
+    color = element.get('color')
+    if color:
+        new_color = invert_color(color)
+        if new_color != color:
+            element.set('color', new_color)
+            changed = True
+    
+    return changed
+
+
+def _invert_gradient_colors(gradient_elem) -> bool:
+    """Invert all colors in a gradient. Returns True if any changes made."""
+    changed = False
+    
+    for stop in gradient_elem.findall(".//{http://www.w3.org/2000/svg}stop") + gradient_elem.findall(".//stop"):
+        if _invert_element_colors(stop):
+            changed = True
+    
+    return changed
+
+
+@instrumented('mater.extract_bijection_bw_elements')
+def extract_bijection_bw_elements(greyscale_svg_path: str, inverted_svg_path: str = None, output_svg_path: str = None) -> str:
+    """
+    Compare greyscale and inverted SVGs to extract only elements that have perfect 
+    black-to-white or white-to-black bijection. These represent the purest die-line elements.
+    
+    The inverted SVG is a pure function of the greyscale one, so it is optional:
+    without it each element's inverted colors are computed directly, which
+    gives the same output with a single parse and no inverted file on disk.
+    
+    Args:
+        greyscale_svg_path: Path to the greyscale SVG file
+        inverted_svg_path: Optional path to the inverted SVG file  
+        output_svg_path: Path for the bijection SVG (defaults to input_bijectionBW.svg)
+    
+    Returns:
+        Path to the bijection SVG file containing only perfect BW transition
+        elements, as a StageResult with the output's element and color statistics
+    """
+    if not os.path.exists(greyscale_svg_path):
+        raise FileNotFoundError(f"Greyscale SVG not found: {greyscale_svg_path}")
+    
+    if inverted_svg_path is not None and not os.path.exists(inverted_svg_path):
+        raise FileNotFoundError(f"Inverted SVG not found: {inverted_svg_path}")
+    
+    if output_svg_path is None:
+        base_name = os.path.splitext(os.path.basename(greyscale_svg_path))[0]
+        # Remove any existing suffixes like _greyscale
+        base_name = base_name.replace('_greyscale', '').replace('_vectors', '')
+        output_svg_path = os.path.join(
+            os.path.dirname(greyscale_svg_path),
+            f"{base_name}_bijectionBW.svg"
+        )
+    
+    output_svg_path = os.path.abspath(output_svg_path)
+    
+    key = stage_key('bijection', greyscale_svg_path, inverted_svg_path)
+    cached = _up_to_date(output_svg_path, key)
+    if cached is not None:
+        return cached
+    
+    summary(f"🔄 Analyzing perfect black-white bijection elements...")
+    summary(f"📄 Greyscale: {os.path.basename(greyscale_svg_path)}")
+    if inverted_svg_path is not None:
+        summary(f"📄 Inverted:  {os.path.basename(inverted_svg_path)}")
+    else:
+        summary(f"📄 Inverted:  computed directly from greyscale colors")
+    
+    try:
+        # Each element is judged by its own colors, so the greyscale tree is filtered in place
+        bijection_tree = parse_svg(greyscale_svg_path)
+        bijection_root = bijection_tree.getroot()
+        inv_root = parse_svg(inverted_svg_path).getroot() if inverted_svg_path is not None else None
+        note_elements('elements_in', bijection_root)
+        stats = SVGStats()
+        _extract_bijection_from_trees(bijection_root, inv_root, stats=stats)
+
+        # Write the bijection SVG
+        write_svg(bijection_tree, output_svg_path)
+        
+        summary(f"📄 Perfect bijection SVG saved to: {output_svg_path}")
+        
+        result = stage_result(output_svg_path, stats, last_counts('bijection'), greyscale_svg_path)
+        note(elements_out=result.stats['elements'])
+        summary(f"💾 File size: {result.bytes_out:,} bytes ({result.bytes_out/1024:.1f} KB)")
+        
+        store_output(output_svg_path, key, result)
+        return result
+        
+    except PARSE_ERRORS as e:
+        raise RuntimeError(f"Failed to parse SVG files: {e}")
+    except Exception as e:
+        raise RuntimeError(f"Failed to extract bijection elements: {e}")
+
+
+def _extract_bijection_from_trees(bijection_root, inv_root=None, index: SVGIndex = None,
+                                  stats: SVGStats = None) -> dict:
+    """
+    Remove every graphics element of a greyscale tree without a perfect
+    black-white bijection, in place.
+    
+    Each element is judged by its own colors (see _check_perfect_bijection):
+    against their inversions, or with inv_root (an invert_svg_colors() tree
+    of the same document, only read) against the element at the same place
+    in it. Elements without such a counterpart are removed. The elements
+    left in bijection_root are tallied into stats, if given.
+
+    Returns dict with the bijection statistics.
+    """
+    if index is None:
+        index = SVGIndex(bijection_root)
+
+    # Track statistics
+    total_elements = 0
+    perfect_bijection_elements = 0
+    black_to_white_count = 0
+    white_to_black_count = 0
+    removed_elements = []
+
+    elements = list(iter_rendered(bijection_root, stats.add_subtree if stats is not None else None))
+    inv_elements = list(iter_rendered(inv_root)) if inv_root is not None else None
+    if inv_elements is not None:
+        summary(f"🔍 Found {len(elements)} elements in greyscale SVG")
+        summary(f"🔍 Found {len(inv_elements)} elements in inverted SVG")
+
+    # Process all elements in the bijection tree
+    for position, elem in enumerate(elements):
+        total_elements += 1
+        if stats is not None:
+            stats.add(elem)
+
+        # Skip root and non-graphics elements
+        if elem == bijection_root or not _is_graphics_element(elem):
+            continue
+
+        if inv_elements is None:
+            bijection_result = _check_perfect_bijection(elem)
+        else:
+            # The inverted tree has the same elements in the same order
+            inv_elem = inv_elements[position] if position < len(inv_elements) else None
+            bijection_result = None
+            if inv_elem is not None and _get_element_key(inv_elem) == _get_element_key(elem):
+                # Check if this element has perfect bijection
+                bijection_result = _check_perfect_bijection(elem, inv_elem)
+
+        if bijection_result is None:
+            # Element not found in one of the files, remove it
+            removed_elements.append(elem)
+            continue
+
+        if bijection_result['has_bijection']:
+            perfect_bijection_elements += 1
+            if bijection_result['black_to_white']:
+                black_to_white_count += 1
+            if bijection_result['white_to_black']:
+                white_to_black_count += 1
+
+            # Keep the element (it's already in bijection_tree)
+            pass
+        else:
+            # No perfect bijection, mark for removal
+            removed_elements.append(elem)
+
+    # Remove elements that don't have perfect bijection
+    index.remove_all(removed_elements, stats.discard_subtree if stats is not None else None)
+
+    summary(f"✅ Analysis complete!")
+    summary(f"🔢 Total elements analyzed: {total_elements}")
+    summary(f"🎯 Perfect bijection elements: {perfect_bijection_elements}")
+    summary(f"⚫→⚪ Black-to-white transitions: {black_to_white_count}")
+    summary(f"⚪→⚫ White-to-black transitions: {white_to_black_count}")
+    summary(f"🗑️  Elements removed: {len(removed_elements)}")
+
+    # Calculate retention percentage
+    if total_elements > 0:
+        retention_rate = (perfect_bijection_elements / total_elements) * 100
+        summary(f"📊 Element retention rate: {retention_rate:.1f}%")
+
+    return record_counts(
+        'bijection',
+        total_elements=total_elements,
+        perfect_bijection_elements=perfect_bijection_elements,
+        black_to_white=black_to_white_count,
+        white_to_black=white_to_black_count,
+        removed_elements=len(removed_elements),
+    )
+
+
+def _get_element_key(elem) -> str:
+    """Generate a unique key for an element based on its characteristics."""
+    # Use tag, position attributes, and parent structure for identification
+    key_parts = [elem.tag.split('}')[-1]]  # Clean tag name
+    
+    # Add identifying attributes (but not color attributes)
+    for attr in ['id', 'class', 'x', 'y', 'cx', 'cy', 'r', 'rx', 'ry', 'width', 'height', 'd', 'points']:
+        if elem.get(attr):
+            key_parts.append(f"{attr}:{elem.get(attr)}")
+    
+    # Add parent tag for context
+    parent = _find_parent_tag(elem)
+    if parent:
+        key_parts.insert(0, f"parent:{parent}")
+    
+    return '|'.join(key_parts)
+
+
+def _find_parent_tag(elem) -> str:
+    """Find the parent element's tag name."""
+    # This is a simplified approach - in practice we'd walk the tree
+    return "svg"  # Default parent for now
+
+
+def _is_graphics_element(elem) -> bool:
+    """Check if element is a graphics element that can have colors."""
+    tag = elem.tag.split('}')[-1].lower()  # Remove namespace
+    graphics_tags = {
+        'rect', 'circle', 'ellipse', 'line', 'polyline', 'polygon', 
+        'path', 'text', 'tspan', 'g', 'use', 'image'
+    }
+    return tag in graphics_tags
+
+
+def _check_perfect_bijection(grey_elem, inv_elem=None) -> dict:
+    """
+    Check if two corresponding elements have perfect black-white bijection.
+    Without inv_elem, grey_elem's colors are compared with their inversions
+    (as invert_svg_colors() would write them).
+    Returns dict with bijection analysis.
+    """
+    result = {
+        'has_bijection': False,
+        'black_to_white': False,
+        'white_to_black': False,
+        'matched_attributes': [],
+        'mismatched_attributes': []
+    }
+    
+    # Check fill attributes
+    grey_fill = grey_elem.get('fill', 'none')
+    inv_fill = inv_elem.get('fill', 'none') if inv_elem is not None else _inverted_value(grey_fill)
+    
+    if _is_perfect_color_bijection(grey_fill, inv_fill):
+        result['has_bijection'] = True
+        result['matched_attributes'].append('fill')
+        
+        if is_black_color(grey_fill) and is_white_color(inv_fill):
+            result['black_to_white'] = True
+        elif is_white_color(grey_fill) and is_black_color(inv_fill):
+            result['white_to_black'] = True
+    elif grey_fill != 'none' or inv_fill != 'none':
+        result['mismatched_attributes'].append('fill')
+    
+    # Check stroke attributes
+    grey_stroke = grey_elem.get('stroke', 'none')
+    inv_stroke = inv_elem.get('stroke', 'none') if inv_elem is not None else _inverted_value(grey_stroke)
+    
+    if _is_perfect_color_bijection(grey_stroke, inv_stroke):
+        result['has_bijection'] = True
+        result['matched_attributes'].append('stroke')
+        
+        if is_black_color(grey_stroke) and is_white_color(inv_stroke):
+            result['black_to_white'] = True
+        elif is_white_color(grey_stroke) and is_black_color(inv_stroke):
+            result['white_to_black'] = True
+    elif grey_stroke != 'none' or inv_stroke != 'none':
+        result['mismatched_attributes'].append('stroke')
+    
+    # Check style attributes
+    grey_style = grey_elem.get('style', '')
+    inv_style = inv_elem.get('style', '') if inv_elem is not None else None
+    
+    if grey_style or inv_style:
+        style_bijection = _check_style_bijection(grey_style, inv_style)
+        if style_bijection['has_bijection']:
+            result['has_bijection'] = True
+            result['matched_attributes'].append('style')
+            if style_bijection['black_to_white']:
+                result['black_to_white'] = True
+            if style_bijection['white_to_black']:
+                result['white_to_black'] = True
+        else:
+            result['mismatched_attributes'].append('style')
+    
+    # Element must have at least one perfect color bijection and no mismatches
+    result['has_bijection'] = result['has_bijection'] and len(result['mismatched_attributes']) == 0
+    
+    return result
+
+
+def _inverted_value(color: str) -> str:
+    """A fill or stroke value as _invert_element_colors() leaves it."""
+    return invert_color(color) if color else color
+
+
+def _is_perfect_color_bijection(color1: str, color2: str) -> bool:
+    """Check if two colors form a perfect bijection (black<->white)."""
+    if color1 == 'none' and color2 == 'none':
+        return True
+    
+    # Check black -> white
+    if is_black_color(color1) and is_white_color(color2):
+        return True
+    
+    # Check white -> black  
+    if is_white_color(color1) and is_black_color(color2):
+        return True
+    
+    return False
+
+
+def _check_style_bijection(style1: str, style2: str = None) -> dict:
+    """
+    Check style attributes for perfect bijection. With style2 None, style1's
+    color properties are compared with their inversions.
+    """
+    result = {'has_bijection': False, 'black_to_white': False, 'white_to_black': False}
+    
+    if not style1 and not style2:
+        result['has_bijection'] = True
+        return result
+    
+    # Parse style properties
+    props1 = _parse_style_properties(style1)
+    if style2 is None:
+        props2 = {prop: invert_color(value) for prop, value in props1.items() if prop in ('fill', 'stroke', 'color', 'stop-color')}
+    else:
+        props2 = _parse_style_properties(style2)
+    
+    # Check each color property
+    for prop in ['fill', 'stroke', 'color', 'stop-color']:
+        val1 = props1.get(prop)
+        val2 = props2.get(prop)
+        
+        if val1 or val2:
+            if _is_perfect_color_bijection(val1 or 'none', val2 or 'none'):
+                result['has_bijection'] = True
+                if is_black_color(val1) and is_white_color(val2):
+                    result['black_to_white'] = True
+                elif is_white_color(val1) and is_black_color(val2):
+                    result['white_to_black'] = True
+            else:
+                # Mismatch in style colors
+                result['has_bijection'] = False
+                break
+    
+    return result
+
+
+def _parse_style_properties(style: str) -> dict:
+    """Parse CSS style string into property dictionary."""
+    props = {}
+    if style:
+        for prop in style.split(';'):
+            if ':' in prop:
+                key, value = prop.split(':', 1)
+                props[key.strip()] = value.strip()
+    return props
+
+
+@instrumented('mater.filter_to_geometric_shapes')
+def filter_to_geometric_shapes(svg_path: str, output_svg_path: str = None, spatial_index: bool = False,
+                               consolidate: bool = False) -> str:
+    """
+    Filter SVG to keep only lines, rectangles, and squares. Remove all other shapes
+    like circles, ellipses, complex paths, curves, etc.
+    
+    Args:
+        svg_path: Path to the input SVG file
+        output_svg_path: Path for the filtered SVG (defaults to input_geometric.svg)
+        spatial_index: Also save a SpatialIndex of the kept shapes next to the
+            output (input_geometric.spatial.json, see svg_spatial.py)
+        consolidate: Merge collinear segments that overlap or touch and drop
+            duplicate shapes (see svg_segments.py)
+    
+    Returns:
+        Path to the filtered SVG file containing only basic geometric shapes,
+        as a StageResult with the output's element and color statistics
+    """
+    svg_path = os.path.abspath(svg_path)
+    
+    if not os.path.exists(svg_path):
+        raise FileNotFoundError(f"SVG file not found: {svg_path}")
+    
+    if output_svg_path is None:
+        base_name = os.path.splitext(os.path.basename(svg_path))[0]
+        output_svg_path = os.path.join(
+            os.path.dirname(svg_path),
+            f"{base_name}_geometric.svg"
+        )
+    
+    output_svg_path = os.path.abspath(output_svg_path)
+    
+    key = stage_key('geometric', svg_path, spatial_index=spatial_index, consolidate=consolidate)
+    if not spatial_index or os.path.exists(spatial_index_path(output_svg_path)):
+        cached = _up_to_date(output_svg_path, key)
+        if cached is not None:
+            return cached
+    
+    summary(f"🔄 Filtering to geometric shapes only (lines, rectangles, squares)...")
+    
+    try:
+        # Parse the SVG file
+        tree = parse_svg(svg_path)
+        note_elements('elements_in', tree.getroot())
+
+        stats = SVGStats()
+        index = SVGIndex(tree.getroot())
+        _filter_tree_to_geometric_shapes(tree.getroot(), index, stats)
+        if consolidate:
+            _consolidate_geometric(tree.getroot(), index, stats)
+
+        # Write the filtered SVG
+        write_svg(tree, output_svg_path)
+        
+        summary(f"\n📄 Geometric shapes SVG saved to: {output_svg_path}")
+        if spatial_index:
+            _save_spatial_index(tree.getroot(), output_svg_path)
+        
+        # File size comparison
+        result = stage_result(output_svg_path, stats, last_counts('geometric'), svg_path)
+        note(elements_out=result.stats['elements'])
+        reduction = -result.size_change
+        
+        summary(f"💾 Original: {result.bytes_in:,} bytes")
+        summary(f"💾 Filtered: {result.bytes_out:,} bytes")
+        if reduction > 0:
+            reduction_percent = (reduction / result.bytes_in) * 100
+            summary(f"💾 Reduction: {reduction:,} bytes ({reduction_percent:.1f}%)")
+        
+        store_output(output_svg_path, key, result)
+        return result
+        
+    except PARSE_ERRORS as e:
+        raise RuntimeError(f"Failed to parse SVG file: {e}")
+    except Exception as e:
+        raise RuntimeError(f"Failed to filter geometric shapes: {e}")
+
+
+def _filter_tree_to_geometric_shapes(root, index: SVGIndex = None, stats: SVGStats = None) -> dict:
+    """
+    Remove everything except lines, rectangles and squares from an already
+    parsed SVG tree, in place, tallying the kept elements into stats if given.
+
+    Returns dict with the kept and removed shape counts.
+    """
+    if index is None:
+        index = SVGIndex(root)
+
+    # Statistics
+    total_elements = 0
+    kept_elements = 0
+    removed_elements = []
+    shape_counts = {
+        'lines': 0,
+        'rectangles': 0, 
+        'squares': 0,
+        'removed_circles': 0,
+        'removed_ellipses': 0,
+        'removed_complex_paths': 0,
+        'removed_polygons': 0,
+        'removed_other': 0
+    }
+
+    # Process all elements
+    for elem in list(iter_rendered(root, stats.add_subtree if stats is not None else None)):
+        total_elements += 1
+        if stats is not None:
+            stats.add(elem)
+
+        # Skip root and container elements
+        if elem == root or _is_container_element(elem):
+            continue
+
+        # Check if element is a basic geometric shape
+        shape_analysis = _analyze_shape_type(elem)
+
+        if shape_analysis['keep']:
+            kept_elements += 1
+            shape_counts[shape_analysis['type']] += 1
+            detail("✅ Keeping %s: %s", shape_analysis['type'], shape_analysis['description'])
+        else:
+            removed_elements.append(elem)
+            removed_key = f"removed_{shape_analysis['type']}"
+            if removed_key in shape_counts:
+                shape_counts[removed_key] += 1
+            else:
+                shape_counts['removed_other'] += 1
+            detail("🗑️  Removing %s: %s", shape_analysis['type'], shape_analysis['description'])
+
+    # Remove the unwanted elements
+    index.remove_all(removed_elements, stats.discard_subtree if stats is not None else None)
+
+    summary(f"\n📊 Geometric Filtering Results")
+    summary("=" * 50)
+    summary(f"🔢 Total elements processed: {total_elements}")
+    summary(f"✅ Elements kept: {kept_elements}")
+    summary(f"🗑️  Elements removed: {len(removed_elements)}")
+
+    summary(f"\n🎯 Kept Shapes:")
+    summary(f"  📏 Lines: {shape_counts['lines']}")
+    summary(f"  📐 Rectangles: {shape_counts['rectangles']}")
+    summary(f"  ⬜ Squares: {shape_counts['squares']}")
+
+    summary(f"\n🗑️  Removed Shapes:")
+    summary(f"  ⭕ Circles: {shape_counts['removed_circles']}")
+    summary(f"  🥚 Ellipses: {shape_counts['removed_ellipses']}")
+    summary(f"  🌀 Complex paths: {shape_counts['removed_complex_paths']}")
+    summary(f"  🔷 Polygons: {shape_counts['removed_polygons']}")
+    summary(f"  ❓ Other shapes: {shape_counts['removed_other']}")
+
+    # Calculate retention rate
+    if total_elements > 0:
+        retention_rate = (kept_elements / total_elements) * 100
+        summary(f"\n📊 Shape retention rate: {retention_rate:.1f}%")
+
+    record_counts('geometric', total_elements=total_elements, kept_elements=kept_elements, **shape_counts)
+    return shape_counts
+
+
+def _consolidate_geometric(root, index: SVGIndex = None, stats: SVGStats = None) -> dict:
+    """Merge collinear segments and drop duplicate shapes of a geometric output, in place."""
+    counts = consolidate_segments(root, index, stats)
+
+    summary(f"\n🧩 Segment Consolidation")
+    summary(f"  📏 Segments examined: {counts['segments']}")
+    summary(f"  🔗 Segments merged away: {counts['merged']}")
+    summary(f"  👯 Duplicate shapes removed: {counts['duplicates']}")
+
+    record_counts('consolidate', **counts)
+    return counts
+
+
+def _save_spatial_index(root, output_svg_path: str) -> str:
+    """Index the shapes of a geometric output and save the index next to it."""
+    index_path = SpatialIndex.from_tree(root).save(spatial_index_path(output_svg_path))
+    summary(f"🗺️ Spatial index saved to: {index_path}")
+    return index_path
+
+
+def _is_container_element(elem) -> bool:
+    """Check if element is a container that should not be filtered."""
+    tag = elem.tag.split('}')[-1].lower()  # Remove namespace
+    container_tags = {'svg', 'g', 'defs', 'clipPath', 'mask', 'marker', 'pattern', 'symbol'}
+    return tag in container_tags
+
+
+def _analyze_shape_type(elem) -> dict:
+    """
+    Analyze an element to determine if it's a basic geometric shape.
+    Returns dict with type classification and whether to keep it.
+    """
+    tag = elem.tag.split('}')[-1].lower()  # Remove namespace
+    
+    # Lines
+    if tag == 'line':
+        return {
+            'keep': True,
+            'type': 'lines',
+            'description': f"Line from ({elem.get('x1', '0')},{elem.get('y1', '0')}) to ({elem.get('x2', '0')},{elem.get('y2', '0')})"
+        }
+    
+    # Rectangles and squares
+    elif tag == 'rect':
+        width = elem.get('width', '0')
+        height = elem.get('height', '0')
+        
+        # Try to determine if it's a square
+        try:
+            w_val = float(width.replace('px', '').replace('pt', '').replace('mm', ''))
+            h_val = float(height.replace('px', '').replace('pt', '').replace('mm', ''))
+            is_square = abs(w_val - h_val) < 0.1  # Allow small tolerance for squares
+        except:
+            is_square = width == height  # Fallback to string comparison
+        
+        shape_type = 'squares' if is_square else 'rectangles'
+        return {
+            'keep': True,
+            'type': shape_type,
+            'description': f"{shape_type.capitalize()[:-1]} {width}×{height}"
+        }
+    
+    # Polylines that are effectively lines or closed rectangles
+    elif tag == 'polyline':
+        points = elem.get('points', '')
+        shape_type = classify_points(points, False) if points else None
+        if shape_type:
+            return {
+                'keep': True,
+                'type': shape_type,
+                'description': f"Polyline {shape_type[:-1]}: {points[:50]}..."
+            }
+        
+        return {
+            'keep': False,
+            'type': 'polygons',
+            'description': f"Polyline with multiple points: {points[:50]}..."
+        }
+    
+    # Paths - analyze if they're simple rectangles or lines
+    elif tag == 'path':
+        d = elem.get('d', '')
+        path_analysis = _analyze_path_geometry(d)
+        
+        if path_analysis['is_simple_rectangle']:
+            shape_type = 'squares' if path_analysis['is_square'] else 'rectangles'
+            return {
+                'keep': True,
+                'type': shape_type,
+                'description': f"Path {shape_type[:-1]}: {d[:50]}..."
+            }
+        elif path_analysis['is_simple_line']:
+            return {
+                'keep': True,
+                'type': 'lines', 
+                'description': f"Path line: {d[:50]}..."
+            }
+        else:
+            return {
+                'keep': False,
+                'type': 'complex_paths',
+                'description': f"Complex path: {d[:50]}..."
+            }
+    
+    # Circles - remove
+    elif tag == 'circle':
+        return {
+            'keep': False,
+            'type': 'circles',
+            'description': f"Circle r={elem.get('r', '0')} at ({elem.get('cx', '0')},{elem.get('cy', '0')})"
+        }
+    
+    # Ellipses - remove
+    elif tag == 'ellipse':
+        return {
+            'keep': False,
+            'type': 'ellipses',
+            'description': f"Ellipse {elem.get('rx', '0')}×{elem.get('ry', '0')} at ({elem.get('cx', '0')},{elem.get('cy', '0')})"
+        }
+    
+    # Polygons - remove (unless they're simple rectangles)
+    elif tag == 'polygon':
+        points = elem.get('points', '')
+        shape_type = classify_points(points, True) if points else None
+        if shape_type:
+            return {
+                'keep': True,
+                'type': shape_type,
+                'description': f"Polygon {shape_type[:-1]}: {points[:50]}..."
+            }
+        else:
+            return {
+                'keep': False,
+                'type': 'polygons',
+                'description': f"Polygon: {points[:50]}..."
+            }
+    
+    # Text and other elements - remove
+    else:
+        return {
+            'keep': False,
+            'type': 'other',
+            'description': f"{tag} element"
+        }
+
+
+def _analyze_path_geometry(d: str) -> dict:
+    """
+    Analyze SVG path data to determine if it represents simple geometry.
+
+    The path is traced in absolute coordinates and its corners are tested
+    (see svg_paths.classify_path), so relative commands, implicit repeated
+    coordinates and rotated outlines are classified by their shape.
+    """
+    shape = classify_path(d) if d else None
+    return {
+        'is_simple_rectangle': shape in ('rectangles', 'squares'),
+        'is_square': shape == 'squares',
+        'is_simple_line': shape == 'lines',
+    }
+
+
+class SVGDocument:
+    """An in-memory SVG document passed from one pipeline stage to the next."""
+
+    def __init__(self, tree, name: str, source_path: str = None, index: SVGIndex = None):
+        self.tree = tree
+        self.name = name  # Base name for output files, e.g. "test_vectors"
+        self.source_path = source_path
+        self._index = index
+
+    @property
+    def root(self):
+        return self.tree.getroot()
+
+    @property
+    def index(self) -> SVGIndex:
+        """Parent index shared by every stage that removes elements, built on first use."""
+        if self._index is None:
+            self._index = SVGIndex(self.root)
+        return self._index
+
+    def copy(self, name: str = None):
+        """Return an independent deep copy of this document."""
+        return SVGDocument(copy.deepcopy(self.tree), name or self.name, self.source_path)
+
+    def write(self, output_svg_path: str) -> str:
+        """Serialize the document the same way the file-based stages do."""
+        write_svg(self.tree, output_svg_path)
+        return output_svg_path
+
+
+def load_svg_document(svg_path: str) -> SVGDocument:
+    """Parse an SVG file into an SVGDocument."""
+    svg_path = os.path.abspath(svg_path)
+    name = os.path.splitext(os.path.basename(svg_path))[0]
+    return SVGDocument(parse_svg(svg_path), name, svg_path)
+
+
+def _pipeline_remove_raster(doc: SVGDocument, context: dict) -> SVGDocument:
+    raster_folder = None
+    if context['save_rasters']:
+        raster_folder = os.path.join(context['output_dir'], f"{doc.name}_extracted_rasters")
+        os.makedirs(raster_folder, exist_ok=True)
+    _remove_raster_from_tree(doc.root, raster_folder, doc.index, context['raster_store'], context['stats'],
+                             context['extra_outputs'])
+    doc.name = f"{doc.name}_vectors"
+    return doc
+
+
+def _pipeline_greyscale(doc: SVGDocument, context: dict) -> SVGDocument:
+    _convert_tree_to_greyscale(doc.root, context['black_threshold'], context['white_threshold'], context['stats'],
+                               context.get('use_numpy', False))
+    doc.name = f"{doc.name}_greyscale"
+    return doc
+
+
+def _pipeline_invert(doc: SVGDocument, context: dict) -> SVGDocument:
+    # Invert a copy: the bijection stage still needs the un-inverted document
+    inverted = doc.copy(f"{doc.name}_inverted")
+    _invert_tree_colors(inverted.root, context['stats'], context.get('use_numpy', False))
+    return inverted
+
+
+def _pipeline_bijection(doc: SVGDocument, context: dict) -> SVGDocument:
+    grey_doc = context['documents'].get('greyscale')
+    if grey_doc is None:
+        raise ValueError("The 'bijection' stage needs the 'greyscale' stage earlier in the chain")
+    # Inverted colors are computed directly, so an 'invert' stage is only needed to write its file.
+    # The greyscale document becomes the bijection output.
+    _extract_bijection_from_trees(grey_doc.root, index=grey_doc.index, stats=context['stats'])
+    base_name = grey_doc.name.replace('_greyscale', '').replace('_vectors', '')
+    return SVGDocument(grey_doc.tree, f"{base_name}_bijectionBW", grey_doc.source_path, grey_doc.index)
+
+
+def _pipeline_geometric(doc: SVGDocument, context: dict) -> SVGDocument:
+    _filter_tree_to_geometric_shapes(doc.root, doc.index, context['stats'])
+    if context.get('consolidate'):
+        _consolidate_geometric(doc.root, doc.index, context['stats'])
+    doc.name = f"{doc.name}_geometric"
+    if context.get('spatial_index'):
+        _save_spatial_index(doc.root, os.path.join(context['output_dir'], f"{doc.name}.svg"))
+    return doc
+
+
+# Stage name -> function(doc, context) returning the document for the next stage.
+# Register extra stages here to make them available to run_svg_pipeline.
+# context['stats'] is a fresh SVGStats for the stage to tally its output into.
+PIPELINE_STAGES = {
+    'raster': _pipeline_remove_raster,
+    'greyscale': _pipeline_greyscale,
+    'invert': _pipeline_invert,
+    'bijection': _pipeline_bijection,
+    'geometric': _pipeline_geometric,
+}
+
+# 'invert' is left out because 'bijection' doesn't need it; add it to also get the inverted SVG
+DEFAULT_PIPELINE = ('raster', 'greyscale', 'bijection', 'geometric')
+
+# Context entries each stage's output depends on, part of its build cache key
+PIPELINE_STAGE_PARAMS = {
+    'raster': ('save_rasters', 'raster_store'),
+    'greyscale': ('black_threshold', 'white_threshold'),
+    'geometric': ('spatial_index', 'consolidate'),
+}
+
+# Earlier stages whose documents a stage reads from context['documents']
+PIPELINE_STAGE_INPUTS = {
+    'bijection': ('greyscale',),
+}
+
+
+def run_svg_pipeline(svg_path: str, stages=DEFAULT_PIPELINE, output_dir: str = None,
+                     write_intermediates=False, save_rasters: bool = True,
+                     black_threshold: int = 50, white_threshold: int = 200, raster_store=None,
+                     cache=None, use_numpy: bool = False, spatial_index: bool = False,
+                     consolidate: bool = False) -> dict:
+    """
+    Run a chain of decomposition stages on a single in-memory parse of an SVG.
+    
+    Output files use the same names as the file-based stages, e.g.
+    test_vectors.svg, test_vectors_greyscale.svg, test_bijectionBW_geometric.svg.
+    Stages may modify earlier documents in place, so anything that should be
+    kept must be written through write_intermediates.
+    
+    With a build cache, the chain starts from the last written output that is
+    still up to date and only the stages after it run; if the final output is
+    up to date nothing is parsed at all. Each stage's key covers the input
+    content and the parameters of every stage up to it.
+    
+    Args:
+        svg_path: Path to the input SVG file
+        stages: Stage names from PIPELINE_STAGES, in execution order
+        output_dir: Directory for output files (defaults to same as input)
+        write_intermediates: True to write every stage's output, or a collection
+            of stage names to write only those. The final stage is always written.
+        save_rasters: Whether the 'raster' stage saves extracted raster images
+        black_threshold: Greyscale luminance threshold for pure black (0-255)
+        white_threshold: Greyscale luminance threshold for pure white (0-255)
+        raster_store: RasterStore (or its folder) shared by the 'raster' stage
+        cache: BuildCache to skip up-to-date stages with (defaults to the
+            active one, see build_cache.py)
+        use_numpy: Run the color stages on the NumPy columnar backend
+            (optional dependency; the outputs are the same)
+        spatial_index: Have the 'geometric' stage save a SpatialIndex of its
+            shapes next to its output (see svg_spatial.py)
+        consolidate: Have the 'geometric' stage merge collinear segments and
+            drop duplicate shapes (see svg_segments.py)
+    
+    Returns:
+        Dict mapping stage name to the path of each written output, as a
+        StageResult with that stage's element and color statistics
+        
+    Raises:
+        FileNotFoundError: If input file doesn't exist
+        ValueError: If a stage name is unknown
+        RuntimeError: If parsing or a stage fails
+    """
+    svg_path = os.path.abspath(svg_path)
+    
+    if not os.path.exists(svg_path):
+        raise FileNotFoundError(f"SVG file not found: {svg_path}")
+    
+    stages = list(stages)
+    if not stages:
+        raise ValueError("At least one pipeline stage is required")
+    unknown = [name for name in stages if name not in PIPELINE_STAGES]
+    if unknown:
+        raise ValueError(f"Unknown pipeline stages: {', '.join(unknown)}")
+    
+    if output_dir is None:
+        output_dir = os.path.dirname(svg_path)
+    output_dir = os.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    
+    if write_intermediates is True:
+        write_stages = set(stages)
+    else:
+        write_stages = set(write_intermediates or ())
+    write_stages.add(stages[-1])
+    
+    summary(f"🔄 Running pipeline: {' → '.join(stages)}")
+    
+    if isinstance(raster_store, str):
+        from svg_rasters import RasterStore
+        raster_store = RasterStore(raster_store)
+    
+    context = {
+        'output_dir': output_dir,
+        'save_rasters': save_rasters,
+        'raster_store': raster_store,
+        'black_threshold': black_threshold,
+        'white_threshold': white_threshold,
+        'use_numpy': use_numpy,
+        'spatial_index': spatial_index,
+        'consolidate': consolidate,
+        'documents': {},
+        # Files stages write besides their document (saved rasters); every
+        # later output is only up to date while they still exist
+        'extra_outputs': [],
+    }
+    outputs = {}
+    document_name = os.path.splitext(os.path.basename(svg_path))[0]
+    
+    if cache is None:
+        cache = active_cache()
+    keys = _pipeline_keys(cache, svg_path, stages, context) if cache is not None else None
+    cached = [None] * len(stages)
+    if keys is not None:
+        cached = [cache.find(output_dir, key) for key in keys]
+    start = _pipeline_resume_point(stages, cached, write_stages) + 1
+    for name, result in zip(stages[:start], cached):
+        if name in write_stages:
+            outputs[name] = result
+            summary(f"⏭️ {name} output is up to date: {result}")
+    
+    if start == len(stages):
+        summary(f"✅ Pipeline up to date ({len(stages)} stages, nothing to run)")
+        return outputs
+    
+    if start:
+        context['extra_outputs'].extend(cache.extra_paths(cached[start - 1]))
+    
+    try:
+        with instrument_stage('pipeline.parse', document=document_name,
+                              input_path=cached[start - 1] if start else svg_path):
+            if start:
+                doc = _load_cached_document(cached[start - 1], svg_path)
+                context['documents'][stages[start - 1]] = doc
+                for later in stages[start:]:
+                    for needed in PIPELINE_STAGE_INPUTS.get(later, ()):
+                        if needed in stages[:start - 1]:
+                            context['documents'][needed] = _load_cached_document(cached[stages.index(needed)], svg_path)
+            else:
+                doc = load_svg_document(svg_path)
+            note_elements('elements_out', doc.root)
+    except PARSE_ERRORS as e:
+        raise RuntimeError(f"Failed to parse SVG file: {e}")
+    
+    for index in range(start, len(stages)):
+        name = stages[index]
+        with instrument_stage(f'pipeline.{name}', document=document_name) as record:
+            note_elements('elements_in', doc.root)
+            stats = context['stats'] = SVGStats()
+            try:
+                doc = PIPELINE_STAGES[name](doc, context)
+            except ValueError:
+                raise
+            except Exception as e:
+                raise RuntimeError(f"Pipeline stage '{name}' failed: {e}")
+            context['documents'][name] = doc
+            note_elements('elements_out', doc.root)
+            
+            if name in write_stages:
+                outputs[name] = stage_result(doc.write(os.path.join(output_dir, f"{doc.name}.svg")),
+                                             stats, last_counts(name))
+                if record is not None:
+                    record['bytes_out'] = outputs[name].bytes_out
+                if keys is not None:
+                    cache.store(outputs[name], keys[index], outputs[name], context['extra_outputs'])
+                summary(f"📄 {name} output saved to: {outputs[name]}")
+    
+    if start:
+        summary(f"✅ Pipeline complete ({len(stages) - start} of {len(stages)} stages run, "
+                f"{len(outputs)} files written or up to date)")
+    else:
+        summary(f"✅ Pipeline complete ({len(stages)} stages, 1 parse, {len(outputs)} files written)")
+    return outputs
+
+
+def _pipeline_keys(cache, svg_path: str, stages: list, context: dict) -> list:
+    """Build cache key of every stage, each chained to the one before it."""
+    keys = []
+    key = cache.input_digest(svg_path)
+    for name in stages:
+        params = {param: context[param] for param in PIPELINE_STAGE_PARAMS.get(name, ())}
+        if 'raster_store' in params:
+            params['raster_store'] = _raster_store_root(params['raster_store'])
+        key = cache.key(name, [key], **params)
+        keys.append(key)
+    return keys
+
+
+def _pipeline_resume_point(stages: list, cached: list, write_stages: set) -> int:
+    """
+    Index of the last stage whose cached output the chain can continue from,
+    or -1 to run everything. Every stage up to it that has to be written must
+    be up to date too, as must the documents later stages read.
+    """
+    for last in range(len(stages) - 1, -1, -1):
+        if cached[last] is None:
+            continue
+        if any(cached[i] is None for i in range(last) if stages[i] in write_stages):
+            continue
+        needed = {n for later in stages[last + 1:] for n in PIPELINE_STAGE_INPUTS.get(later, ())}
+        if any(n in stages[:last] and cached[stages.index(n)] is None for n in needed):
+            continue
+        return last
+    return -1
+
+
+def _load_cached_document(output_svg_path: str, source_path: str) -> SVGDocument:
+    name = os.path.splitext(os.path.basename(output_svg_path))[0]
+    return SVGDocument(parse_svg(output_svg_path), name, source_path)
+
+
+def pipeline_output_paths(svg_path: str, stages=DEFAULT_PIPELINE, output_dir: str = None,
+                          write_intermediates=False, save_rasters: bool = True,
+                          spatial_index: bool = False) -> dict:
+    """
+    Work out the paths run_svg_pipeline would write, without running it.
+    
+    Takes the same arguments as run_svg_pipeline. Stages whose file isn't
+    written still count if they write something else (the 'raster' stage's
+    image folder, the 'geometric' stage's spatial index).
+    
+    Returns:
+        Dict mapping stage name to the list of paths that stage writes
+        
+    Raises:
+        ValueError: If a stage name is unknown
+    """
+    svg_path = os.path.abspath(svg_path)
+    stages = list(stages)
+    unknown = [name for name in stages if name not in PIPELINE_STAGES]
+    if unknown:
+        raise ValueError(f"Unknown pipeline stages: {', '.join(unknown)}")
+    output_dir = os.path.abspath(output_dir or os.path.dirname(svg_path))
+    
+    if write_intermediates is True:
+        write_stages = set(stages)
+    else:
+        write_stages = set(write_intermediates or ())
+    if stages:
+        write_stages.add(stages[-1])
+    
+    # Same document names as the stage functions above give their outputs
+    name = os.path.splitext(os.path.basename(svg_path))[0]
+    names = {}
+    paths = {}
+    for stage in stages:
+        written = []
+        if stage == 'raster':
+            if save_rasters:
+                written.append(os.path.join(output_dir, f"{name}_extracted_rasters"))
+            name = f"{name}_vectors"
+        elif stage == 'greyscale':
+            name = f"{name}_greyscale"
+        elif stage == 'invert':
+            name = f"{name}_inverted"
+        elif stage == 'bijection':
+            base_name = names.get('greyscale', name).replace('_greyscale', '').replace('_vectors', '')
+            name = f"{base_name}_bijectionBW"
+        elif stage == 'geometric':
+            name = f"{name}_geometric"
+            if spatial_index:
+                written.append(spatial_index_path(os.path.join(output_dir, f"{name}.svg")))
+        names[stage] = name
+        if stage in write_stages:
+            written.insert(0, os.path.join(output_dir, f"{name}.svg"))
+        paths[stage] = written
+    return paths
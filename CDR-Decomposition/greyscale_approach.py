@@ -1,6 +1,9 @@
 import os
 import xml.etree.ElementTree as ET
-import re
+
+from svg_colors import to_greyscale
+from svg_stats import SVGStats, stage_result
+from svg_traversal import defs_of, iter_rendered
 
 #usage python3 greyscale_approach.py input.svg output.svg
 
@@ -16,7 +19,8 @@ def convert_svg_to_greyscale(svg_path: str, output_svg_path: str = None) -> str:
         output_svg_path: Path for the greyscale SVG (defaults to input_greyscale.svg)
     
     Returns:
-        Path to the greyscale SVG file
+        Path to the greyscale SVG file, as a StageResult with the output's
+        element and color statistics (see svg_stats.py)
         
     Raises:
         FileNotFoundError: If input SVG doesn't exist
@@ -45,19 +49,23 @@ def convert_svg_to_greyscale(svg_path: str, output_svg_path: str = None) -> str:
         
         converted_count = 0
         
+        # Fonts and clip paths are passed through untouched (see svg_traversal.py)
+        stats = SVGStats()
+        elements = list(iter_rendered(root, stats.add_subtree))
+        
         # Process gradients in defs first
-        defs_elements = root.findall(".//{http://www.w3.org/2000/svg}defs") + root.findall(".//defs")
-        for defs in defs_elements:
+        for defs in defs_of(elements):
             for child in defs:
                 if child.tag.endswith('linearGradient') or child.tag.endswith('radialGradient'):
                     _convert_gradient_to_greyscale(child)
                     converted_count += 1
         
         # Process all elements
-        for elem in root.iter():
+        for elem in elements:
             # Convert element colors
             if _convert_element_colors_to_greyscale(elem):
                 converted_count += 1
+            stats.add(elem)
         
         print(f"[OK] Converted {converted_count} elements to greyscale")
         
@@ -65,7 +73,7 @@ def convert_svg_to_greyscale(svg_path: str, output_svg_path: str = None) -> str:
         tree.write(output_svg_path, encoding='utf-8', xml_declaration=True)
         
         print(f"[OK] Greyscale SVG saved to: {output_svg_path}")
-        return output_svg_path
+        return stage_result(output_svg_path, stats, {'converted': converted_count}, svg_path)
         
     except ET.ParseError as e:
         raise RuntimeError(f"Failed to parse SVG file: {e}")
@@ -73,121 +81,6 @@ def convert_svg_to_greyscale(svg_path: str, output_svg_path: str = None) -> str:
         raise RuntimeError(f"Failed to process SVG file: {e}")
 
 
-def _color_to_greyscale(color_value: str) -> str:
-    """Convert a color value to its greyscale equivalent using luminance."""
-    if not color_value or color_value in ['none', 'transparent', 'inherit', 'currentColor']:
-        return color_value
-    
-    # Already greyscale (pure grays)
-    if _is_greyscale_color(color_value):
-        return color_value
-    
-    try:
-        # Parse different color formats and calculate luminance
-        luminance = 0
-        
-        if color_value.startswith('#'):
-            # Hex color
-            hex_color = color_value[1:]
-            if len(hex_color) == 3:
-                hex_color = ''.join([c*2 for c in hex_color])  # Convert #RGB to #RRGGBB
-            
-            if len(hex_color) == 6:
-                r = int(hex_color[0:2], 16)
-                g = int(hex_color[2:4], 16)
-                b = int(hex_color[4:6], 16)
-                # Calculate relative luminance (ITU-R BT.709)
-                luminance = 0.2126 * r + 0.7152 * g + 0.0722 * b
-        
-        elif color_value.startswith('rgb'):
-            # RGB color
-            rgb_match = re.search(r'rgb\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)', color_value)
-            if rgb_match:
-                r, g, b = map(int, rgb_match.groups())
-                luminance = 0.2126 * r + 0.7152 * g + 0.0722 * b
-            else:
-                # Try RGBA format
-                rgba_match = re.search(r'rgba\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*([0-9.]+)\s*\)', color_value)
-                if rgba_match:
-                    r, g, b, a = map(float, rgba_match.groups())
-                    luminance = 0.2126 * r + 0.7152 * g + 0.0722 * b
-                    # Keep alpha channel
-                    grey_value = int(round(luminance))
-                    return f"rgba({grey_value}, {grey_value}, {grey_value}, {a})"
-        
-        elif color_value.lower() in _get_named_color_values():
-            # Named colors
-            r, g, b = _get_named_color_values()[color_value.lower()]
-            luminance = 0.2126 * r + 0.7152 * g + 0.0722 * b
-        
-        # Convert luminance to greyscale hex
-        grey_value = int(round(min(255, max(0, luminance))))
-        return f"#{grey_value:02x}{grey_value:02x}{grey_value:02x}"
-        
-    except Exception as e:
-        print(f"[Warning] Could not convert color '{color_value}' to greyscale: {e}")
-        # Fallback to medium gray
-        return "#808080"
-
-
-def _is_greyscale_color(color_value: str) -> bool:
-    """Check if a color is already greyscale."""
-    try:
-        if color_value.startswith('#'):
-            hex_color = color_value[1:]
-            if len(hex_color) == 3:
-                # #RGB format - check if R=G=B
-                return hex_color[0] == hex_color[1] == hex_color[2]
-            elif len(hex_color) == 6:
-                # #RRGGBB format - check if RR=GG=BB
-                return hex_color[0:2] == hex_color[2:4] == hex_color[4:6]
-        
-        elif color_value.startswith('rgb'):
-            rgb_match = re.search(r'rgb\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)', color_value)
-            if rgb_match:
-                r, g, b = map(int, rgb_match.groups())
-                return r == g == b
-        
-        elif color_value.lower() in ['black', 'white', 'gray', 'grey']:
-            return True
-            
-        return False
-        
-    except:
-        return False
-
-
-def _get_named_color_values() -> dict:
-    """Get RGB values for common named colors."""
-    return {
-        'red': (255, 0, 0),
-        'green': (0, 128, 0),
-        'blue': (0, 0, 255),
-        'yellow': (255, 255, 0),
-        'cyan': (0, 255, 255),
-        'magenta': (255, 0, 255),
-        'orange': (255, 165, 0),
-        'purple': (128, 0, 128),
-        'pink': (255, 192, 203),
-        'brown': (165, 42, 42),
-        'black': (0, 0, 0),
-        'white': (255, 255, 255),
-        'gray': (128, 128, 128),
-        'grey': (128, 128, 128),
-        'lime': (0, 255, 0),
-        'navy': (0, 0, 128),
-        'olive': (128, 128, 0),
-        'maroon': (128, 0, 0),
-        'teal': (0, 128, 128),
-        'silver': (192, 192, 192),
-        'gold': (255, 215, 0),
-        'violet': (238, 130, 238),
-        'indigo': (75, 0, 130),
-        'tan': (210, 180, 140),
-        'coral': (255, 127, 80)
-    }
-
-
 def _convert_element_colors_to_greyscale(element) -> bool:
     """Convert all colors in an element to greyscale. Returns True if any changes made."""
     changed = False
@@ -195,7 +88,7 @@ def _convert_element_colors_to_greyscale(element) -> bool:
     # Convert fill
     fill = element.get('fill')
     if fill:
-        new_fill = _color_to_greyscale(fill)
+        new_fill = to_greyscale(fill)[0]
         if new_fill != fill:
             element.set('fill', new_fill)
             changed = True
@@ -203,7 +96,7 @@ def _convert_element_colors_to_greyscale(element) -> bool:
     # Convert stroke
     stroke = element.get('stroke')
     if stroke:
-        new_stroke = _color_to_greyscale(stroke)
+        new_stroke = to_greyscale(stroke)[0]
         if new_stroke != stroke:
             element.set('stroke', new_stroke)
             changed = True
@@ -221,7 +114,7 @@ def _convert_element_colors_to_greyscale(element) -> bool:
                 value = value.strip()
                 
                 if key in ['fill', 'stroke', 'stop-color', 'color']:
-                    new_value = _color_to_greyscale(value)
+                    new_value = to_greyscale(value)[0]
                     new_style_parts.append(f"{key}: {new_value}")
                     if new_value != value:
                         changed = True
@@ -236,7 +129,7 @@ def _convert_element_colors_to_greyscale(element) -> bool:
     # Convert stop-color for gradient stops
     stop_color = element.get('stop-color')
     if stop_color:
-        new_stop_color = _color_to_greyscale(stop_color)
+        new_stop_color = to_greyscale(stop_color)[0]
         if new_stop_color != stop_color:
             element.set('stop-color', new_stop_color)
             changed = True
@@ -244,7 +137,7 @@ def _convert_element_colors_to_greyscale(element) -> bool:
     # Convert color attribute (for text elements)
     color = element.get('color')
     if color:
-        new_color = _color_to_greyscale(color)
+        new_color = to_greyscale(color)[0]
         if new_color != color:
             element.set('color', new_color)
             changed = True
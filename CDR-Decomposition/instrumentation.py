@@ -0,0 +1,228 @@
+import functools
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Numeric record fields exported as Prometheus metrics: field -> (metric name, type, help text).
+# Records with the same stage, document and status are aggregated into one
+# series: summaries sum the field and count the calls, gauges keep the maximum.
+PROMETHEUS_METRICS = {
+    'wall_s': ('cdr_stage_wall_seconds', 'summary', 'Wall-clock time of the stage calls'),
+    'cpu_s': ('cdr_stage_cpu_seconds', 'summary', 'CPU time of the stage calls'),
+    'peak_rss_kb': ('cdr_stage_peak_rss_kilobytes', 'gauge', 'Highest process peak resident set size when a stage call finished'),
+    'tracemalloc_peak_bytes': ('cdr_stage_tracemalloc_peak_bytes', 'gauge', 'Highest peak traced Python memory during a stage call'),
+    'elements_in': ('cdr_stage_elements_in', 'summary', 'SVG elements in the stage inputs'),
+    'elements_out': ('cdr_stage_elements_out', 'summary', 'SVG elements in the stage outputs'),
+    'bytes_in': ('cdr_stage_bytes_in', 'summary', 'Size of the stage input files'),
+    'bytes_out': ('cdr_stage_bytes_out', 'summary', 'Size of the stage output files'),
+}
+
+_local = threading.local()
+
+
+def active() -> "Instrumentation":
+    """Return the Instrumentation activated in this thread, or None."""
+    return getattr(_local, 'instrumentation', None)
+
+
+class Instrumentation:
+    """
+    Collects one record per stage call: wall and CPU time, peak memory,
+    element counts and bytes in and out.
+
+    Nothing is measured unless an Instrumentation is active, so the stages
+    cost nothing extra in normal runs. Stages may nest (a pipeline stage
+    inside a pipeline run); with trace_memory each stage's tracemalloc peak
+    is measured from its own start, so an outer stage's peak only covers
+    the part after its last inner stage began.
+
+    Usage:
+        metrics = Instrumentation()
+        with metrics.activate():
+            run_svg_pipeline("test.svg")
+        metrics.write_jsonl("metrics.jsonl")
+        print(metrics.to_prometheus())
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory  # tracemalloc peak per stage; slows stages down noticeably
+        self.records = []
+        self._listeners = []
+        self._stack = []
+
+    def add_listener(self, callback):
+        """Call callback(record) as soon as each stage call finishes."""
+        self._listeners.append(callback)
+
+    @contextmanager
+    def activate(self):
+        """Make this the instrumentation that stage calls in this thread report to."""
+        previous = active()
+        _local.instrumentation = self
+        try:
+            yield self
+        finally:
+            _local.instrumentation = previous
+
+    @contextmanager
+    def stage(self, name: str, document: str = None, input_path: str = None):
+        """
+        Measure one stage call. Yields the record so the stage can add fields.
+
+        Args:
+            name: Stage name, e.g. 'mater.convert_svg_to_greyscale'
+            document: Document label (defaults to the input file's base name)
+            input_path: Input file; its size is recorded as bytes_in
+        """
+        record = {'stage': name, 'document': document}
+        if input_path is not None:
+            if document is None:
+                record['document'] = os.path.splitext(os.path.basename(input_path))[0]
+            if os.path.exists(input_path):
+                record['bytes_in'] = os.path.getsize(input_path)
+
+        if self.trace_memory:
+            import tracemalloc
+        start_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if start_tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+
+        self._stack.append(record)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        record['status'] = 'ok'
+        try:
+            yield record
+        except Exception as e:
+            record['status'] = 'error'
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record['wall_s'] = time.perf_counter() - wall_start
+            record['cpu_s'] = time.process_time() - cpu_start
+            if self.trace_memory:
+                record['tracemalloc_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+                if start_tracing:
+                    tracemalloc.stop()
+            if resource is not None:
+                peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                # ru_maxrss is in kilobytes on Linux but bytes on macOS
+                record['peak_rss_kb'] = peak_rss // 1024 if sys.platform == 'darwin' else peak_rss
+            self._stack.pop()
+            self.records.append(record)
+            for callback in self._listeners:
+                callback(record)
+
+    def note(self, **fields):
+        """Add fields to the innermost running stage record."""
+        if self._stack:
+            self._stack[-1].update(fields)
+
+    def write_jsonl(self, path_or_file):
+        """
+        Write every record as one JSON object per line. A path is appended
+        to, so several runs can collect into the same file.
+        """
+        if isinstance(path_or_file, str):
+            with open(path_or_file, 'a') as f:
+                self.write_jsonl(f)
+            return
+        import json
+        for record in self.records:
+            path_or_file.write(json.dumps(record) + "\n")
+
+    def to_prometheus(self) -> str:
+        """
+        Render the records in the Prometheus text exposition format.
+
+        Each series is labelled by stage, document and status, and aggregates
+        every record with those labels (see PROMETHEUS_METRICS), so documents
+        sharing a file name and stages run more than once never produce
+        duplicate samples.
+        """
+        lines = []
+        for field, (metric, kind, help_text) in PROMETHEUS_METRICS.items():
+            series = {}
+            for record in self.records:
+                value = record.get(field)
+                if value is None:
+                    continue
+                labels = _prometheus_labels(record)
+                total, count = series.get(labels, (None, 0))
+                if kind == 'summary':
+                    series[labels] = ((total or 0) + value, count + 1)
+                else:
+                    series[labels] = (value if total is None else max(total, value), count + 1)
+            if not series:
+                continue
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for labels, (total, count) in series.items():
+                if kind == 'summary':
+                    lines.append(f"{metric}_sum{{{labels}}} {total}")
+                    lines.append(f"{metric}_count{{{labels}}} {count}")
+                else:
+                    lines.append(f"{metric}{{{labels}}} {total}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _prometheus_labels(record: dict) -> str:
+    labels = {'stage': record['stage'], 'document': record.get('document') or '', 'status': record['status']}
+    return ",".join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels.items()
+    )
+
+
+@contextmanager
+def stage(name: str, document: str = None, input_path: str = None):
+    """Measure a stage call on the active Instrumentation; does nothing when none is active."""
+    instrumentation = active()
+    if instrumentation is None:
+        yield None
+        return
+    with instrumentation.stage(name, document, input_path) as record:
+        yield record
+
+
+def note(**fields):
+    """Add fields to the running stage record, if instrumentation is active."""
+    instrumentation = active()
+    if instrumentation is not None:
+        instrumentation.note(**fields)
+
+
+def note_elements(field: str, root):
+    """Record the element count under root as field. The count is only taken when instrumentation is active."""
+    instrumentation = active()
+    if instrumentation is not None and root is not None:
+        instrumentation.note(**{field: sum(1 for _ in root.iter())})
+
+
+def instrumented(name: str):
+    """
+    Decorator for file-based stages taking the input path first and returning the output path.
+    Records bytes in and out; the stage itself can add element counts with note_elements.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(input_path, *args, **kwargs):
+            instrumentation = active()
+            if instrumentation is None:
+                return function(input_path, *args, **kwargs)
+            with instrumentation.stage(name, input_path=os.path.abspath(input_path)) as record:
+                output_path = function(input_path, *args, **kwargs)
+                if isinstance(output_path, str) and os.path.exists(output_path):
+                    record['bytes_out'] = os.path.getsize(output_path)
+                return output_path
+        return wrapper
+    return decorator
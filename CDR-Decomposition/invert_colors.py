@@ -1,5 +1,9 @@
 import xml.etree.ElementTree as ET
 
+from svg_traversal import iter_rendered
+
+#usage python3 invert_colors.py input.svg output.svg
+
 
 def invert_hex_color(hex_color):
     """Convert hex color to its inverse"""
@@ -24,8 +28,8 @@ def invert_svg_colors(input_file, output_file):
     
     colors_inverted = 0
     
-    # Go through every element
-    for element in root.iter():
+    # Go through every element, passing fonts and clip paths through (see svg_traversal.py)
+    for element in iter_rendered(root):
         
         # Check fill attribute
         fill = element.get('fill')
@@ -49,7 +53,10 @@ def invert_svg_colors(input_file, output_file):
     print(f"Saved inverted SVG to: {output_file}")
 
 
-# Run the inversion
-input_file = 'bw_vector.svg'
-output_file = 'inverted_vector.svg'
-invert_svg_colors(input_file, output_file)
\ No newline at end of file
+if __name__ == "__main__":
+    # Run the inversion
+    import sys
+    
+    input_file = sys.argv[1] if len(sys.argv) > 1 else 'bw_vector.svg'
+    output_file = sys.argv[2] if len(sys.argv) > 2 else 'inverted_vector.svg'
+    invert_svg_colors(input_file, output_file)
@@ -0,0 +1,327 @@
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from reporting import error, summary, warning
+
+# Export filter used for each output format
+EXPORT_FILTERS = {
+    'svg': 'draw_svg_Export',
+    'pdf': 'draw_pdf_Export',
+}
+
+# Seconds one conversion may take before its worker is killed and restarted
+DEFAULT_CONVERSION_TIMEOUT = 300.0
+
+# Put on a pool's idle queue once it has no workers left, so callers waiting
+# for a free worker wake up instead of blocking forever
+_NO_WORKERS = object()
+
+
+def _find_libreoffice() -> str:
+    """Return the LibreOffice executable or raise RuntimeError."""
+    libreoffice = shutil.which("libreoffice") or shutil.which("soffice")
+    if libreoffice is None:
+        raise RuntimeError("LibreOffice not found. Install with: sudo apt install libreoffice")
+    return libreoffice
+
+
+def _import_uno():
+    """Import the LibreOffice Python bridge, which ships with LibreOffice rather than pip."""
+    try:
+        import uno
+        from com.sun.star.beans import PropertyValue
+    except ImportError:
+        raise RuntimeError(
+            "The LibreOffice Python bridge (uno) is required for the worker pool. Install with:\n"
+            "sudo apt install python3-uno"
+        )
+    return uno, PropertyValue
+
+
+class LibreOfficeWorker:
+    """
+    One long-lived headless LibreOffice process with its own user profile.
+
+    The process is started once and then driven over a UNO pipe connection,
+    so each conversion only pays for loading and exporting the document.
+    """
+
+    def __init__(self, name: str, libreoffice: str = None, startup_timeout: float = 60.0):
+        self.name = name
+        self.libreoffice = libreoffice or _find_libreoffice()
+        self.startup_timeout = startup_timeout
+        self.profile_dir = None
+        self.process = None
+        self.desktop = None
+
+    def start(self):
+        """Start the LibreOffice process and connect to it."""
+        uno, _ = _import_uno()
+
+        # An isolated profile per worker avoids fighting over the shared profile lock
+        self.profile_dir = tempfile.mkdtemp(prefix=f"{self.name}_profile_")
+        # Unique per start, so two pools in one process (or a restarted worker
+        # racing its old process) never bind the same pipe
+        pipe_name = f"{self.name}_{uuid.uuid4().hex}"
+
+        cmd = [
+            self.libreoffice,
+            "--headless",
+            "--invisible",
+            "--nologo",
+            "--nodefault",
+            "--norestore",
+            "--nolockcheck",
+            f"-env:UserInstallation={Path(self.profile_dir).as_uri()}",
+            f"--accept=pipe,name={pipe_name};urp;StarOffice.ComponentContext",
+        ]
+        self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context
+        )
+
+        # LibreOffice needs a few seconds before it accepts connections
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                self.stop()
+                raise RuntimeError(f"LibreOffice worker {self.name} exited during startup")
+            try:
+                context = resolver.resolve(
+                    f"uno:pipe,name={pipe_name};urp;StarOffice.ComponentContext"
+                )
+                break
+            except Exception:
+                if time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError(f"LibreOffice worker {self.name} did not start within {self.startup_timeout}s")
+                time.sleep(0.25)
+
+        self.desktop = context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", context
+        )
+        summary(f"[Pool] Worker {self.name} ready (pid {self.process.pid})")
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def kill(self):
+        """Kill the process at once, e.g. when it hangs on a document."""
+        if self.is_alive():
+            self.process.kill()
+
+    def convert(self, input_path: str, output_path: str, output_format: str, timeout: float = None) -> str:
+        """
+        Convert one file with this worker.
+
+        Args:
+            input_path: Path to the input document (CDR, SVG, ...)
+            output_path: Path for the converted file
+            output_format: Key of EXPORT_FILTERS ('svg' or 'pdf')
+            timeout: Seconds the conversion may take before the process is
+                killed (default: no limit). The worker must be restarted then.
+
+        Returns:
+            Absolute path to the converted file
+
+        Raises:
+            RuntimeError: If LibreOffice cannot load or export the document,
+                or the conversion timed out
+        """
+        if timeout is None:
+            return self._convert(input_path, output_path, output_format)
+
+        # The UNO calls block, so a hung conversion is ended by killing the
+        # process, which makes the call fail with a disposed bridge
+        timed_out = threading.Event()
+
+        def expire():
+            timed_out.set()
+            self.kill()
+
+        timer = threading.Timer(timeout, expire)
+        timer.daemon = True
+        timer.start()
+        try:
+            return self._convert(input_path, output_path, output_format)
+        except Exception:
+            if timed_out.is_set():
+                raise RuntimeError(f"LibreOffice worker {self.name} timed out after {timeout}s converting {input_path}")
+            raise
+        finally:
+            timer.cancel()
+
+    def _convert(self, input_path: str, output_path: str, output_format: str) -> str:
+        uno, PropertyValue = _import_uno()
+
+        def prop(name, value):
+            p = PropertyValue()
+            p.Name = name
+            p.Value = value
+            return p
+
+        input_path = os.path.abspath(input_path)
+        output_path = os.path.abspath(output_path)
+
+        document = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(input_path), "_blank", 0, (prop("Hidden", True),)
+        )
+        if document is None:
+            raise RuntimeError(f"LibreOffice could not load {input_path}")
+
+        try:
+            document.storeToURL(
+                uno.systemPathToFileUrl(output_path),
+                (prop("FilterName", EXPORT_FILTERS[output_format]),)
+            )
+        finally:
+            document.close(True)
+
+        if not os.path.exists(output_path):
+            raise RuntimeError(f"LibreOffice did not write {output_path}")
+        return output_path
+
+    def stop(self):
+        """Shut the process down and delete the worker's profile."""
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass  # The bridge drops as the process exits
+            self.desktop = None
+
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+        if self.profile_dir is not None:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+
+class LibreOfficePool:
+    """
+    A pool of long-lived headless LibreOffice workers.
+
+    Startup cost is paid once per worker instead of once per file. Each
+    conversion request is handed to a free worker; callers block until one
+    is available, so the pool can be shared between threads. A conversion
+    taking longer than conversion_timeout kills its worker, which is then
+    restarted like a crashed one.
+
+    Usage:
+        with LibreOfficePool(size=4) as pool:
+            svg = cdr_to_svg("design.cdr", pool=pool)
+    """
+
+    def __init__(self, size: int = None, libreoffice: str = None, startup_timeout: float = 60.0,
+                 conversion_timeout: float = DEFAULT_CONVERSION_TIMEOUT):
+        self.size = size or os.cpu_count() or 1
+        self.libreoffice = libreoffice or _find_libreoffice()
+        self.startup_timeout = startup_timeout
+        self.conversion_timeout = conversion_timeout  # Per document; None for no limit
+        self._workers = []
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start all workers. Called automatically when used as a context manager."""
+        with self._lock:
+            while len(self._workers) < self.size:
+                worker = LibreOfficeWorker(
+                    f"cdr_worker_{len(self._workers) + 1}", self.libreoffice, self.startup_timeout
+                )
+                worker.start()
+                self._workers.append(worker)
+                self._idle.put(worker)
+        return self
+
+    def convert(self, input_path: str, output_path: str, output_format: str, timeout: float = None) -> str:
+        """
+        Convert a file on the next free worker.
+
+        Args:
+            input_path: Path to the input document
+            output_path: Path for the converted file
+            output_format: Key of EXPORT_FILTERS ('svg' or 'pdf')
+            timeout: Seconds to wait for a free worker (default: wait forever)
+
+        Returns:
+            Absolute path to the converted file
+
+        Raises:
+            ValueError: If the output format is not supported
+            RuntimeError: If the pool is not started, or the conversion fails
+                or takes longer than conversion_timeout
+        """
+        if output_format not in EXPORT_FILTERS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        if not self._workers:
+            raise RuntimeError("LibreOffice pool is not started")
+
+        worker = self._next_worker(timeout)
+        try:
+            return worker.convert(input_path, output_path, output_format, self.conversion_timeout)
+        except RuntimeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"LibreOffice failed to convert {input_path} to {output_format}: {e}")
+        finally:
+            # A crashed worker is replaced so the pool keeps its size
+            if not worker.is_alive():
+                warning(f"[Pool] Worker {worker.name} died, restarting")
+                worker.stop()
+                try:
+                    worker.start()
+                except RuntimeError as e:
+                    error(f"[Error] Could not restart worker {worker.name}: {e}")
+                    with self._lock:
+                        self._workers.remove(worker)
+                        if not self._workers:
+                            self._idle.put(_NO_WORKERS)
+                    worker = None
+            if worker is not None:
+                self._idle.put(worker)
+
+    def _next_worker(self, timeout: float) -> LibreOfficeWorker:
+        """Take a free worker off the idle queue, or raise RuntimeError if none is left."""
+        idle = self._idle
+        try:
+            worker = idle.get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError(f"No LibreOffice worker became free within {timeout}s")
+        with self._lock:
+            if worker is not _NO_WORKERS and worker in self._workers:
+                return worker
+        # Leave the marker for the next waiting caller
+        idle.put(_NO_WORKERS)
+        raise RuntimeError("LibreOffice pool has no running workers left")
+
+    def close(self):
+        """Stop all workers and delete their profiles."""
+        with self._lock:
+            for worker in self._workers:
+                worker.stop()
+            self._workers = []
+            # Callers still waiting on the old queue give up
+            self._idle.put(_NO_WORKERS)
+            self._idle = queue.Queue()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
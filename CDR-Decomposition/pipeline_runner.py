@@ -0,0 +1,503 @@
+import contextlib
+import glob
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from build_cache import BuildCache, active as active_cache, cached_output, stage_key, store_output
+from instrumentation import Instrumentation
+
+#usage python3 pipeline_runner.py <cdr_or_svg_file_or_dir>... [--output-dir out/] [--jobs 32]
+
+# Stages taken from cdr-pdf.py. They run on files after the in-memory
+# pipeline: 'outlines' and 'bw' on the vector-only SVG, 'pdf' on the CDR input.
+FILE_STAGES = ('outlines', 'bw', 'pdf')
+
+# Output folder layouts for iter_pipeline_batch: a subfolder per document, or all in one folder
+LAYOUTS = ('per-document', 'flat')
+
+# Set in each worker process by _init_worker
+_decomposition = None
+
+
+def collect_inputs(inputs) -> list:
+    """
+    Expand a mix of CDR/SVG files, directories and glob patterns (e.g.
+    'jobs/**/*.cdr') into a list of input paths. A pattern matching nothing
+    is kept as is, so it is reported as a missing file.
+    """
+    paths = []
+    for item in inputs:
+        matches = sorted(glob.glob(item, recursive=True)) if any(ch in item for ch in '*?[') else []
+        for item in matches or [item]:
+            item = os.path.abspath(item)
+            if os.path.isdir(item):
+                for name in sorted(os.listdir(item)):
+                    if name.lower().endswith(('.cdr', '.svg')):
+                        paths.append(os.path.join(item, name))
+            else:
+                paths.append(item)
+    return paths
+
+
+def _init_worker():
+    """Import the decomposition stages once per worker process."""
+    global _decomposition
+    import decomposition
+    _decomposition = decomposition
+
+
+def process_document(input_path: str, output_dir: str = None, stages=None, save_rasters: bool = True,
+                     raster_store=None, black_threshold: int = 50, white_threshold: int = 200,
+                     write_intermediates=False, incremental: bool = False, use_numpy: bool = False,
+                     spatial_index: bool = False, consolidate: bool = False, save_colors: bool = True) -> dict:
+    """
+    Run the full decomposition chain on one CDR or SVG file.
+
+    CDR files are first converted to SVG with their own LibreOffice profile,
+    so any number of workers can convert at the same time. With the 'pdf'
+    stage the SVG left next to the PDF by cdr_to_pdf is used instead.
+
+    Args:
+        input_path: Path to a .cdr or .svg file
+        output_dir: Directory for all outputs of this document (defaults to same as input)
+        stages: Stage names from decomposition.PIPELINE_STAGES and FILE_STAGES
+            (defaults to decomposition.DEFAULT_PIPELINE)
+        save_rasters: Whether to save extracted raster images
+        raster_store: RasterStore folder shared between documents (optional)
+        black_threshold: Greyscale luminance threshold for pure black (0-255)
+        white_threshold: Greyscale luminance threshold for pure white (0-255)
+        write_intermediates: Passed to run_svg_pipeline; the last pipeline
+            stage and every file stage are always written
+        incremental: Skip the conversions and stages whose outputs are up to
+            date with the input and parameters (see build_cache.py)
+        use_numpy: Run the color stages on the NumPy columnar backend
+            (see svg_columnar.py)
+        spatial_index: Save a spatial index of the 'geometric' output next
+            to it (see svg_spatial.py)
+        consolidate: Merge collinear segments and drop duplicate shapes in
+            the 'geometric' output (see svg_segments.py)
+        save_colors: Whether the 'outlines' stage saves the colors it removes
+            (<name>_extracted_colors folder)
+
+    Returns:
+        Dict with 'svg' (the SVG that was decomposed) and 'outputs'
+        (stage name -> output path)
+
+    Raises:
+        FileNotFoundError: If the input doesn't exist
+        ValueError: If a stage name is unknown or 'pdf' is asked for an SVG input
+        RuntimeError: If conversion or a pipeline stage fails
+    """
+    if _decomposition is None:
+        _init_worker()
+
+    if incremental and active_cache() is None:
+        with BuildCache().activate():
+            return process_document(input_path, output_dir, stages, save_rasters, raster_store,
+                                    black_threshold, white_threshold, write_intermediates,
+                                    use_numpy=use_numpy, spatial_index=spatial_index, consolidate=consolidate,
+                                    save_colors=save_colors)
+
+    stages = list(stages or _decomposition.DEFAULT_PIPELINE)
+    unknown = [name for name in stages if name not in _decomposition.PIPELINE_STAGES and name not in FILE_STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(unknown)}")
+    pipeline_stages = [name for name in stages if name in _decomposition.PIPELINE_STAGES]
+
+    input_path = os.path.abspath(input_path)
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+    is_cdr = input_path.lower().endswith('.cdr')
+    if 'pdf' in stages and not is_cdr:
+        raise ValueError("The 'pdf' stage needs a CDR input")
+
+    if output_dir is None:
+        output_dir = os.path.dirname(input_path)
+    os.makedirs(output_dir, exist_ok=True)
+
+    outputs = {}
+    svg_path = input_path
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    if 'pdf' in stages:
+        from cdr_decomposition import load_module
+        pdf_path = os.path.join(output_dir, f"{stem}.pdf")
+        svg_path = os.path.join(output_dir, f"{stem}.svg")
+        # cdr_to_pdf leaves the SVG next to the PDF, and both must still be there to skip it
+        key = stage_key('pdf', input_path)
+        outputs['pdf'] = cached_output(pdf_path, key)
+        if outputs['pdf'] is None or cached_output(svg_path, key) is None:
+            outputs['pdf'] = load_module('cdr_pdf').cdr_to_pdf(input_path, pdf_path)
+            store_output(pdf_path, key, outputs['pdf'])
+            store_output(svg_path, key, svg_path)
+    elif is_cdr:
+        svg_path = _cached_file_stage('cdr_to_svg', input_path, os.path.join(output_dir, f"{stem}.svg"),
+                                      lambda: _convert_cdr(input_path, output_dir))
+
+    vectors_svg = svg_path
+    if pipeline_stages:
+        if write_intermediates is True:
+            write_stages = set(pipeline_stages)
+        else:
+            write_stages = set(write_intermediates or ())
+        if 'raster' in pipeline_stages and ('outlines' in stages or 'bw' in stages):
+            # The file stages read the vector-only SVG
+            write_stages.add('raster')
+
+        outputs.update(_decomposition.run_svg_pipeline(
+            svg_path,
+            stages=pipeline_stages,
+            output_dir=output_dir,
+            write_intermediates=write_stages,
+            save_rasters=save_rasters,
+            black_threshold=black_threshold,
+            white_threshold=white_threshold,
+            raster_store=raster_store,
+            use_numpy=use_numpy,
+            spatial_index=spatial_index,
+            consolidate=consolidate,
+        ))
+        vectors_svg = outputs.get('raster', svg_path)
+
+    if 'outlines' in stages or 'bw' in stages:
+        from cdr_decomposition import load_module
+        cdr_pdf = load_module('cdr_pdf')
+        base_name = os.path.splitext(os.path.basename(vectors_svg))[0]
+        if 'outlines' in stages:
+            outlines_svg = os.path.join(output_dir, f"{base_name}_outlines.svg")
+            # remove_colors_from_svg saves the colors next to its input
+            colors_folder = os.path.join(os.path.dirname(vectors_svg), f"{base_name}_extracted_colors")
+            outputs['outlines'] = _cached_file_stage(
+                'outlines', vectors_svg, outlines_svg,
+                lambda: cdr_pdf.remove_colors_from_svg(vectors_svg, outlines_svg, save_colors),
+                extra_paths=[colors_folder] if save_colors else (), save_colors=save_colors)
+        if 'bw' in stages:
+            bw_svg = os.path.join(output_dir, f"{base_name}_bw.svg")
+            outputs['bw'] = _cached_file_stage('bw', vectors_svg, bw_svg,
+                                               lambda: cdr_pdf.create_black_white_svg(vectors_svg, bw_svg, use_numpy))
+
+    return {'svg': svg_path, 'outputs': outputs}
+
+
+def planned_outputs(input_path: str, output_dir: str = None, stages=None, save_rasters: bool = True,
+                    write_intermediates=False, spatial_index: bool = False, save_colors: bool = True,
+                    **options) -> set:
+    """
+    Every path process_document would write for this input and these
+    options (files and raster folders), without running anything.
+
+    Takes the same arguments as process_document; the ones that don't change
+    output names are ignored. Unknown stages are left for process_document
+    to report.
+    """
+    if _decomposition is None:
+        _init_worker()
+
+    input_path = os.path.abspath(input_path)
+    output_dir = os.path.abspath(output_dir or os.path.dirname(input_path))
+    stages = list(stages or _decomposition.DEFAULT_PIPELINE)
+    pipeline_stages = [name for name in stages if name in _decomposition.PIPELINE_STAGES]
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+
+    paths = set()
+    svg_path = input_path
+    if 'pdf' in stages:
+        paths.add(os.path.join(output_dir, f"{stem}.pdf"))
+    if input_path.lower().endswith('.cdr'):
+        svg_path = os.path.join(output_dir, f"{stem}.svg")
+        paths.add(svg_path)
+
+    vectors_svg = svg_path
+    if pipeline_stages:
+        write_stages = set(pipeline_stages) if write_intermediates is True else set(write_intermediates or ())
+        if 'raster' in pipeline_stages and ('outlines' in stages or 'bw' in stages):
+            write_stages.add('raster')
+        stage_paths = _decomposition.pipeline_output_paths(svg_path, pipeline_stages, output_dir, write_stages,
+                                                           save_rasters, spatial_index)
+        for written in stage_paths.values():
+            paths.update(written)
+        # The file stages read the raster stage's output when it is written
+        vectors_svg = next((path for path in stage_paths.get('raster', ()) if path.endswith('.svg')), svg_path)
+
+    base_name = os.path.splitext(os.path.basename(vectors_svg))[0]
+    for stage in ('outlines', 'bw'):
+        if stage in stages:
+            paths.add(os.path.join(output_dir, f"{base_name}_{stage}.svg"))
+    if 'outlines' in stages and save_colors:
+        paths.add(os.path.join(os.path.dirname(vectors_svg), f"{base_name}_extracted_colors"))
+    return paths
+
+
+def _convert_cdr(input_path: str, output_dir: str) -> str:
+    from cdr_batch import cdr_to_svg_batch
+    results = cdr_to_svg_batch([input_path], output_dir)
+    if input_path in results['failed']:
+        raise RuntimeError(f"CDR to SVG conversion failed: {results['failed'][input_path]}")
+    return results['converted'][input_path]
+
+
+def _convert_cdr_inputs(tasks, options: dict) -> tuple:
+    """
+    Convert the CDR inputs of a batch to SVG before the documents fan out,
+    in as few chunked LibreOffice runs as possible (see cdr_batch.py),
+    instead of one LibreOffice start per document.
+
+    Each SVG ends up where process_document would have written it. Inputs
+    with the 'pdf' stage are left alone: cdr_to_pdf converts them itself.
+
+    Args:
+        tasks: (input path, document folder or None) pairs
+        options: The process_document options of the batch
+
+    Returns:
+        (converted, failed, log): input path -> SVG path, input path -> error
+        message, and LibreOffice's batch report
+    """
+    if 'pdf' in (options.get('stages') or ()):
+        return {}, {}, ''
+    targets = {}
+    for input_path, document_dir in tasks:
+        if input_path.lower().endswith('.cdr'):
+            stem = os.path.splitext(os.path.basename(input_path))[0]
+            targets[input_path] = os.path.join(document_dir or os.path.dirname(input_path), f"{stem}.svg")
+    if not targets:
+        return {}, {}, ''
+
+    if options.get('incremental') and active_cache() is None:
+        with BuildCache().activate():
+            return _convert_cdr_inputs(tasks, options)
+
+    converted = {}
+    failed = {}
+    # cdr_to_svg_batch names its outputs after the input stem, so inputs
+    # sharing a stem (from different folders) go to separate batches
+    batches = []
+    for input_path, svg_path in targets.items():
+        if cached_output(svg_path, stage_key('cdr_to_svg', input_path)) is not None:
+            converted[input_path] = svg_path
+            continue
+        stem = os.path.basename(svg_path)
+        batch = next((batch for batch in batches if stem not in batch), None)
+        if batch is None:
+            batch = {}
+            batches.append(batch)
+        batch[stem] = input_path
+
+    from cdr_batch import cdr_to_svg_batch
+    log = io.StringIO()
+    for batch in batches:
+        staging_dir = tempfile.mkdtemp(prefix="cdr_svg_")
+        try:
+            with contextlib.redirect_stdout(log):
+                results = cdr_to_svg_batch(list(batch.values()), staging_dir)
+            for input_path, error in results['failed'].items():
+                failed[input_path] = f"CDR to SVG conversion failed: {error}"
+            for input_path, staged_path in results['converted'].items():
+                svg_path = targets[input_path]
+                os.makedirs(os.path.dirname(svg_path), exist_ok=True)
+                shutil.move(staged_path, svg_path)
+                store_output(svg_path, stage_key('cdr_to_svg', input_path), svg_path)
+                converted[input_path] = svg_path
+        except RuntimeError as e:
+            for input_path in batch.values():
+                failed[input_path] = str(e)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    return converted, failed, log.getvalue()
+
+
+def _cached_file_stage(stage: str, input_path: str, output_path: str, run, extra_paths=(), **params):
+    """
+    Call run() for a file stage unless the active build cache has its output
+    up to date. params go into the cache key; extra_paths are written along
+    with the output, which is rebuilt once any of them is gone.
+    """
+    key = stage_key(stage, input_path, **params)
+    result = cached_output(output_path, key)
+    if result is None:
+        result = run()
+        store_output(output_path, key, result, extra_paths)
+    return result
+
+
+def _run_document(input_path: str, output_dir: str, options: dict, collect_metrics: bool = False,
+                  source_path: str = None) -> dict:
+    """
+    Worker entry point: never raises, so every failure comes back as a result.
+    source_path is the CDR file input_path was converted from, if any; the
+    result is reported under it.
+    """
+    started = time.perf_counter()
+    log = io.StringIO()
+    result = {'input': source_path or input_path, 'output_dir': output_dir}
+    metrics = Instrumentation() if collect_metrics else None
+    try:
+        with contextlib.redirect_stdout(log), (metrics.activate() if metrics else contextlib.nullcontext()):
+            result.update(process_document(input_path, output_dir, **options))
+        result['ok'] = True
+    except Exception as e:
+        result['ok'] = False
+        result['error'] = f"{type(e).__name__}: {e}"
+        log.write(traceback.format_exc())
+    result['seconds'] = time.perf_counter() - started
+    result['log'] = log.getvalue()
+    if metrics is not None:
+        result['metrics'] = metrics.records
+    return result
+
+
+def iter_pipeline_batch(inputs, output_dir: str = None, jobs: int = None, collect_metrics: bool = False,
+                        layout: str = 'per-document', **options):
+    """
+    Decompose many documents in parallel, yielding each result as it finishes.
+
+    CDR inputs are first converted to SVG together, in chunked LibreOffice
+    runs (see cdr_batch.py). Then every document runs the rest of the chain
+    on its own worker process, so throughput scales with the number of
+    cores. Results arrive in completion order, not input order. A failing
+    document is reported and the rest go on.
+
+    Args:
+        inputs: CDR/SVG file paths, directories containing them and/or glob patterns
+        output_dir: Parent directory for outputs. Defaults to writing next to each input.
+        jobs: Number of worker processes (default: one per CPU)
+        collect_metrics: Add per-stage timing and memory records (see
+            instrumentation.py) to each result under 'metrics'
+        layout: 'per-document' gives each document a subfolder of output_dir
+            named after it, 'flat' writes every document's files into output_dir
+        **options: Passed to process_document (stages, save_rasters, raster_store,
+            black_threshold, white_threshold, write_intermediates, incremental, use_numpy,
+            spatial_index, consolidate, save_colors)
+
+    Yields:
+        Dict per document with 'input', 'ok', 'seconds', 'log' and either
+        'svg' and 'outputs' or 'error' (plus 'metrics' if collected)
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs < 1:
+        raise ValueError(f"jobs must be positive, got {jobs}")
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout '{layout}', expected one of: {', '.join(LAYOUTS)}")
+
+    # Output files are named after the input stem, so two inputs writing to the
+    # same folder can still overwrite each other (test.svg writes
+    # test_vectors.svg, which may be another input or another input's output)
+    tasks = []
+    writers = {}
+    readers = {}
+    for input_path in collect_inputs(inputs):
+        stem = os.path.splitext(os.path.basename(input_path))[0]
+        if output_dir is None:
+            document_dir = None
+        elif layout == 'flat':
+            document_dir = os.path.abspath(output_dir)
+        else:
+            document_dir = os.path.join(os.path.abspath(output_dir), stem)
+        writes = planned_outputs(input_path, document_dir, **options)
+        clashes = [writers[path] for path in writes if path in writers]
+        clashes += [readers[path] for path in writes if path in readers]
+        if input_path in writers:
+            clashes.append(writers[input_path])
+        if clashes:
+            yield {'input': input_path, 'ok': False, 'seconds': 0.0, 'log': '',
+                   'error': f"Outputs collide with {clashes[0]}"}
+            continue
+        readers[input_path] = input_path
+        writers.update((path, input_path) for path in writes)
+        tasks.append((input_path, document_dir))
+
+    converted, failed, conversion_log = _convert_cdr_inputs(tasks, options)
+    for input_path, error in failed.items():
+        yield {'input': input_path, 'ok': False, 'seconds': 0.0, 'log': conversion_log, 'error': error}
+    tasks = [(input_path, document_dir) for input_path, document_dir in tasks if input_path not in failed]
+    if not tasks:
+        return
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks)), initializer=_init_worker) as executor:
+        futures = [
+            executor.submit(_run_document, converted.get(input_path, input_path), document_dir, options,
+                            collect_metrics, input_path if input_path in converted else None)
+            for input_path, document_dir in tasks
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_pipeline_batch(inputs, output_dir: str = None, jobs: int = None, metrics_path: str = None, **options) -> dict:
+    """
+    Decompose many documents in parallel and print one line per document.
+
+    Takes the same arguments as iter_pipeline_batch. With metrics_path, the
+    per-stage records of every document are appended there as JSON lines.
+
+    Returns:
+        Dict with 'completed' (input path -> stage outputs) and
+        'failed' (input path -> error message)
+    """
+    completed = {}
+    failed = {}
+    started = time.perf_counter()
+
+    metrics_file = open(metrics_path, 'a') if metrics_path else None
+    try:
+        for result in iter_pipeline_batch(inputs, output_dir, jobs, collect_metrics=metrics_file is not None, **options):
+            for record in result.get('metrics', ()):
+                metrics_file.write(json.dumps(record) + "\n")
+            if result['ok']:
+                completed[result['input']] = result['outputs']
+                print(f"[OK] {result['input']} ({result['seconds']:.1f}s)")
+            else:
+                failed[result['input']] = result['error']
+                print(f"[Failed] {result['input']}: {result['error']}")
+    finally:
+        if metrics_file is not None:
+            metrics_file.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"[OK] Decomposed {len(completed)} documents, {len(failed)} failed in {elapsed:.1f}s")
+    return {'completed': completed, 'failed': failed}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the decomposition chain on many CDR/SVG files in parallel.")
+    parser.add_argument("inputs", nargs="+", help="CDR/SVG files, directories containing them or glob patterns")
+    parser.add_argument("--output-dir", "-o", default=None, help="Parent directory for outputs (default: next to each input)")
+    parser.add_argument("--layout", choices=LAYOUTS, default="per-document", help="Subfolder per document, or all outputs in one folder")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--stages", default=None, help="Comma-separated stages: raster,greyscale,invert,bijection,geometric and outlines,bw,pdf (default: raster,greyscale,bijection,geometric)")
+    parser.add_argument("--raster-store", default=None, help="Shared content-addressed folder for extracted rasters")
+    parser.add_argument("--no-rasters", action="store_true", help="Don't save extracted raster images")
+    parser.add_argument("--no-colors", action="store_true", help="Don't save the colors removed by the outlines stage")
+    parser.add_argument("--incremental", action="store_true", help="Skip stages whose outputs are up to date")
+    parser.add_argument("--numpy", action="store_true", help="Convert colors with the NumPy columnar backend")
+    parser.add_argument("--spatial-index", action="store_true", help="Save a spatial index next to each geometric output")
+    parser.add_argument("--consolidate", action="store_true", help="Merge collinear segments and drop duplicate shapes in geometric outputs")
+    parser.add_argument("--skip-subtrees", default=None, metavar="TAGS",
+                        help="Comma-separated tags whose subtrees every stage passes through untouched (default: font,font-face,glyph,missing-glyph,clipPath; '' for none)")
+    parser.add_argument("--metrics", default=None, help="Append per-stage timing records to this JSON-lines file")
+    args = parser.parse_args()
+
+    stages = args.stages.split(",") if args.stages else None
+    if args.skip_subtrees is not None:
+        from svg_traversal import configure_skip_subtrees
+        configure_skip_subtrees(args.skip_subtrees)
+    try:
+        results = run_pipeline_batch(
+            args.inputs, args.output_dir, args.jobs, args.metrics,
+            layout=args.layout, stages=stages, save_rasters=not args.no_rasters, raster_store=args.raster_store,
+            incremental=args.incremental, use_numpy=args.numpy, spatial_index=args.spatial_index,
+            consolidate=args.consolidate, save_colors=not args.no_colors,
+        )
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    sys.exit(1 if results['failed'] else 0)
@@ -0,0 +1,92 @@
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+import instrumentation
+
+# Per-element messages ("Removed image", "Keeping rectangle") are logged at
+# DEBUG and stay off unless asked for; stage summaries are logged at INFO.
+# Set CDR_LOG_LEVEL=DEBUG to see every element, or WARNING to only see problems.
+logger = logging.getLogger("cdr_decomposition")
+
+_local = threading.local()
+
+
+class _PrintHandler(logging.Handler):
+    """Writes bare messages to the current sys.stdout, so redirect_stdout still captures them."""
+
+    def emit(self, record):
+        try:
+            print(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+if not logger.handlers:
+    logger.addHandler(_PrintHandler())
+    logger.propagate = False
+logger.setLevel(os.environ.get("CDR_LOG_LEVEL", "INFO").upper())
+
+
+def set_log_level(level):
+    """Set how much the stages report: 'DEBUG' (every element), 'INFO' (summaries), 'WARNING' or 'ERROR'."""
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+
+
+@contextmanager
+def quiet(level="WARNING"):
+    """Only report messages at level or above inside the block, e.g. while a stage runs many times over."""
+    previous = logger.level
+    set_log_level(level)
+    try:
+        yield
+    finally:
+        logger.setLevel(previous)
+
+
+def detail(message: str, *args):
+    """
+    Log a per-element message. Pass values as %-style args so nothing is
+    formatted while per-element output is off.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, *args)
+
+
+def summary(message: str):
+    logger.info(message)
+
+
+def warning(message: str):
+    logger.warning(message)
+
+
+def error(message: str):
+    logger.error(message)
+
+
+def record_counts(stage: str, **counts) -> dict:
+    """
+    Publish the counters a stage gathered during its pass.
+
+    The latest counters per stage are kept for this thread (see last_counts)
+    and added to the running instrumentation record, if any.
+    """
+    if not hasattr(_local, 'counts'):
+        _local.counts = {}
+    _local.counts[stage] = counts
+    instrumentation.note(counts=counts)
+    return counts
+
+
+def last_counts(stage: str = None) -> dict:
+    """
+    Return the counters from the most recent call of a stage in this thread,
+    e.g. last_counts('raster') -> {'removed': 6, 'saved': 6}. Without a stage,
+    return the latest counters of every stage.
+    """
+    counts = getattr(_local, 'counts', {})
+    if stage is None:
+        return dict(counts)
+    return counts.get(stage)
@@ -0,0 +1,488 @@
+import re
+from functools import lru_cache
+from types import MappingProxyType
+
+from reporting import warning
+
+# Shared color core for every color stage in decomposition.py, cdr-pdf.py and
+# greyscale_approach.py. LibreOffice exports reuse a small palette across
+# thousands of elements, so every transform is memoized per distinct
+# (color string, operation, thresholds).
+
+RGB_PATTERN = re.compile(r'rgb\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)')
+RGBA_PATTERN = re.compile(r'rgba\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*([0-9.]+)\s*\)')
+
+# Values that are not colors and pass through every transform unchanged
+NON_COLOR_VALUES = frozenset(['none', 'transparent', 'inherit', 'currentColor'])
+
+# RGB values for common named colors
+NAMED_COLORS = MappingProxyType({
+    'red': (255, 0, 0), 'green': (0, 128, 0), 'blue': (0, 0, 255),
+    'yellow': (255, 255, 0), 'cyan': (0, 255, 255), 'magenta': (255, 0, 255),
+    'orange': (255, 165, 0), 'purple': (128, 0, 128), 'pink': (255, 192, 203),
+    'brown': (165, 42, 42), 'black': (0, 0, 0), 'white': (255, 255, 255),
+    'gray': (128, 128, 128), 'grey': (128, 128, 128), 'lime': (0, 255, 0),
+    'navy': (0, 0, 128), 'olive': (128, 128, 0), 'maroon': (128, 0, 0),
+    'teal': (0, 128, 128), 'silver': (192, 192, 192), 'gold': (255, 215, 0),
+    'violet': (238, 130, 238), 'indigo': (75, 0, 130), 'tan': (210, 180, 140),
+    'coral': (255, 127, 80)
+})
+
+# Named colors that invert to another name rather than to a hex value
+INVERTED_NAMED_COLORS = MappingProxyType({
+    'black': 'white',
+    'white': 'black',
+    'red': 'cyan',
+    'green': 'magenta',
+    'blue': 'yellow',
+    'cyan': 'red',
+    'magenta': 'green',
+    'yellow': 'blue',
+    'gray': 'gray',  # Gray inverts to itself (128 -> 127, close enough)
+    'grey': 'grey'
+})
+
+GREYSCALE_NAMES = frozenset(['black', 'white', 'gray', 'grey'])
+
+# Spellings of perfect black and white, compared lower-cased with spaces removed
+BLACK_VALUES = frozenset(['#000000', '#000', 'black', 'rgb(0, 0, 0)', 'rgba(0, 0, 0, 1)', 'rgba(0,0,0,1)'])
+WHITE_VALUES = frozenset(['#ffffff', '#fff', 'white', 'rgb(255, 255, 255)', 'rgba(255, 255, 255, 1)', 'rgba(255,255,255,1)'])
+PURE_BLACK_SPELLINGS = frozenset(['#000000', '#000', 'black'])
+
+# Palettes with at least this many colors are converted as one NumPy batch
+# when NumPy is installed; smaller ones aren't worth the import
+NUMPY_PALETTE_MIN = 4096
+
+
+@lru_cache(maxsize=4096)
+def parse_color(color_value: str) -> tuple:
+    """
+    Parse an SVG color into a canonical (r, g, b, a) tuple.
+
+    Accepts #RGB, #RRGGBB, rgb(), rgba() and the names in NAMED_COLORS.
+    Returns None for 'none', 'transparent', 'inherit', 'currentColor' and
+    anything that cannot be parsed.
+    """
+    if not color_value or color_value in NON_COLOR_VALUES:
+        return None
+
+    if color_value.startswith('#'):
+        hex_color = color_value[1:]
+        if len(hex_color) == 3:
+            hex_color = ''.join([c*2 for c in hex_color])  # Convert #RGB to #RRGGBB
+        if len(hex_color) != 6:
+            return None
+        try:
+            return (int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16), 1.0)
+        except ValueError:
+            return None
+
+    if color_value.startswith('rgb'):
+        rgb_match = RGB_PATTERN.search(color_value)
+        if rgb_match:
+            r, g, b = map(int, rgb_match.groups())
+            return (r, g, b, 1.0)
+        rgba_match = RGBA_PATTERN.search(color_value)
+        if rgba_match:
+            r, g, b = map(int, rgba_match.groups()[:3])
+            try:
+                return (r, g, b, float(rgba_match.group(4)))
+            except ValueError:
+                return None
+        return None
+
+    rgb = NAMED_COLORS.get(color_value.lower())
+    if rgb is not None:
+        return rgb + (1.0,)
+
+    return None
+
+
+def _luminance(r, g, b) -> float:
+    """Relative luminance (ITU-R BT.709) on the 0-255 scale."""
+    return 0.2126 * r + 0.7152 * g + 0.0722 * b
+
+
+def _is_greyscale(color_value: str) -> bool:
+    """Check if a color is already written as a grey (R = G = B)."""
+    try:
+        if color_value.startswith('#'):
+            hex_color = color_value[1:]
+            if len(hex_color) == 3:
+                return hex_color[0] == hex_color[1] == hex_color[2]
+            elif len(hex_color) == 6:
+                return hex_color[0:2] == hex_color[2:4] == hex_color[4:6]
+
+        elif color_value.startswith('rgb'):
+            rgb_match = RGB_PATTERN.search(color_value)
+            if rgb_match:
+                r, g, b = map(int, rgb_match.groups())
+                return r == g == b
+
+        elif color_value.lower() in GREYSCALE_NAMES:
+            return True
+
+        return False
+    except Exception:
+        return False
+
+
+def _to_greyscale(color_value: str, black_threshold, white_threshold) -> tuple:
+    if not color_value or color_value in NON_COLOR_VALUES:
+        return color_value, False, False
+
+    thresholds = black_threshold is not None and white_threshold is not None
+
+    # Already greyscale (pure grays)
+    if _is_greyscale(color_value):
+        # Check if already grey but should be black or white
+        if thresholds and color_value.startswith('#'):
+            hex_color = color_value[1:]
+            if len(hex_color) == 6:
+                grey_val = int(hex_color[0:2], 16)
+                if grey_val <= black_threshold and grey_val > 0:
+                    return '#000000', True, False
+                elif grey_val >= white_threshold and grey_val < 255:
+                    return '#ffffff', False, True
+        return color_value, False, False
+
+    try:
+        # Unrecognised and malformed values have luminance 0
+        luminance = 0
+
+        if color_value.startswith('#'):
+            rgba = parse_color(color_value)
+            if rgba is not None:
+                luminance = _luminance(*rgba[:3])
+            elif len(color_value) in (4, 7):
+                raise ValueError(f"invalid hex digits in {color_value}")
+
+        elif color_value.startswith('rgb'):
+            rgb_match = RGB_PATTERN.search(color_value)
+            if rgb_match:
+                luminance = _luminance(*map(int, rgb_match.groups()))
+            else:
+                rgba_match = RGBA_PATTERN.search(color_value)
+                if rgba_match:
+                    r, g, b, a = map(float, rgba_match.groups())
+                    luminance = _luminance(r, g, b)
+                    if thresholds:
+                        if luminance <= black_threshold:
+                            return f"rgba(0, 0, 0, {a})", True, False
+                        elif luminance >= white_threshold:
+                            return f"rgba(255, 255, 255, {a})", False, True
+                    # Keep alpha channel with grey value
+                    grey_value = int(round(luminance))
+                    return f"rgba({grey_value}, {grey_value}, {grey_value}, {a})", False, False
+
+        elif color_value.lower() in NAMED_COLORS:
+            luminance = _luminance(*NAMED_COLORS[color_value.lower()])
+
+        if thresholds:
+            if luminance <= black_threshold:
+                return '#000000', True, False
+            elif luminance >= white_threshold:
+                return '#ffffff', False, True
+
+        # Convert luminance to greyscale hex
+        grey_value = int(round(min(255, max(0, luminance))))
+        return f"#{grey_value:02x}{grey_value:02x}{grey_value:02x}", False, False
+
+    except Exception as e:
+        warning(f"[Warning] Could not convert color '{color_value}' to greyscale: {e}")
+        # Fallback to medium gray
+        return "#808080", False, False
+
+
+def _invert_hex(hex_color: str) -> str:
+    try:
+        # Remove the # symbol
+        hex_color = hex_color.replace('#', '')
+
+        # Handle 3-digit hex
+        if len(hex_color) == 3:
+            hex_color = ''.join([c*2 for c in hex_color])  # Convert #RGB to #RRGGBB
+
+        if len(hex_color) == 6:
+            r = 255 - int(hex_color[0:2], 16)
+            g = 255 - int(hex_color[2:4], 16)
+            b = 255 - int(hex_color[4:6], 16)
+            return f"#{r:02x}{g:02x}{b:02x}"
+
+        return hex_color  # Return unchanged if invalid format
+
+    except Exception as e:
+        warning(f"[Warning] Could not invert color '{hex_color}': {e}")
+        return hex_color
+
+
+def _invert_rgb(rgb_color: str) -> str:
+    try:
+        rgb_match = RGB_PATTERN.search(rgb_color)
+        if rgb_match:
+            r, g, b = map(int, rgb_match.groups())
+            return f"rgb({255-r}, {255-g}, {255-b})"
+
+        rgba_match = RGBA_PATTERN.search(rgb_color)
+        if rgba_match:
+            r, g, b, a = map(float, rgba_match.groups())
+            return f"rgba({255-int(r)}, {255-int(g)}, {255-int(b)}, {a})"
+
+        return rgb_color  # Return unchanged if no match
+
+    except Exception as e:
+        warning(f"[Warning] Could not invert RGB color '{rgb_color}': {e}")
+        return rgb_color
+
+
+def _invert(color_value: str) -> str:
+    if not color_value or color_value in NON_COLOR_VALUES:
+        return color_value
+
+    if color_value.startswith('#'):
+        return _invert_hex(color_value)
+
+    if color_value.startswith('rgb'):
+        return _invert_rgb(color_value)
+
+    name = color_value.lower()
+    if name in INVERTED_NAMED_COLORS:
+        return INVERTED_NAMED_COLORS[name]
+
+    # For other named colors, convert to hex first, then invert
+    if name in NAMED_COLORS:
+        r, g, b = NAMED_COLORS[name]
+        return _invert_hex(f"#{r:02x}{g:02x}{b:02x}")
+
+    return color_value  # Return unchanged if unable to process
+
+
+def _to_black_white(color_value: str) -> str:
+    if not color_value or color_value in NON_COLOR_VALUES:
+        return color_value
+
+    # Keep black colors as black
+    if color_value.lower() in PURE_BLACK_SPELLINGS:
+        return '#000000'
+
+    if color_value.startswith('#'):
+        hex_color = color_value[1:]
+        if len(hex_color) == 3:
+            hex_color = ''.join([c*2 for c in hex_color])  # Convert #RGB to #RRGGBB
+        if len(hex_color) == 6 and hex_color.lower() == '000000':
+            return '#000000'
+
+    elif color_value.startswith('rgb'):
+        rgb_match = RGB_PATTERN.search(color_value)
+        if rgb_match and all(int(v) == 0 for v in rgb_match.groups()):
+            return '#000000'  # Keep pure black
+
+    # Everything else becomes white
+    return '#ffffff'
+
+
+def _is_black(color: str) -> bool:
+    if not color or color == 'none':
+        return False
+    return color.lower().replace(' ', '') in BLACK_VALUES
+
+
+def _is_white(color: str) -> bool:
+    if not color or color == 'none':
+        return False
+    return color.lower().replace(' ', '') in WHITE_VALUES
+
+
+_OPERATIONS = {
+    'greyscale': _to_greyscale,
+    'invert': _invert,
+    'bw': _to_black_white,
+    'is_black': _is_black,
+    'is_white': _is_white,
+    'is_greyscale': _is_greyscale,
+}
+
+
+@lru_cache(maxsize=65536)
+def transform_color(color_value: str, operation: str, black_threshold: int = None, white_threshold: int = None):
+    """
+    Apply a color operation, memoized per (color string, operation, thresholds).
+
+    Operations:
+        greyscale: (color, was_black, was_white). BT.709 luminance grey; with
+            thresholds, colors at or below black_threshold become #000000 and
+            colors at or above white_threshold become #ffffff
+        invert: inverted color string
+        bw: '#000000' for black, '#ffffff' for everything else
+        is_black / is_white: whether the color is a perfect black / white
+        is_greyscale: whether the color is already written as a grey
+
+    Raises:
+        ValueError: If the operation is unknown
+    """
+    if operation not in _OPERATIONS:
+        raise ValueError(f"Unknown color operation: {operation}")
+    if operation == 'greyscale':
+        return _to_greyscale(color_value, black_threshold, white_threshold)
+    return _OPERATIONS[operation](color_value)
+
+
+class GreyscaleLUT(dict):
+    """
+    Greyscale lookup table for one pair of thresholds:
+    color -> (converted_color, was_converted_to_black, was_converted_to_white),
+    exactly as to_greyscale returns it.
+
+    Built from a document's whole palette up front, so rewriting the
+    attributes is a dictionary lookup per occurrence. Colors that weren't in
+    the palette are converted on first lookup.
+
+    Usage:
+        lut = GreyscaleLUT(['#ff0000', 'rgb(10, 10, 10)'], 50, 200)
+        lut['#ff0000']  # ('#363636', False, False)
+    """
+
+    def __init__(self, colors=(), black_threshold: int = None, white_threshold: int = None, use_numpy: bool = None):
+        """
+        Args:
+            colors: The palette (duplicates are fine)
+            black_threshold: Luminance at or below which colors become pure black (0-255)
+            white_threshold: Luminance at or above which colors become pure white (0-255)
+            use_numpy: Compute the palette's luminance as one NumPy batch. By default
+                only for palettes of NUMPY_PALETTE_MIN colors or more, and only if
+                NumPy is installed
+        """
+        super().__init__()
+        self.black_threshold = black_threshold
+        self.white_threshold = white_threshold
+        palette = [color for color in dict.fromkeys(colors) if color]
+        if use_numpy is None:
+            use_numpy = len(palette) >= NUMPY_PALETTE_MIN
+        if use_numpy:
+            self.update(_numpy_greyscale(palette, black_threshold, white_threshold))
+        for color in palette:
+            if color not in self:
+                self[color] = to_greyscale(color, black_threshold, white_threshold)
+
+    def __missing__(self, color):
+        result = self[color] = to_greyscale(color, self.black_threshold, self.white_threshold)
+        return result
+
+
+def _batch_rgb(color_value: str) -> tuple:
+    """
+    RGB of a color whose greyscale conversion only depends on its luminance,
+    or None for greys, rgba() and values _to_greyscale treats specially.
+    """
+    if _is_greyscale(color_value):
+        return None
+    if color_value.startswith('#'):
+        rgba = parse_color(color_value)
+        return rgba[:3] if rgba is not None else None
+    if color_value.startswith('rgb'):
+        rgb_match = RGB_PATTERN.search(color_value)
+        return tuple(map(int, rgb_match.groups())) if rgb_match else None
+    return NAMED_COLORS.get(color_value.lower())
+
+
+def numpy_hex_rgb(colors) -> tuple:
+    """
+    Decode the #RRGGBB colors of a palette as arrays. Requires NumPy.
+
+    Returns:
+        (is_hex, rgb, written_grey): which colors are 7-character hex colors
+        with valid digits, their RGB as an (n, 3) float array (zeros for the
+        others) and which of them are written as a grey (equal digit pairs,
+        compared as text like _is_greyscale does)
+    """
+    import numpy as np
+    count = len(colors)
+    texts = [color or '' for color in colors]
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=count)
+    # Longer values are cut to 7 characters here, but their length rules them out
+    points = np.array(texts, dtype='U7').view(np.uint32).reshape(count, 7)
+
+    digit_values = np.full(128, -1, dtype=np.int64)
+    for digit in '0123456789abcdefABCDEF':
+        digit_values[ord(digit)] = int(digit, 16)
+    digits = digit_values[np.minimum(points[:, 1:], 127)]
+
+    is_hex = (lengths == 7) & (points[:, 0] == ord('#')) & (digits >= 0).all(axis=1)
+    rgb = np.where(is_hex[:, None], digits[:, 0::2] * 16 + digits[:, 1::2], 0).astype(np.float64)
+    written_grey = is_hex & (points[:, 1:3] == points[:, 3:5]).all(axis=1) & (points[:, 3:5] == points[:, 5:7]).all(axis=1)
+    return is_hex, rgb, written_grey
+
+
+def _numpy_greyscale(colors, black_threshold, white_threshold) -> dict:
+    """
+    Convert the plain RGB colors of a palette in one vectorized pass. Returns
+    {} without NumPy; colors left out are converted one by one by the caller.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return {}
+    if not colors:
+        return {}
+
+    colors = list(colors)
+    is_hex, rgb, written_grey = numpy_hex_rgb(colors)
+    in_batch = is_hex & ~written_grey
+    # Everything but #RRGGBB is rare enough to parse one by one
+    for index in np.flatnonzero(~is_hex).tolist():
+        values = _batch_rgb(colors[index])
+        if values is not None:
+            rgb[index] = values
+            in_batch[index] = True
+    if not in_batch.any():
+        return {}
+    rgb = rgb[in_batch]
+
+    # Same operation order as _luminance, so every value matches it bit for bit
+    luminance = 0.2126 * rgb[:, 0] + 0.7152 * rgb[:, 1] + 0.0722 * rgb[:, 2]
+    # np.rint rounds halves to even like round()
+    outcome = np.rint(np.clip(luminance, 0, 255)).astype(np.int64)
+    if black_threshold is not None and white_threshold is not None:
+        outcome[luminance >= white_threshold] = 257
+        outcome[luminance <= black_threshold] = 256
+
+    outcomes = _GREY_OUTCOMES + [('#000000', True, False), ('#ffffff', False, True)]
+    batch = [color for color, selected in zip(colors, in_batch.tolist()) if selected]
+    return dict(zip(batch, map(outcomes.__getitem__, outcome.tolist())))
+
+
+# to_greyscale results for the greys 0-255
+_GREY_OUTCOMES = [(f"#{grey:02x}{grey:02x}{grey:02x}", False, False) for grey in range(256)]
+
+
+def to_greyscale(color_value: str, black_threshold: int = None, white_threshold: int = None) -> tuple:
+    """
+    Convert a color to greyscale. Without thresholds only the grey value is computed.
+    Returns: (converted_color, was_converted_to_black, was_converted_to_white)
+    """
+    return transform_color(color_value, 'greyscale', black_threshold, white_threshold)
+
+
+def invert_color(color_value: str) -> str:
+    """Invert any color format to its opposite."""
+    return transform_color(color_value, 'invert')
+
+
+def to_black_white(color_value: str) -> str:
+    """Keep black, change every other color to white."""
+    return transform_color(color_value, 'bw')
+
+
+def is_black_color(color: str) -> bool:
+    """Check if a color is perfect black."""
+    return transform_color(color, 'is_black')
+
+
+def is_white_color(color: str) -> bool:
+    """Check if a color is perfect white."""
+    return transform_color(color, 'is_white')
+
+
+def is_greyscale_color(color: str) -> bool:
+    """Check if a color is already greyscale."""
+    return transform_color(color, 'is_greyscale')
@@ -0,0 +1,214 @@
+import re
+from itertools import chain
+
+from svg_colors import RGB_PATTERN, GreyscaleLUT, invert_color, numpy_hex_rgb, to_black_white
+
+# Columnar color backend for the greyscale, invert and black/white stages.
+#
+# The color attributes of every element (fill, stroke, stop-color, color and
+# the colors inside style attributes) are read into integer columns of codes
+# into the document's palette of distinct colors. The palette is transformed
+# as arrays, the columns are mapped through it with NumPy indexing and only
+# the values that actually change are written back. The result is identical
+# to the per-element functions in decomposition.py and cdr-pdf.py, including
+# their counters.
+#
+# Reading and writing attributes is still one call per element, so this only
+# beats the per-element functions (which already convert each distinct color
+# once) on documents with very large palettes.
+
+# Operation -> (attributes handled before the style attribute, style
+# properties, attributes handled after it), in the order the per-element
+# functions visit them
+OPERATIONS = {
+    'greyscale': (('fill', 'stroke'), ('fill', 'stroke', 'stop-color', 'color'), ('stop-color',)),
+    'invert': (('fill', 'stroke'), ('fill', 'stroke', 'stop-color', 'color'), ('stop-color', 'color')),
+    'bw': (('fill', 'stroke'), ('fill', 'stroke', 'stop-color'), ('stop-color',)),
+}
+
+# #RGB colors the array transforms handle besides #RRGGBB; anything looser goes through svg_colors
+SHORT_HEX_PATTERN = re.compile(r'#[0-9a-fA-F]{3}')
+
+HEX_PAIRS = [f"{value:02x}" for value in range(256)]
+
+
+def _import_numpy():
+    """NumPy is optional for the rest of the package, but this backend is built on it."""
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("NumPy is required for the columnar color backend. Install with: pip install numpy")
+    return numpy
+
+
+class ColorTable:
+    """
+    The color occurrences of a list of elements as integer columns.
+
+    Columns:
+        codes: (slots, elements) array of palette codes; an element without
+            the attribute gets the code of None
+        style_element, style_code: Element index and palette code of every
+            color inside a style attribute (styles are rare in exports, so
+            only elements that have one are parsed)
+
+    Style attributes are also kept split into their parts, so the ones that
+    change can be rebuilt the way the per-element functions write them.
+    """
+
+    def __init__(self, elements, operation: str):
+        np = _import_numpy()
+        before, style_properties, after = OPERATIONS[operation]
+        self.elements = elements
+        self.slots = before + after
+        self.early_slots = len(before)
+        self.styles = {}  # Element index -> [(key, style occurrence) or (None, raw property)]
+
+        columns = [[] for _ in self.slots]
+        style_element = []
+        style_values = []
+        for element_index, elem in enumerate(elements):
+            for column, name in zip(columns, self.slots):
+                column.append(elem.get(name))
+            style = elem.get('style')
+            if not style:
+                continue
+            parts = []
+            for prop in style.split(';'):
+                prop = prop.strip()
+                if not prop:
+                    continue
+                if ':' in prop:
+                    key, value = prop.split(':', 1)
+                    key = key.strip()
+                    if key in style_properties:
+                        parts.append((key, len(style_values)))
+                        style_element.append(element_index)
+                        style_values.append(value.strip())
+                        continue
+                parts.append((None, prop))
+            self.styles[element_index] = parts
+
+        self.palette = list(dict.fromkeys(chain([None], *columns, style_values)))
+        code_of = {color: code for code, color in enumerate(self.palette)}
+        self.codes = np.array([[code_of[color] for color in column] for column in columns],
+                              dtype=np.int64).reshape(len(self.slots), len(elements))
+        self.style_element = np.array(style_element, dtype=np.int64)
+        self.style_code = np.array([code_of[color] for color in style_values], dtype=np.int64)
+
+    def plain_rgb(self):
+        """
+        Return (kinds, rgb): per palette color 'hex', 'rgb' or None, and an
+        (n, 3) float array of the RGB values of the 'hex' and 'rgb' ones.
+        """
+        np = _import_numpy()
+        is_hex, rgb, _ = numpy_hex_rgb(self.palette)
+        kinds = ['hex' if flag else None for flag in is_hex.tolist()]
+        # #RGB and rgb() are rare enough to parse one by one
+        for code in np.flatnonzero(~is_hex).tolist():
+            color = self.palette[code]
+            if color is None:
+                continue
+            if SHORT_HEX_PATTERN.fullmatch(color):
+                rgb[code] = tuple(int(digit * 2, 16) for digit in color[1:])
+                kinds[code] = 'hex'
+                continue
+            rgb_match = RGB_PATTERN.search(color) if color.startswith('rgb') else None
+            if rgb_match:
+                rgb[code] = tuple(map(int, rgb_match.groups()))
+                kinds[code] = 'rgb'
+        return kinds, rgb
+
+
+def _transform_palette(table: ColorTable, operation: str, black_threshold, white_threshold) -> tuple:
+    """Return (new colors, black flags, white flags) for every palette color."""
+    np = _import_numpy()
+    count = len(table.palette)
+    no_flags = np.zeros(count, dtype=bool)
+
+    if operation == 'greyscale':
+        lut = GreyscaleLUT(table.palette, black_threshold, white_threshold, use_numpy=True)
+        results = [lut[color] if color is not None else (None, False, False) for color in table.palette]
+        return ([result[0] for result in results],
+                np.array([result[1] for result in results], dtype=bool),
+                np.array([result[2] for result in results], dtype=bool))
+
+    kinds, rgb = table.plain_rgb()
+    if operation == 'invert':
+        inverted = (255 - rgb).astype(np.int64)
+        colors = [f"#{HEX_PAIRS[r]}{HEX_PAIRS[g]}{HEX_PAIRS[b]}" for r, g, b in inverted.tolist()]
+        for code, kind in enumerate(kinds):
+            if kind == 'rgb':
+                r, g, b = inverted[code].tolist()
+                colors[code] = f"rgb({r}, {g}, {b})"
+            elif kind is None:
+                color = table.palette[code]
+                colors[code] = invert_color(color) if color is not None else None
+        return colors, no_flags, no_flags
+
+    colors = np.where((rgb == 0).all(axis=1), '#000000', '#ffffff').tolist()
+    for code, kind in enumerate(kinds):
+        if kind is None:
+            color = table.palette[code]
+            colors[code] = to_black_white(color) if color is not None else None
+    return colors, no_flags, no_flags
+
+
+def convert_colors(elements, operation: str, black_threshold: int = None, white_threshold: int = None) -> dict:
+    """
+    Apply a color operation to every element, in place, as array operations.
+
+    Args:
+        elements: The elements to convert (e.g. list(root.iter()))
+        operation: 'greyscale', 'invert' or 'bw' (see OPERATIONS)
+        black_threshold, white_threshold: Greyscale thresholds (0-255)
+
+    Returns:
+        Dict with 'converted' (elements with any color changed), 'black'
+        and 'white' (occurrences made pure black / white by greyscale)
+
+    Raises:
+        RuntimeError: If NumPy isn't installed
+        ValueError: If the operation is unknown
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown color operation: {operation}")
+    np = _import_numpy()
+    elements = list(elements)
+    table = ColorTable(elements, operation)
+
+    new_palette, black, white = _transform_palette(table, operation, black_threshold, white_threshold)
+    palette_changed = np.fromiter((new != old for new, old in zip(new_palette, table.palette)),
+                                  dtype=bool, count=len(table.palette))
+
+    changed = palette_changed[table.codes]
+    style_changed = palette_changed[table.style_code]
+    changed_style_elements = np.zeros(len(elements), dtype=bool)
+    changed_style_elements[table.style_element[style_changed]] = True
+
+    # A style attribute is rewritten once fill, stroke or one of its own colors changed
+    rewrites_style = changed[:table.early_slots].any(axis=0) | changed_style_elements
+
+    # Scatter the changed attribute values back into the tree
+    for slot, name in enumerate(table.slots):
+        codes = table.codes[slot].tolist()
+        for row in np.flatnonzero(changed[slot]).tolist():
+            elements[row].set(name, new_palette[codes[row]])
+
+    style_code = table.style_code.tolist()
+    for element_index in np.flatnonzero(rewrites_style).tolist():
+        parts = table.styles.get(element_index)
+        if parts is None:
+            continue
+        elements[element_index].set('style', '; '.join(
+            f"{key}: {new_palette[style_code[value]]}" if key is not None else value
+            for key, value in parts
+        ))
+
+    changed_codes = np.concatenate([table.codes[changed], table.style_code[style_changed]])
+    return {
+        'converted': int((changed.any(axis=0) | changed_style_elements).sum()),
+        'black': int(black[changed_codes].sum()),
+        'white': int(white[changed_codes].sum()),
+    }
+
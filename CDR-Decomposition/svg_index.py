@@ -0,0 +1,64 @@
+class SVGIndex:
+    """
+    Child -> parent lookup for a parsed SVG tree, built in one pass.
+    
+    xml.etree elements don't know their parent, so removing an element used to
+    mean scanning the whole tree for it. The index answers parent lookups in
+    O(1) and stays valid as elements are removed through it. Elements inside a
+    removed subtree count as detached and are left alone, exactly like the old
+    root.iter() scan that could no longer find them.
+    
+    Used by every stage in decomposition.py and cdr-pdf.py that deletes nodes.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._parents = {child: parent for parent in root.iter() for child in parent}
+        self._detached = set()
+
+    def parent_of(self, elem):
+        """Return the parent of elem, or None for the root and detached elements."""
+        if not self.is_attached(elem):
+            return None
+        return self._parents.get(elem)
+
+    def is_attached(self, elem) -> bool:
+        """Check if elem is still part of the tree under root."""
+        while elem is not None:
+            if elem in self._detached:
+                return False
+            if elem is self.root:
+                return True
+            elem = self._parents.get(elem)
+        return False
+
+    def remove(self, elem) -> bool:
+        """Remove elem from its parent. Returns False if it was already detached."""
+        parent = self.parent_of(elem)
+        if parent is None:
+            return False
+        parent.remove(elem)
+        self._detached.add(elem)
+        return True
+
+    def remove_all(self, elements, on_remove=None) -> int:
+        """
+        Remove many elements, rebuilding each affected parent's children once
+        instead of one list scan per element. Returns the number removed.
+        
+        on_remove(elem) is called for each element actually removed, but not
+        for elements that were already inside a removed subtree.
+        """
+        by_parent = {}
+        for elem in elements:
+            parent = self.parent_of(elem)
+            if parent is not None:
+                self._detached.add(elem)
+                by_parent.setdefault(parent, set()).add(elem)
+                if on_remove is not None:
+                    on_remove(elem)
+        
+        for parent, children in by_parent.items():
+            parent[:] = [child for child in parent if child not in children]
+        
+        return sum(len(children) for children in by_parent.values())
@@ -0,0 +1,312 @@
+import math
+import re
+from functools import lru_cache
+
+# One token per match: a command letter, a number, or separators. SVG lets
+# numbers run together ("1.5.5" is 1.5 and .5, "1-2" is 1 and -2), which the
+# number pattern handles by stopping at the second '.' or sign.
+PATH_TOKEN = re.compile(r'([MmZzLlHhVvCcSsQqTtAa])|([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)|[\s,]+|(.)')
+
+# Command -> number of arguments it takes; extra arguments repeat the command
+PATH_ARGUMENT_COUNTS = {
+    'M': 2, 'L': 2, 'H': 1, 'V': 1, 'Z': 0,
+    'C': 6, 'S': 4, 'Q': 4, 'T': 2, 'A': 7,
+}
+
+CURVE_COMMANDS = frozenset('CSQTA')
+CURVE_LETTERS = re.compile(r'[CcSsQqTtAa]')
+
+# Relative tolerance of the shape tests: points closer than this fraction of
+# the path's size are the same point, corners whose cosine is within it are
+# right angles and sides within it of each other are equal
+PATH_TOLERANCE = 1e-3
+
+# Paths with at least this many points are simplified as NumPy arrays when
+# NumPy is installed
+NUMPY_PATH_MIN = 64
+
+
+def tokenize_path(d: str) -> list:
+    """
+    Split SVG path data into commands in one pass.
+
+    Implicit repeats are made explicit: "M 0,0 10,0 10,10" becomes a move
+    followed by two line commands, as the SVG spec defines.
+
+    Returns:
+        List of (command letter, tuple of float arguments); the letter keeps
+        its case, lower case being relative
+
+    Raises:
+        ValueError: If the path data is malformed
+    """
+    commands = []
+    command = None
+    args = []
+
+    def flush():
+        count = PATH_ARGUMENT_COUNTS[command.upper()]
+        if count == 0:
+            if args:
+                raise ValueError(f"'{command}' takes no arguments")
+            commands.append((command, ()))
+            return
+        if not args or len(args) % count:
+            raise ValueError(f"'{command}' needs a multiple of {count} arguments, got {len(args)}")
+        repeat = command
+        for start in range(0, len(args), count):
+            commands.append((repeat, tuple(args[start:start + count])))
+            # Coordinates after a move are line segments
+            if repeat in 'Mm':
+                repeat = 'L' if repeat == 'M' else 'l'
+
+    for match in PATH_TOKEN.finditer(d):
+        letter, number, invalid = match.groups()
+        if letter:
+            if command is not None:
+                flush()
+            elif letter not in 'Mm':
+                raise ValueError("Path data must start with a move command")
+            command = letter
+            args = []
+        elif number:
+            if command is None:
+                raise ValueError("Path data must start with a move command")
+            args.append(float(number))
+        elif invalid:
+            raise ValueError(f"Unexpected character {invalid!r} in path data")
+    if command is not None:
+        flush()
+    return commands
+
+
+def path_subpaths(d: str) -> tuple:
+    """
+    Trace SVG path data in absolute coordinates.
+
+    Curves and arcs are followed to their end points only, so the points
+    of a curved path aren't its outline; has_curves tells them apart.
+
+    Returns:
+        (subpaths, has_curves): subpaths is a list of (points, closed) with
+        points a list of absolute (x, y) vertices
+
+    Raises:
+        ValueError: If the path data is malformed
+    """
+    subpaths = []
+    points = []
+    closed = False
+    has_curves = False
+    x = y = 0.0
+    start_x = start_y = 0.0
+
+    for command, args in tokenize_path(d):
+        upper = command.upper()
+        relative = command != upper
+        if upper == 'M':
+            if len(points) > 1:
+                subpaths.append((points, closed))
+            x, y = (x + args[0], y + args[1]) if relative else args
+            start_x, start_y = x, y
+            points = [(x, y)]
+            closed = False
+            continue
+        if upper == 'Z':
+            closed = True
+            x, y = start_x, start_y
+            continue
+        if closed:
+            # Drawing on after a close starts a new subpath at the same point
+            if len(points) > 1:
+                subpaths.append((points, closed))
+            points = [(x, y)]
+            closed = False
+        if upper == 'H':
+            x = x + args[0] if relative else args[0]
+        elif upper == 'V':
+            y = y + args[0] if relative else args[0]
+        else:
+            # L, T and the end point of C, S, Q and A are the last two arguments
+            x, y = (x + args[-2], y + args[-1]) if relative else args[-2:]
+            if upper in CURVE_COMMANDS:
+                has_curves = True
+        points.append((x, y))
+
+    if len(points) > 1 or closed:
+        subpaths.append((points, closed))
+    return subpaths, has_curves
+
+
+def simplify_polyline(points, closed: bool, tolerance: float = PATH_TOLERANCE) -> tuple:
+    """
+    Reduce a polyline to its corners.
+
+    Repeated points (within tolerance of the polyline's size) and points in
+    the middle of a straight run are dropped. An open polyline that ends
+    where it started counts as closed.
+
+    Returns:
+        (corners, closed)
+    """
+    if len(points) >= NUMPY_PATH_MIN:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        if numpy is not None:
+            return _numpy_simplify(numpy, points, closed, tolerance)
+
+    xs = [point[0] for point in points]
+    ys = [point[1] for point in points]
+    epsilon = tolerance * max(max(xs) - min(xs), max(ys) - min(ys))
+
+    distinct = [points[0]]
+    for point in points[1:]:
+        if math.dist(point, distinct[-1]) > epsilon:
+            distinct.append(point)
+    if len(distinct) > 1 and math.dist(distinct[0], distinct[-1]) <= epsilon:
+        distinct.pop()
+        closed = True
+    if len(distinct) < 3:
+        return distinct, closed
+
+    count = len(distinct)
+    corners = []
+    for i, point in enumerate(distinct):
+        if not closed and i in (0, count - 1):
+            corners.append(point)
+            continue
+        before = distinct[i - 1]
+        after = distinct[(i + 1) % count]
+        if _is_corner(point[0] - before[0], point[1] - before[1], after[0] - point[0], after[1] - point[1], tolerance):
+            corners.append(point)
+    return corners, closed
+
+
+def _is_corner(dx1, dy1, dx2, dy2, tolerance) -> bool:
+    """Whether the direction changes from the first segment to the second."""
+    length = math.hypot(dx1, dy1) * math.hypot(dx2, dy2)
+    cross = (dx1 * dy2 - dy1 * dx2) / length
+    dot = (dx1 * dx2 + dy1 * dy2) / length
+    return abs(cross) > tolerance or dot < 0
+
+
+def _numpy_simplify(np, points, closed: bool, tolerance: float) -> tuple:
+    """simplify_polyline on arrays, with the same tests."""
+    array = np.asarray(points, dtype=np.float64)
+    epsilon = tolerance * (array.max(axis=0) - array.min(axis=0)).max()
+
+    # A point is dropped when it is within epsilon of the last kept one; runs
+    # of near points are rare, so the sequential rule is applied only to them
+    steps = np.hypot(*np.diff(array, axis=0).T)
+    if (steps <= epsilon).any():
+        distinct = [points[0]]
+        for point in points[1:]:
+            if math.dist(point, distinct[-1]) > epsilon:
+                distinct.append(point)
+        array = np.asarray(distinct, dtype=np.float64)
+    if len(array) > 1 and np.hypot(*(array[0] - array[-1])) <= epsilon:
+        array = array[:-1]
+        closed = True
+    if len(array) < 3:
+        return [tuple(point) for point in array.tolist()], closed
+
+    incoming = array - np.roll(array, 1, axis=0)
+    outgoing = np.roll(array, -1, axis=0) - array
+    length = np.hypot(*incoming.T) * np.hypot(*outgoing.T)
+    cross = (incoming[:, 0] * outgoing[:, 1] - incoming[:, 1] * outgoing[:, 0]) / length
+    dot = (incoming * outgoing).sum(axis=1) / length
+    corner = (np.abs(cross) > tolerance) | (dot < 0)
+    if not closed:
+        corner[0] = corner[-1] = True
+    return [tuple(point) for point in array[corner].tolist()], closed
+
+
+def classify_polyline(points, closed: bool, tolerance: float = PATH_TOLERANCE) -> str:
+    """
+    Classify a straight-edged outline by its geometry.
+
+    Returns:
+        'lines' for a straight segment (drawn once or back and forth),
+        'squares' and 'rectangles' for a closed four-corner outline with
+        right angles (at any rotation), otherwise None
+    """
+    corners, closed = simplify_polyline(points, closed, tolerance)
+    if len(corners) == 2 or (len(corners) > 2 and _is_straight(corners, tolerance)):
+        return 'lines'
+    if len(corners) != 4 or not closed:
+        return None
+
+    sides = [(corners[(i + 1) % 4][0] - corners[i][0], corners[(i + 1) % 4][1] - corners[i][1]) for i in range(4)]
+    lengths = [math.hypot(dx, dy) for dx, dy in sides]
+    for i in range(4):
+        (dx1, dy1), (dx2, dy2) = sides[i - 1], sides[i]
+        if abs(dx1 * dx2 + dy1 * dy2) > tolerance * lengths[i - 1] * lengths[i]:
+            return None
+    if abs(lengths[0] - lengths[1]) <= tolerance * max(lengths[0], lengths[1]):
+        return 'squares'
+    return 'rectangles'
+
+
+def _is_straight(corners, tolerance) -> bool:
+    """Whether every corner lies on one line, as when a stroke doubles back."""
+    start = corners[0]
+    end = max(corners, key=lambda point: math.dist(start, point))
+    length = math.dist(start, end)
+    if length == 0:
+        return False
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    return all(abs(dx * (y - start[1]) - dy * (x - start[0])) <= tolerance * length * length
+               for x, y in corners)
+
+
+def parse_points(points: str) -> list:
+    """
+    Parse the points attribute of a polyline or polygon.
+
+    Returns:
+        List of (x, y) tuples
+
+    Raises:
+        ValueError: If a value isn't a number or a coordinate is unpaired
+    """
+    values = [float(value) for value in points.replace(',', ' ').split()]
+    if len(values) % 2:
+        raise ValueError(f"Points need x and y coordinates, got {len(values)} values")
+    return list(zip(values[0::2], values[1::2]))
+
+
+@lru_cache(maxsize=65536)
+def classify_points(points: str, closed: bool, tolerance: float = PATH_TOLERANCE) -> str:
+    """
+    Classify the points of a polyline (closed=False) or polygon (closed=True)
+    the same way classify_path classifies the equivalent path data, or None
+    if they can't be parsed. Memoized per points string.
+    """
+    try:
+        vertices = parse_points(points)
+    except ValueError:
+        return None
+    if len(vertices) < 2:
+        return None
+    return classify_polyline(vertices, closed, tolerance)
+
+
+@lru_cache(maxsize=65536)
+def classify_path(d: str, tolerance: float = PATH_TOLERANCE) -> str:
+    """
+    Classify SVG path data as 'lines', 'rectangles' or 'squares', or None
+    for anything else: curves, several subpaths, other outlines and path
+    data that can't be parsed. Memoized per path string.
+    """
+    if CURVE_LETTERS.search(d):
+        return None
+    try:
+        subpaths, has_curves = path_subpaths(d)
+    except ValueError:
+        return None
+    if has_curves or len(subpaths) != 1:
+        return None
+    points, closed = subpaths[0]
+    return classify_polyline(points, closed, tolerance)
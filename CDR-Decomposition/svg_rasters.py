@@ -0,0 +1,151 @@
+import base64
+import hashlib
+import os
+import re
+import tempfile
+
+# Base64 characters decoded per chunk; a multiple of 4 so chunks split on whole groups
+DECODE_CHUNK_SIZE = 1 << 20
+
+# Anything the base64 alphabet doesn't contain (line breaks, spaces) is skipped, as b64decode does
+BASE64_JUNK_PATTERN = re.compile(r'[^A-Za-z0-9+/=]')
+
+
+def data_url_mime_type(href: str) -> str:
+    """Return the MIME type of a data URL without copying its payload."""
+    header = href[:href.index(',')]
+    return header.split(';')[0].split(':')[1]
+
+
+def iter_data_url_bytes(href: str, chunk_size: int = DECODE_CHUNK_SIZE):
+    """
+    Yield the decoded payload of a base64 data URL in chunks.
+
+    Only chunk_size characters are decoded at a time and the payload is never
+    split off or copied as a whole, so memory use stays constant however
+    large the image is.
+
+    Raises:
+        ValueError: If href has no payload or the base64 data is invalid
+    """
+    start = href.index(',') + 1
+    carry = ''
+
+    for offset in range(start, len(href), chunk_size):
+        piece = href[offset:offset + chunk_size]
+        if BASE64_JUNK_PATTERN.search(piece):
+            piece = BASE64_JUNK_PATTERN.sub('', piece)
+        piece = carry + piece
+
+        # Only whole 4-character groups can be decoded on their own
+        usable = len(piece) - len(piece) % 4
+        carry = piece[usable:]
+        if usable:
+            yield base64.b64decode(piece[:usable])
+
+    if carry:
+        # Raises binascii.Error (a ValueError) on a truncated payload, like b64decode on the whole string
+        yield base64.b64decode(carry)
+
+
+def hash_data_url(href: str, chunk_size: int = DECODE_CHUNK_SIZE) -> tuple:
+    """Return (size_in_bytes, sha256_hex) of a data URL's decoded payload without writing it."""
+    digest = hashlib.sha256()
+    size = 0
+    for data in iter_data_url_bytes(href, chunk_size):
+        digest.update(data)
+        size += len(data)
+    return size, digest.hexdigest()
+
+
+def decode_data_url_to_file(href: str, filepath: str, chunk_size: int = DECODE_CHUNK_SIZE) -> tuple:
+    """
+    Decode the base64 payload of a data URL straight into a file.
+
+    Each decoded chunk is written and hashed before the next one is decoded,
+    so memory use stays constant however large the image is.
+
+    Args:
+        href: Data URL (data:image/png;base64,...)
+        filepath: Path for the decoded file
+        chunk_size: Number of base64 characters decoded per chunk
+
+    Returns:
+        Tuple (size_in_bytes, sha256_hex) of the decoded data
+
+    Raises:
+        ValueError: If href has no payload or the base64 data is invalid
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(filepath, 'wb') as f:
+            for data in iter_data_url_bytes(href, chunk_size):
+                f.write(data)
+                digest.update(data)
+                size += len(data)
+    except Exception:
+        # Don't leave a half-written image behind
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        raise
+
+    return size, digest.hexdigest()
+
+
+class RasterStore:
+    """
+    Content-addressed store that keeps each distinct raster image once.
+
+    Images are filed under their SHA-256 as objects/<first two hex digits>/<hash>.<ext>,
+    so the same logo or texture extracted from any number of documents is
+    written to disk once. One store can be shared by many runs and processes:
+    new images are decoded into a temporary file and then moved into place
+    atomically, so concurrent writers never see a partial object.
+
+    Usage:
+        store = RasterStore("raster_store")
+        remove_raster_from_svg("design.svg", raster_store=store)
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.objects_dir = os.path.join(self.root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    def path_for(self, digest: str, ext: str) -> str:
+        """Return where the image with this hash and extension is stored."""
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.{ext}")
+
+    def add_data_url(self, href: str, ext: str) -> dict:
+        """
+        Decode a data URL into the store unless an identical image is already there.
+
+        Args:
+            href: Data URL (data:image/png;base64,...)
+            ext: File extension for the stored image
+
+        Returns:
+            Dict with 'sha256', 'path', 'size' and 'new' (False if the image was
+            already stored)
+
+        Raises:
+            ValueError: If the base64 data is invalid
+        """
+        # Hash first so an image that is already stored costs no write at all
+        size, digest = hash_data_url(href)
+        path = self.path_for(digest, ext)
+        if os.path.exists(path):
+            return {'sha256': digest, 'path': path, 'size': size, 'new': False}
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=f".{digest}_", dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            decode_data_url_to_file(href, temp_path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return {'sha256': digest, 'path': path, 'size': size, 'new': True}
@@ -0,0 +1,269 @@
+import math
+
+from svg_index import SVGIndex
+from svg_paths import path_subpaths
+from svg_spatial import iter_drawn_shapes
+
+# Segments whose end points are within this distance (document units) of
+# each other's line are collinear, and collinear segments this close along
+# the line are joined
+SEGMENT_TOLERANCE = 1.0
+
+# Directions within this angle (radians) are sorted into the same group
+# before the distance test
+ANGLE_TOLERANCE = 1e-3
+
+# Attributes that hold a shape's geometry; every other attribute must match
+# for two shapes to be merged or counted as duplicates
+GEOMETRY_ATTRIBUTES = frozenset(['x1', 'y1', 'x2', 'y2', 'd', 'points', 'id'])
+
+# Inherited presentation attributes that change how a segment is drawn
+INHERITED_ATTRIBUTES = (
+    'fill', 'stroke', 'stroke-width', 'stroke-linecap', 'stroke-linejoin', 'stroke-dasharray',
+    'stroke-dashoffset', 'stroke-opacity', 'opacity', 'style', 'visibility', 'display',
+    'clip-path', 'mask', 'filter',
+)
+
+
+def consolidate_segments(root, index: SVGIndex = None, stats=None, tolerance: float = SEGMENT_TOLERANCE) -> dict:
+    """
+    Merge collinear straight segments that overlap or touch, and drop exact
+    duplicate shapes, in place.
+
+    Segments are line elements, two-point polylines and open one-segment
+    paths of non-zero length. Only segments drawn the same way can be merged: same transform,
+    same attributes apart from the geometry and the same inherited style.
+    Segments are sorted by direction, then by offset from the origin, then
+    along their line, and merged in one sweep of each group. A merged
+    segment keeps the last element of the run, stretched to the run's
+    outermost end points, and the others are removed; every end point of the
+    run stays within tolerance of the stretched segment. Only segments drawn
+    one right after the other are merged, so the stretched segment never
+    covers a shape that used to be drawn between them. Of duplicate shapes
+    the last one is kept, so nothing that used to be drawn on top of a shape
+    ends up below it.
+
+    Args:
+        root: Root of the parsed SVG tree
+        index: SVGIndex of the tree, to remove elements through (built if None)
+        stats: SVGStats to take removed elements back out of
+        tolerance: Distance (document units) within which segments count as
+            collinear and touching
+
+    Returns:
+        Dict with 'segments' (segments looked at), 'merged' (segments merged
+        into another) and 'duplicates' (other shapes dropped as duplicates)
+    """
+    if index is None:
+        index = SVGIndex(root)
+
+    groups = {}
+    duplicates = []
+    last_shapes = {}
+    segment_count = 0
+    for order, (elem, matrix) in enumerate(iter_drawn_shapes(root)):
+        if len(elem):
+            continue
+        key = (matrix, _local_name(elem), _style_signature(elem, index))
+        segment = _segment_of(elem)
+        # A zero-length segment has no direction to merge along
+        if segment is not None and segment[0] != segment[1]:
+            groups.setdefault(key, []).append((order, elem, segment))
+            segment_count += 1
+            continue
+        if _is_translucent(key[2]):
+            # Translucent shapes drawn twice look darker than drawn once
+            continue
+        shape = key + (tuple(sorted((name, value) for name, value in elem.attrib.items() if name != 'id')),)
+        if shape in last_shapes:
+            duplicates.append(last_shapes[shape])
+        last_shapes[shape] = elem
+
+    merged = []
+    for segments in groups.values():
+        merged.extend(_merge_collinear(segments, tolerance))
+
+    on_remove = stats.discard_subtree if stats is not None else None
+    index.remove_all(merged + duplicates, on_remove)
+    return {'segments': segment_count, 'merged': len(merged), 'duplicates': len(duplicates)}
+
+
+def _local_name(elem) -> str:
+    return elem.tag.split('}')[-1]
+
+
+def _style_signature(elem, index: SVGIndex) -> tuple:
+    """The element's own non-geometry attributes and the style it inherits."""
+    own = tuple(sorted((name, value) for name, value in elem.attrib.items() if name not in GEOMETRY_ATTRIBUTES))
+    inherited = []
+    parent = index.parent_of(elem)
+    while parent is not None:
+        for name in INHERITED_ATTRIBUTES:
+            value = parent.get(name)
+            if value is not None:
+                inherited.append((name, value))
+        parent = index.parent_of(parent)
+    return own, tuple(inherited)
+
+
+def _is_translucent(signature) -> bool:
+    own, inherited = signature
+    return any('opacity' in name or (name == 'style' and 'opacity' in value) for name, value in own + inherited)
+
+
+def _number(value) -> float:
+    return float(value) if value else 0.0
+
+
+def _segment_of(elem):
+    """((x1, y1), (x2, y2)) of a single straight segment element, or None."""
+    tag = _local_name(elem)
+    try:
+        if tag == 'line':
+            return ((_number(elem.get('x1')), _number(elem.get('y1'))),
+                    (_number(elem.get('x2')), _number(elem.get('y2'))))
+        if tag == 'polyline':
+            values = [float(value) for value in elem.get('points', '').replace(',', ' ').split()]
+            if len(values) == 4:
+                return (values[0], values[1]), (values[2], values[3])
+        if tag == 'path':
+            subpaths, has_curves = path_subpaths(elem.get('d', ''))
+            if not has_curves and len(subpaths) == 1:
+                points, closed = subpaths[0]
+                if len(points) == 2 and not closed:
+                    return points[0], points[1]
+    except ValueError:
+        return None
+    return None
+
+
+def _merge_collinear(segments, tolerance: float) -> list:
+    """
+    Sweep one style group: sort by direction, offset and position along the
+    line, stretch the last segment of every touching run over the run and
+    return the other elements of the runs.
+
+    Groups are measured from their first entry, so a group never spans more
+    than ANGLE_TOLERANCE (nor a band more than tolerance), however many
+    nearly parallel segments there are.
+    """
+    lines = []
+    for order, elem, (start, end) in segments:
+        angle = math.atan2(end[1] - start[1], end[0] - start[0]) % math.pi
+        if angle > math.pi - ANGLE_TOLERANCE:
+            # Nearly horizontal either way round
+            angle -= math.pi
+        lines.append((angle, order, elem, start, end))
+    lines.sort(key=lambda line: line[0])
+
+    removed = []
+    group = []
+    for line in lines:
+        if group and line[0] - group[0][0] > ANGLE_TOLERANCE:
+            removed.extend(_merge_direction_group(group, tolerance))
+            group = []
+        group.append(line)
+    if group:
+        removed.extend(_merge_direction_group(group, tolerance))
+    return removed
+
+
+def _merge_direction_group(lines, tolerance: float) -> list:
+    angle = lines[0][0]
+    ux, uy = math.cos(angle), math.sin(angle)
+
+    # (offset from the origin across the direction, (position along it, end point) of
+    # both ends, document order, elem)
+    placed = []
+    for _, order, elem, start, end in lines:
+        offset = (-uy * (start[0] + end[0]) + ux * (start[1] + end[1])) / 2
+        along = sorted([(start[0] * ux + start[1] * uy, start), (end[0] * ux + end[1] * uy, end)])
+        placed.append((offset, along[0], along[1], order, elem))
+    placed.sort(key=lambda entry: entry[0])
+
+    removed = []
+    band = []
+    for entry in placed:
+        if band and entry[0] - band[0][0] > tolerance:
+            removed.extend(_merge_band(band, tolerance))
+            band = []
+        band.append(entry)
+    if band:
+        removed.extend(_merge_band(band, tolerance))
+    return removed
+
+
+def _merge_band(band, tolerance: float) -> list:
+    """
+    Merge the segments of one offset band that overlap or touch along the
+    line, were drawn one right after the other and stay within tolerance of
+    the segment they are merged into.
+    """
+    band = sorted(band, key=lambda entry: (entry[1][0], entry[3]))
+    removed = []
+    run = [band[0]]
+    low, high = band[0][1], band[0][2]
+    first, last = band[0][3], band[0][3]
+    for entry in band[1:]:
+        new_high = entry[2] if entry[2][0] > high[0] else high
+        # Checked against the stretched segment itself, not just the newest
+        # piece, so a slowly curving chain can't drift away from its vertices.
+        # The run only has to be checked again when the segment turns.
+        points = [point for _, point in (entry[1], entry[2])]
+        if new_high is not high and not _on_line([new_high[1]], low[1], high[1], 0.0):
+            points += [point for member in run for _, point in (member[1], member[2])]
+        if (entry[1][0] <= high[0] + tolerance
+                and max(last, entry[3]) - min(first, entry[3]) == len(run)
+                and _on_line(points, low[1], new_high[1], tolerance)):
+            run.append(entry)
+            high = new_high
+            first, last = min(first, entry[3]), max(last, entry[3])
+            continue
+        removed.extend(_finish_run(run, low, high))
+        run = [entry]
+        low, high = entry[1], entry[2]
+        first, last = entry[3], entry[3]
+    removed.extend(_finish_run(run, low, high))
+    return removed
+
+
+def _on_line(points, start, end, tolerance: float) -> bool:
+    """Whether every point lies within tolerance of the line through start and end."""
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    length = math.hypot(dx, dy)
+    if length == 0:
+        return all(math.dist(point, start) <= tolerance for point in points)
+    for point in points:
+        if abs(dx * (point[1] - start[1]) - dy * (point[0] - start[0])) / length > tolerance:
+            return False
+    return True
+
+
+def _finish_run(run, low, high) -> list:
+    if len(run) == 1:
+        return []
+    keeper = max(run, key=lambda entry: entry[3])[4]
+    _set_segment(keeper, low[1], high[1])
+    return [entry[4] for entry in run if entry[4] is not keeper]
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def _set_segment(elem, start, end):
+    """Give a segment element new end points, written the way it was written before."""
+    current = _segment_of(elem)
+    if current in ((start, end), (end, start)):
+        return
+    (x1, y1), (x2, y2) = [(_format(x), _format(y)) for x, y in (start, end)]
+    tag = _local_name(elem)
+    if tag == 'line':
+        elem.set('x1', x1)
+        elem.set('y1', y1)
+        elem.set('x2', x2)
+        elem.set('y2', y2)
+    elif tag == 'polyline':
+        elem.set('points', f"{x1},{y1} {x2},{y2}")
+    else:
+        elem.set('d', f"M {x1},{y1} L {x2},{y2}")
@@ -0,0 +1,399 @@
+import json
+import math
+import os
+import re
+
+from svg_paths import path_subpaths
+from svg_traversal import is_skipped_tag
+
+# Written next to the SVG it indexes: test_bijectionBW_geometric.svg -> test_bijectionBW_geometric.spatial.json
+SPATIAL_INDEX_SUFFIX = '.spatial.json'
+SPATIAL_INDEX_VERSION = 1
+
+# Shapes that are indexed, and subtrees that aren't drawn where they are defined
+INDEXED_TAGS = frozenset(['line', 'rect', 'polyline', 'polygon', 'path'])
+NON_RENDERING_TAGS = frozenset(['defs', 'clipPath', 'mask', 'marker', 'pattern', 'symbol'])
+
+TRANSFORM_PATTERN = re.compile(r'([a-zA-Z]+)\s*\(([^)]*)\)')
+NUMBER_PATTERN = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+def spatial_index_path(svg_path: str) -> str:
+    """Where the spatial index of an SVG is saved."""
+    return os.path.splitext(svg_path)[0] + SPATIAL_INDEX_SUFFIX
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the shapes of an SVG, in document (viewBox) coordinates.
+
+    Every line, rect, polyline, polygon and straight path becomes an item
+    with its outline as a list of vertices, after the transforms of its
+    ancestors (a path with several subpaths gives one item per subpath).
+    Items are bucketed by bounding box into square cells, so a query only
+    looks at the items in the cells it touches instead of comparing every
+    shape with every other.
+
+    Usage:
+        index = SpatialIndex.from_tree(root)
+        index.window(30000, 34000, 52000, 50000)    # items in a box
+        index.nearest(30014, 34433, count=3)        # closest items to a point
+        index.intersections()                       # pairs of crossing outlines
+        index.save(spatial_index_path("test_bijectionBW_geometric.svg"))
+    """
+
+    def __init__(self, items=(), cell_size: float = None):
+        """
+        Args:
+            items: Item dicts as built by from_tree ('order', 'tag', 'points',
+                'closed'); 'bbox' is computed when missing
+            cell_size: Grid cell size in document units (defaults to the
+                extent of all items divided by the square root of their count)
+        """
+        self.items = []
+        for item in items:
+            item = dict(item)
+            item['points'] = [tuple(point) for point in item['points']]
+            if 'bbox' not in item:
+                item['bbox'] = _bounding_box(item['points'])
+            item['bbox'] = tuple(item['bbox'])
+            self.items.append(item)
+        self.cell_size = cell_size or _default_cell_size([item['bbox'] for item in self.items])
+        self._cells = {}
+        for number, item in enumerate(self.items):
+            for cell in self._cells_of(item['bbox']):
+                self._cells.setdefault(cell, []).append(number)
+
+    @classmethod
+    def from_tree(cls, root, cell_size: float = None) -> "SpatialIndex":
+        """
+        Index the drawn shapes of a parsed SVG tree. Shapes inside defs,
+        clipPath, markers and the like are left out.
+
+        Item 'order' is the element's position in root.iter(), so results
+        can be mapped back to the tree with list(root.iter())[order].
+        """
+        items = []
+        order = {elem: number for number, elem in enumerate(root.iter())}
+        for elem, matrix in iter_drawn_shapes(root):
+            for points, closed in _shape_outlines(elem):
+                points = [_apply(matrix, point) for point in points]
+                items.append({'order': order[elem], 'tag': _local_name(elem), 'points': points, 'closed': closed})
+        return cls(items, cell_size)
+
+    @classmethod
+    def load(cls, path: str) -> "SpatialIndex":
+        """
+        Load an index saved by save().
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            ValueError: If it isn't a spatial index of this version
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Spatial index not found: {path}")
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('version') != SPATIAL_INDEX_VERSION:
+            raise ValueError(f"Unsupported spatial index version in {path}: {data.get('version')}")
+        return cls(data['items'], data['cell_size'])
+
+    def save(self, path: str) -> str:
+        """Write the index as JSON. Returns the path."""
+        with open(path, 'w') as f:
+            json.dump({'version': SPATIAL_INDEX_VERSION, 'cell_size': self.cell_size, 'items': self.items}, f)
+        return path
+
+    def __len__(self):
+        return len(self.items)
+
+    def window(self, x0: float, y0: float, x1: float, y1: float) -> list:
+        """Items whose bounding box overlaps the window, in document order."""
+        window = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+        found = set()
+        for cell in self._cells_of(window):
+            for number in self._cells.get(cell, ()):
+                if number not in found and _boxes_overlap(self.items[number]['bbox'], window):
+                    found.add(number)
+        return [self.items[number] for number in sorted(found)]
+
+    def nearest(self, x: float, y: float, count: int = 1) -> list:
+        """
+        The items closest to a point, measured to their outlines.
+
+        Returns:
+            List of (distance, item), closest first
+        """
+        if not self.items or count < 1:
+            return []
+        point = (x, y)
+        home = self._cell_of(point)
+        reach = self._cells_to_edge(home)
+        best = {}
+        if reach * reach > 4 * len(self._cells):
+            # Far outside the occupied cells, walking the rings costs more than measuring everything
+            reach = -1
+            best = {number: _distance_to_outline(point, item) for number, item in enumerate(self.items)}
+        for ring in range(reach + 1):
+            for cell in _ring(home, ring):
+                for number in self._cells.get(cell, ()):
+                    if number not in best:
+                        best[number] = _distance_to_outline(point, self.items[number])
+            found = sorted(best.values())
+            # Anything not seen yet lies outside this ring of cells
+            if len(found) >= count and found[count - 1] <= ring * self.cell_size:
+                break
+        closest = sorted(best.items(), key=lambda entry: (entry[1], entry[0]))[:count]
+        return [(distance, self.items[number]) for number, distance in closest]
+
+    def intersections(self) -> list:
+        """
+        Pairs of items whose outlines cross or touch, each pair once.
+
+        Returns:
+            List of (item, item) in document order
+        """
+        pairs = []
+        items = self.items
+        for cell, numbers in self._cells.items():
+            for i, first in enumerate(numbers):
+                first_box = items[first]['bbox']
+                for second in numbers[i + 1:]:
+                    second_box = items[second]['bbox']
+                    # A pair shares every cell its overlap covers; only the
+                    # cell holding the overlap's lower corner reports it
+                    if (_boxes_overlap(first_box, second_box)
+                            and self._cell_of((max(first_box[0], second_box[0]), max(first_box[1], second_box[1]))) == cell):
+                        pairs.append((first, second))
+        segments = {}
+        crossing = []
+        for first, second in sorted(pairs):
+            for number in (first, second):
+                if number not in segments:
+                    segments[number] = _outline_segments(items[number])
+            if _segments_touch_any(segments[first], segments[second], _overlap(items[first]['bbox'], items[second]['bbox'])):
+                crossing.append((items[first], items[second]))
+        return crossing
+
+    def intersecting(self, item: dict) -> list:
+        """Other items whose outlines cross or touch the given item's."""
+        return [other for other in self.window(*item['bbox']) if other is not item and _outlines_touch(item, other)]
+
+    def _cell_of(self, point) -> tuple:
+        return (math.floor(point[0] / self.cell_size), math.floor(point[1] / self.cell_size))
+
+    def _cells_of(self, box):
+        x0, y0 = self._cell_of(box[:2])
+        x1, y1 = self._cell_of(box[2:])
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield (cx, cy)
+
+    def _cells_to_edge(self, home) -> int:
+        """Rings around home it takes to cover every occupied cell."""
+        if not self._cells:
+            return 0
+        return max(max(abs(cx - home[0]), abs(cy - home[1])) for cx, cy in self._cells)
+
+
+def iter_drawn_shapes(root):
+    """
+    Yield (element, matrix) for every shape in INDEXED_TAGS that is drawn
+    where it stands and isn't in a subtree of the skip policy (see
+    svg_traversal.py), in document order. matrix maps the element's own
+    coordinates to document coordinates (the transforms of the element and
+    its ancestors, as an (a, b, c, d, e, f) tuple).
+    """
+    stack = [(root, IDENTITY)]
+    while stack:
+        elem, matrix = stack.pop()
+        if _local_name(elem) in NON_RENDERING_TAGS or is_skipped_tag(elem.tag):
+            continue
+        transform = elem.get('transform')
+        if transform:
+            matrix = _multiply(matrix, parse_transform(transform))
+        if _local_name(elem) in INDEXED_TAGS:
+            yield elem, matrix
+        stack.extend((child, matrix) for child in reversed(elem))
+
+
+def parse_transform(transform: str) -> tuple:
+    """
+    Parse an SVG transform attribute into an (a, b, c, d, e, f) matrix.
+    Unknown or malformed parts are ignored.
+    """
+    matrix = IDENTITY
+    for name, args in TRANSFORM_PATTERN.findall(transform):
+        values = [float(value) for value in NUMBER_PATTERN.findall(args)]
+        step = None
+        if name == 'matrix' and len(values) == 6:
+            step = tuple(values)
+        elif name == 'translate' and values:
+            step = (1.0, 0.0, 0.0, 1.0, values[0], values[1] if len(values) > 1 else 0.0)
+        elif name == 'scale' and values:
+            step = (values[0], 0.0, 0.0, values[1] if len(values) > 1 else values[0], 0.0, 0.0)
+        elif name == 'rotate' and values:
+            angle = math.radians(values[0])
+            cos, sin = math.cos(angle), math.sin(angle)
+            step = (cos, sin, -sin, cos, 0.0, 0.0)
+            if len(values) == 3:
+                cx, cy = values[1], values[2]
+                step = _multiply(_multiply((1.0, 0.0, 0.0, 1.0, cx, cy), step), (1.0, 0.0, 0.0, 1.0, -cx, -cy))
+        elif name == 'skewX' and values:
+            step = (1.0, 0.0, math.tan(math.radians(values[0])), 1.0, 0.0, 0.0)
+        elif name == 'skewY' and values:
+            step = (1.0, math.tan(math.radians(values[0])), 0.0, 1.0, 0.0, 0.0)
+        if step is not None:
+            matrix = _multiply(matrix, step)
+    return matrix
+
+
+def _multiply(m, n) -> tuple:
+    """The matrix applying n first, then m."""
+    a, b, c, d, e, f = m
+    return (a * n[0] + c * n[1], b * n[0] + d * n[1],
+            a * n[2] + c * n[3], b * n[2] + d * n[3],
+            a * n[4] + c * n[5] + e, b * n[4] + d * n[5] + f)
+
+
+def _apply(matrix, point) -> tuple:
+    a, b, c, d, e, f = matrix
+    x, y = point
+    return (a * x + c * y + e, b * x + d * y + f)
+
+
+def _local_name(elem) -> str:
+    tag = elem.tag
+    return tag.split('}')[-1] if isinstance(tag, str) else ''
+
+
+def _number(value) -> float:
+    match = NUMBER_PATTERN.match(value.strip()) if value else None
+    return float(match.group()) if match else 0.0
+
+
+def _shape_outlines(elem) -> list:
+    """(points, closed) of each outline of a shape element, in its own coordinates."""
+    tag = _local_name(elem)
+    if tag == 'line':
+        return [([(_number(elem.get('x1')), _number(elem.get('y1'))),
+                  (_number(elem.get('x2')), _number(elem.get('y2')))], False)]
+    if tag == 'rect':
+        x, y = _number(elem.get('x')), _number(elem.get('y'))
+        width, height = _number(elem.get('width')), _number(elem.get('height'))
+        return [([(x, y), (x + width, y), (x + width, y + height), (x, y + height)], True)]
+    if tag in ('polyline', 'polygon'):
+        values = [float(value) for value in NUMBER_PATTERN.findall(elem.get('points', ''))]
+        points = list(zip(values[0::2], values[1::2]))
+        return [(points, tag == 'polygon')] if points else []
+    try:
+        # Curves are followed to their end points only
+        subpaths, _ = path_subpaths(elem.get('d', ''))
+    except ValueError:
+        return []
+    return [(points, closed) for points, closed in subpaths if points]
+
+
+def _bounding_box(points) -> tuple:
+    xs = [point[0] for point in points]
+    ys = [point[1] for point in points]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _default_cell_size(boxes) -> float:
+    if not boxes:
+        return 1.0
+    width = max(box[2] for box in boxes) - min(box[0] for box in boxes)
+    height = max(box[3] for box in boxes) - min(box[1] for box in boxes)
+    return max(width, height) / max(1.0, math.sqrt(len(boxes))) or 1.0
+
+
+def _boxes_overlap(first, second) -> bool:
+    return first[0] <= second[2] and second[0] <= first[2] and first[1] <= second[3] and second[1] <= first[3]
+
+
+def _ring(home, ring: int):
+    """The cells at Chebyshev distance ring from home."""
+    hx, hy = home
+    if ring == 0:
+        yield home
+        return
+    for cx in range(hx - ring, hx + ring + 1):
+        yield (cx, hy - ring)
+        yield (cx, hy + ring)
+    for cy in range(hy - ring + 1, hy + ring):
+        yield (hx - ring, cy)
+        yield (hx + ring, cy)
+
+
+def _edges(item):
+    points = item['points']
+    if len(points) == 1:
+        yield points[0], points[0]
+        return
+    for i in range(len(points) - 1):
+        yield points[i], points[i + 1]
+    if item['closed'] and len(points) > 2:
+        yield points[-1], points[0]
+
+
+def _distance_to_segment(point, start, end) -> float:
+    px, py = point
+    sx, sy = start
+    dx, dy = end[0] - sx, end[1] - sy
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else max(0.0, min(1.0, ((px - sx) * dx + (py - sy) * dy) / length))
+    return math.hypot(px - sx - t * dx, py - sy - t * dy)
+
+
+def _distance_to_outline(point, item) -> float:
+    return min(_distance_to_segment(point, start, end) for start, end in _edges(item))
+
+
+def _orientation(a, b, c) -> float:
+    return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+
+def _on_segment(a, b, c) -> bool:
+    """Whether c, collinear with a-b, lies within its bounding box."""
+    return min(a[0], b[0]) <= c[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= c[1] <= max(a[1], b[1])
+
+
+def _segments_touch(p1, p2, q1, q2) -> bool:
+    d1 = _orientation(q1, q2, p1)
+    d2 = _orientation(q1, q2, p2)
+    d3 = _orientation(p1, p2, q1)
+    d4 = _orientation(p1, p2, q2)
+    if ((d1 > 0 > d2) or (d1 < 0 < d2)) and ((d3 > 0 > d4) or (d3 < 0 < d4)):
+        return True
+    return ((d1 == 0 and _on_segment(q1, q2, p1)) or (d2 == 0 and _on_segment(q1, q2, p2))
+            or (d3 == 0 and _on_segment(p1, p2, q1)) or (d4 == 0 and _on_segment(p1, p2, q2)))
+
+
+def _outline_segments(item) -> list:
+    """Edges of an item as (box, start, end), for repeated intersection tests."""
+    return [((min(start[0], end[0]), min(start[1], end[1]), max(start[0], end[0]), max(start[1], end[1])), start, end)
+            for start, end in _edges(item)]
+
+
+def _segments_touch_any(first_segments, second_segments, overlap) -> bool:
+    """Whether any edge of the first list touches any edge of the second, looking only inside overlap."""
+    second_segments = [segment for segment in second_segments if _boxes_overlap(segment[0], overlap)]
+    for box, p1, p2 in first_segments:
+        if not _boxes_overlap(box, overlap):
+            continue
+        for other_box, q1, q2 in second_segments:
+            if _boxes_overlap(box, other_box) and _segments_touch(p1, p2, q1, q2):
+                return True
+    return False
+
+
+def _overlap(first_box, second_box) -> tuple:
+    return (max(first_box[0], second_box[0]), max(first_box[1], second_box[1]),
+            min(first_box[2], second_box[2]), min(first_box[3], second_box[3]))
+
+
+def _outlines_touch(first, second) -> bool:
+    return _segments_touch_any(_outline_segments(first), _outline_segments(second), _overlap(first['bbox'], second['bbox']))
@@ -0,0 +1,125 @@
+import os
+
+from svg_colors import is_black_color, is_white_color
+
+# Attributes tallied into the color histogram
+COLOR_ATTRIBUTES = ('fill', 'stroke')
+
+# Same tags as decomposition._is_graphics_element
+GRAPHICS_TAGS = frozenset([
+    'rect', 'circle', 'ellipse', 'line', 'polyline', 'polygon',
+    'path', 'text', 'tspan', 'g', 'use', 'image'
+])
+
+
+class SVGStats:
+    """
+    Element and color tallies of a stage's output, filled in by the stage
+    itself during the pass it already makes over the tree.
+
+    The stage adds every element it visits and takes back the subtrees it
+    removes, so the report on the written file costs no second parse. Only
+    the raw tag and color strings are counted while the stage runs; they are
+    classified once per distinct value in as_dict().
+
+    Usage:
+        stats = SVGStats()
+        _convert_tree_to_greyscale(root, stats=stats)
+        stats.as_dict()['black']
+    """
+
+    def __init__(self):
+        self.tags = {}
+        self.colors = {}
+
+    def add(self, elem, count: int = 1):
+        """Count one element of the output (or take it back out with count=-1)."""
+        tags = self.tags
+        tags[elem.tag] = tags.get(elem.tag, 0) + count
+        colors = self.colors
+        for name in COLOR_ATTRIBUTES:
+            value = elem.get(name)
+            if value and value != 'none':
+                colors[value] = colors.get(value, 0) + count
+
+    def add_subtree(self, elem):
+        """Count an element of the output together with everything under it."""
+        for child in elem.iter():
+            self.add(child)
+
+    def discard_subtree(self, elem):
+        """Take back an element that was removed, together with everything under it."""
+        for child in elem.iter():
+            self.add(child, -1)
+
+    def as_dict(self) -> dict:
+        """
+        Returns:
+            Dict with 'elements', 'element_counts' (tag -> count),
+            'graphics_elements', 'color_attributes', 'colors' (color -> count
+            of fill/stroke attributes using it) and 'black', 'white' and
+            'other' (fill/stroke attributes by color class)
+        """
+        element_counts = {}
+        for tag, count in self.tags.items():
+            if count:
+                name = tag.split('}')[-1]
+                element_counts[name] = element_counts.get(name, 0) + count
+
+        colors = {color: count for color, count in self.colors.items() if count}
+        black = sum(count for color, count in colors.items() if is_black_color(color))
+        white = sum(count for color, count in colors.items() if is_white_color(color))
+        color_attributes = sum(colors.values())
+
+        return {
+            'elements': sum(element_counts.values()),
+            'element_counts': dict(sorted(element_counts.items())),
+            'graphics_elements': sum(count for name, count in element_counts.items() if name.lower() in GRAPHICS_TAGS),
+            'color_attributes': color_attributes,
+            'colors': colors,
+            'black': black,
+            'white': white,
+            'other': color_attributes - black - white,
+        }
+
+
+class StageResult(str):
+    """
+    Output path returned by a file-based stage, carrying what the stage
+    learned about its output.
+
+    It is the path string itself, so existing callers keep working, with:
+        stats: SVGStats.as_dict() of the written SVG
+        counts: The stage's own counters (see reporting.record_counts)
+        bytes_in, bytes_out: Input and output file sizes
+    """
+
+    def __new__(cls, path: str, stats: dict = None, counts: dict = None, bytes_in: int = None, bytes_out: int = None):
+        result = super().__new__(cls, path)
+        result.stats = stats or {}
+        result.counts = counts or {}
+        result.bytes_in = bytes_in
+        result.bytes_out = bytes_out
+        return result
+
+    @property
+    def path(self) -> str:
+        return str(self)
+
+    @property
+    def size_change(self) -> int:
+        """bytes_out - bytes_in, or None if either size is unknown."""
+        if self.bytes_in is None or self.bytes_out is None:
+            return None
+        return self.bytes_out - self.bytes_in
+
+
+def stage_result(output_path: str, stats: SVGStats = None, counts: dict = None, input_path: str = None) -> StageResult:
+    """Wrap a written output path in a StageResult, adding both file sizes."""
+    return StageResult(
+        output_path,
+        stats.as_dict() if stats is not None else None,
+        counts,
+        bytes_in=os.path.getsize(input_path) if input_path and os.path.exists(input_path) else None,
+        bytes_out=os.path.getsize(output_path) if os.path.exists(output_path) else None,
+    )
@@ -0,0 +1,229 @@
+import os
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+from svg_traversal import is_skipped_tag
+
+# Escaped in attribute values besides &, < and >, the same as ElementTree's serializer does
+ATTRIBUTE_ENTITIES = {'"': "&quot;", "\r": "&#13;", "\n": "&#10;", "\t": "&#09;"}
+
+# Prefixes ElementTree's serializer gives these namespaces; any other
+# namespace is numbered ns0, ns1, ... in order of first use. The prefixes a
+# document declares itself are not kept (tree.write drops them too), so
+# SVG elements come out as ns0:svg either way.
+WELL_KNOWN_PREFIXES = {
+    "http://www.w3.org/XML/1998/namespace": "xml",
+    "http://www.w3.org/1999/xhtml": "html",
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#": "rdf",
+    "http://schemas.xmlsoap.org/wsdl/": "wsdl",
+    "http://www.w3.org/2001/XMLSchema": "xs",
+    "http://www.w3.org/2001/XMLSchema-instance": "xsi",
+    "http://purl.org/dc/elements/1.1/": "dc",
+}
+
+
+def _escape_text(text: str) -> str:
+    return escape(text)
+
+
+def _escape_attribute(value: str) -> str:
+    return escape(value, ATTRIBUTE_ENTITIES)
+
+
+def stream_filter_svg(svg_path: str, output_svg_path: str, drop, on_keep=None) -> dict:
+    """
+    Copy an SVG to output_svg_path, leaving out every subtree that drop() rejects.
+
+    The input is read with ET.iterparse and written element by element, and
+    each element is released as soon as it has been written. Memory stays
+    bounded by the nesting depth and the largest single element rather than
+    by the size of the document.
+
+    drop(elem) is called once for each element outside a dropped subtree, as
+    soon as its start tag has been parsed, so elem.attrib is complete but its
+    children are not there yet. Returning True leaves out the element, its
+    children and its tail text, the same as removing it from a parsed tree.
+    Subtrees of the skip policy (see svg_traversal.py) are copied without
+    asking drop(). on_keep(elem), if given, is then called at the same point
+    for the root and every element that is written.
+
+    The output is byte-identical to parsing the whole file, removing the same
+    elements and calling tree.write(encoding='utf-8', xml_declaration=True).
+
+    Args:
+        svg_path: Path to the input SVG file
+        output_svg_path: Path for the filtered SVG
+        drop: Callable taking an element and returning True to leave it out
+        on_keep: Callable taking each written element (optional)
+
+    Returns:
+        Dict with 'written' and 'dropped' element counts
+
+    Raises:
+        ET.ParseError: If the input is not well-formed XML
+    """
+    # Prefixes are only known once the whole document has been seen, so the
+    # body goes to a temporary file and the root start tag is written last
+    output_dir = os.path.dirname(os.path.abspath(output_svg_path))
+    body_fd, body_path = tempfile.mkstemp(prefix=".stream_", suffix=".svg", dir=output_dir)
+
+    qnames = {}
+    namespaces = {}
+
+    def qname(name):
+        # Same prefix assignment as ElementTree's serializer: first use wins
+        if name not in qnames:
+            if name[:1] == "{":
+                uri, local = name[1:].rsplit("}", 1)
+                prefix = namespaces.get(uri)
+                if prefix is None:
+                    prefix = WELL_KNOWN_PREFIXES.get(uri)
+                    if prefix is None:
+                        prefix = "ns%d" % len(namespaces)
+                    if prefix != "xml":
+                        namespaces[uri] = prefix
+                qnames[name] = f"{prefix}:{local}" if prefix else local
+            else:
+                qnames[name] = name
+        return qnames[name]
+
+    def start_tag(elem):
+        # Resolve every name first so the root tag sees all of its own prefixes
+        tag = qname(elem.tag)
+        attributes = "".join(
+            f' {qname(key)}="{_escape_attribute(value)}"' for key, value in elem.items()
+        )
+        return tag, attributes
+
+    written = 0
+    dropped = 0
+    root = None
+    root_tag = None
+    root_attributes = None
+    root_opened = False
+
+    stack = []          # Open elements, innermost last
+    pending_open = None  # Element whose start tag waits until we know if it is empty
+    pending_tail = None  # Closed element whose tail text has not been written yet
+    skip_depth = 0      # > 0 while inside a dropped subtree
+    pass_depth = 0      # > 0 while inside a subtree of the skip policy
+
+    try:
+        with open(body_fd, "w", encoding="utf-8", errors="xmlcharrefreplace", newline="\n") as body:
+
+            def open_pending():
+                nonlocal pending_open, root_opened
+                elem = pending_open
+                pending_open = None
+                if elem is root:
+                    root_opened = True
+                else:
+                    tag, attributes = start_tag(elem)
+                    body.write(f"<{tag}{attributes}>")
+                if elem.text:
+                    body.write(_escape_text(elem.text))
+
+            def flush_tail():
+                nonlocal pending_tail
+                if pending_tail.tail:
+                    body.write(_escape_text(pending_tail.tail))
+                pending_tail = None
+
+            for event, elem in ET.iterparse(svg_path, events=("start", "end")):
+                if event == "start":
+                    if skip_depth:
+                        skip_depth += 1
+                        stack.append(elem)
+                        continue
+
+                    if root is None:
+                        root = elem
+                        root_tag, root_attributes = start_tag(elem)
+                        if on_keep is not None:
+                            on_keep(elem)
+                        stack.append(elem)
+                        pending_open = elem
+                        continue
+
+                    # The parent's text and the previous sibling's tail are complete once a child starts
+                    if pending_tail is not None:
+                        flush_tail()
+
+                    if pass_depth or is_skipped_tag(elem.tag):
+                        pass_depth += 1
+                    elif drop(elem):
+                        dropped += 1
+                        skip_depth = 1
+                        stack.append(elem)
+                        continue
+                    if on_keep is not None:
+                        on_keep(elem)
+
+                    if pending_open is not None:
+                        open_pending()
+                    stack.append(elem)
+                    pending_open = elem
+                    continue
+
+                # event == "end"
+                stack.pop()
+                parent = stack[-1] if stack else None
+
+                if skip_depth:
+                    skip_depth -= 1
+                    if skip_depth == 0 and parent is not None:
+                        parent.remove(elem)
+                    continue
+
+                if pending_tail is not None:
+                    flush_tail()
+
+                if pass_depth:
+                    pass_depth -= 1
+
+                if pending_open is elem:
+                    # No kept children: written exactly like tree.write would
+                    pending_open = None
+                    if elem is root:
+                        root_opened = bool(elem.text)
+                        if root_opened:
+                            body.write(_escape_text(elem.text))
+                    else:
+                        tag, attributes = start_tag(elem)
+                        if elem.text:
+                            body.write(f"<{tag}{attributes}>{_escape_text(elem.text)}</{tag}>")
+                        else:
+                            body.write(f"<{tag}{attributes} />")
+                elif elem is not root:
+                    body.write(f"</{qnames[elem.tag]}>")
+
+                if elem is not root:
+                    written += 1
+                    pending_tail = elem
+                    # The parser may already have appended later siblings, so remove this one by identity
+                    parent.remove(elem)
+
+            if pending_tail is not None:
+                flush_tail()
+            if root_opened:
+                body.write(f"</{root_tag}>")
+
+        # The root start tag declares every prefix that the body used
+        declarations = "".join(
+            f' xmlns:{prefix}="{_escape_attribute(uri)}"'
+            for uri, prefix in sorted(namespaces.items(), key=lambda item: item[1])
+        )
+        with open(output_svg_path, "w", encoding="utf-8", errors="xmlcharrefreplace", newline="\n") as out:
+            out.write("<?xml version='1.0' encoding='utf-8'?>\n")
+            out.write(f"<{root_tag}{declarations}{root_attributes}")
+            out.write(">" if root_opened else " />")
+            out.flush()
+            with open(body_path, "rb") as body:
+                shutil.copyfileobj(body, out.buffer)
+    finally:
+        if os.path.exists(body_path):
+            os.remove(body_path)
+
+    return {'written': written + 1, 'dropped': dropped}
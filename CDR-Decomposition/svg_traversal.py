@@ -0,0 +1,110 @@
+import os
+from contextlib import contextmanager
+
+# Subtrees every stage passes through untouched: nothing inside them is
+# converted, compared, classified or removed, and they are written out as
+# they were read. SVG fonts carry long glyph outlines that are only drawn
+# through text, and clip paths only contribute their geometry, so neither
+# has colors or shapes of its own for the stages to work on.
+#
+# Markers, symbols, patterns and masks aren't drawn where they are defined
+# either, but their contents are drawn (with their own colors) wherever they
+# are used, so the color stages have to see them. Add them to the policy
+# when that isn't wanted.
+#
+# Set CDR_SKIP_SUBTREES to a comma-separated list of tag names to change the
+# policy for every process that imports this module (an empty value skips
+# nothing), or call set_skip_subtrees.
+SKIP_SUBTREES = frozenset(['font', 'font-face', 'glyph', 'missing-glyph', 'clipPath'])
+
+DEFS_TAGS = ('{http://www.w3.org/2000/svg}defs', 'defs')
+
+
+def _parse_tags(tags) -> frozenset:
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    return frozenset(tag.strip() for tag in tags if tag.strip())
+
+
+_skip_tags = _parse_tags(os.environ['CDR_SKIP_SUBTREES']) if 'CDR_SKIP_SUBTREES' in os.environ else SKIP_SUBTREES
+
+
+def skip_subtrees() -> frozenset:
+    """The tag names (without namespace) whose subtrees the stages pass through."""
+    return _skip_tags
+
+
+def set_skip_subtrees(tags) -> frozenset:
+    """
+    Set the subtrees the stages pass through, as tag names without namespace
+    (an iterable or a comma-separated string). Returns the previous policy.
+    """
+    global _skip_tags
+    previous = _skip_tags
+    _skip_tags = _parse_tags(tags)
+    return previous
+
+
+def configure_skip_subtrees(tags) -> frozenset:
+    """
+    Set the skip policy for this process and the worker processes it starts
+    from now on (through CDR_SKIP_SUBTREES). Returns the new policy.
+    """
+    os.environ['CDR_SKIP_SUBTREES'] = ','.join(sorted(_parse_tags(tags)))
+    set_skip_subtrees(tags)
+    return skip_subtrees()
+
+
+@contextmanager
+def skipping(tags):
+    """Use another skip policy inside the block."""
+    previous = set_skip_subtrees(tags)
+    try:
+        yield skip_subtrees()
+    finally:
+        set_skip_subtrees(previous)
+
+
+def is_skipped_tag(tag) -> bool:
+    """Whether an element with this tag starts a subtree the stages pass through."""
+    return isinstance(tag, str) and tag.split('}')[-1] in _skip_tags
+
+
+def iter_rendered(root, on_skip=None):
+    """
+    Yield root and every element under it that isn't inside a skipped
+    subtree (see SKIP_SUBTREES), in document order, like root.iter() does.
+
+    The walk keeps its own stack and never descends into a skipped subtree,
+    so glyph outlines and clip paths cost one tag check each, however large
+    they are. A stage may remove elements it has been given; their
+    children are still visited if the walk hasn't reached them yet.
+
+    on_skip(elem), if given, is called with the outermost element of each
+    skipped subtree when the walk passes it, e.g. SVGStats.add_subtree to
+    still count what is written out.
+    """
+    if not _skip_tags:
+        yield from root.iter()
+        return
+    # Verdicts cached per tag, so each distinct tag is only split once
+    verdicts = {}
+    yield root
+    stack = list(reversed(root))
+    while stack:
+        elem = stack.pop()
+        tag = elem.tag
+        skipped = verdicts.get(tag)
+        if skipped is None:
+            skipped = verdicts[tag] = is_skipped_tag(tag)
+        if skipped:
+            if on_skip is not None:
+                on_skip(elem)
+            continue
+        yield elem
+        stack.extend(reversed(elem))
+
+
+def defs_of(elements) -> list:
+    """The defs elements among a list of elements, e.g. from iter_rendered."""
+    return [elem for elem in elements if elem.tag in DEFS_TAGS]
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+# The stage modules are flat scripts next to this folder, imported by name
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if MODULE_DIR not in sys.path:
+    sys.path.insert(0, MODULE_DIR)
+
+# Committed inputs and the outputs every stage is expected to reproduce byte for byte
+GOLDEN_CASES = ('chai test case', 'pasta test case')
+GOLDEN_OUTPUTS = (
+    'test_vectors.svg', 'test_vectors_greyscale.svg', 'test_vectors_greyscale_inverted.svg',
+    'test_bijectionBW.svg', 'test_bijectionBW_geometric.svg',
+)
+
+
+@pytest.fixture(autouse=True)
+def quiet_reporting():
+    """Keep stage summaries out of the test output."""
+    from reporting import quiet
+    with quiet():
+        yield
+
+
+@pytest.fixture(params=GOLDEN_CASES)
+def golden_case(request) -> str:
+    """Folder of one committed test case."""
+    return os.path.join(MODULE_DIR, request.param)
@@ -0,0 +1,200 @@
+import filecmp
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from build_cache import MANIFEST_NAME, BuildCache, _read_manifest
+
+# File stage outputs of the committed cases, in chain order
+CHAIN_OUTPUTS = ('test_vectors.svg', 'test_vectors_greyscale.svg', 'test_vectors_greyscale_inverted.svg',
+                 'test_bijectionBW.svg', 'test_bijectionBW_geometric.svg')
+
+
+def _run_chain(folder, black_threshold: int = 50) -> list:
+    from decomposition import (convert_svg_to_greyscale, extract_bijection_bw_elements,
+                               filter_to_geometric_shapes, invert_svg_colors, remove_raster_from_svg)
+
+    vectors = remove_raster_from_svg(os.path.join(folder, "test.svg"))
+    greyscale = convert_svg_to_greyscale(vectors, black_threshold=black_threshold)
+    inverted = invert_svg_colors(greyscale)
+    bijection = extract_bijection_bw_elements(greyscale, inverted)
+    return [vectors, greyscale, inverted, bijection, filter_to_geometric_shapes(bijection)]
+
+
+def _mtimes(folder) -> dict:
+    return {name: os.stat(os.path.join(folder, name)).st_mtime_ns for name in CHAIN_OUTPUTS}
+
+
+def _rebuilt(before: dict, folder) -> list:
+    after = _mtimes(folder)
+    return [name for name in CHAIN_OUTPUTS if after[name] != before[name]]
+
+
+@pytest.fixture
+def work_dir(golden_case, tmp_path):
+    shutil.copy(os.path.join(golden_case, "test.svg"), tmp_path)
+    return str(tmp_path)
+
+
+def test_unchanged_chain_is_skipped_and_matches_the_goldens(golden_case, work_dir):
+    with BuildCache().activate():
+        first = _run_chain(work_dir)
+        before = _mtimes(work_dir)
+        second = _run_chain(work_dir)
+    assert _rebuilt(before, work_dir) == []
+    assert [result.stats for result in second] == [result.stats for result in first]
+    for name in CHAIN_OUTPUTS:
+        assert filecmp.cmp(os.path.join(work_dir, name), os.path.join(golden_case, name), shallow=False)
+
+
+def test_a_new_parameter_rebuilds_only_downstream_stages(work_dir):
+    with BuildCache().activate():
+        _run_chain(work_dir)
+        before = _mtimes(work_dir)
+        _run_chain(work_dir, black_threshold=60)
+    assert _rebuilt(before, work_dir) == list(CHAIN_OUTPUTS[1:])
+
+
+def test_a_touched_output_is_rebuilt(work_dir):
+    with BuildCache().activate():
+        _run_chain(work_dir)
+        os.utime(os.path.join(work_dir, 'test_bijectionBW.svg'), ns=(0, 0))
+        before = _mtimes(work_dir)
+        _run_chain(work_dir)
+    # Rebuilt with the same content, so the stage after it is still up to date
+    assert _rebuilt(before, work_dir) == ['test_bijectionBW.svg']
+
+
+def test_changed_input_content_rebuilds_everything(work_dir):
+    with BuildCache().activate():
+        _run_chain(work_dir)
+        before = _mtimes(work_dir)
+        with open(os.path.join(work_dir, "test.svg"), 'a') as f:
+            f.write("\n")
+        _run_chain(work_dir)
+    # The vectors are the same, so stages keyed on their content still match
+    assert _rebuilt(before, work_dir) == ['test_vectors.svg']
+
+
+def test_a_new_cache_instance_reads_the_manifest(work_dir):
+    with BuildCache().activate():
+        _run_chain(work_dir)
+    before = _mtimes(work_dir)
+    with BuildCache().activate():
+        _run_chain(work_dir)
+    assert _rebuilt(before, work_dir) == []
+    assert set(_read_manifest(work_dir)) == set(CHAIN_OUTPUTS)
+
+
+def test_another_code_version_rebuilds_everything(work_dir):
+    with BuildCache().activate():
+        _run_chain(work_dir)
+    before = _mtimes(work_dir)
+    with BuildCache(version='other').activate():
+        _run_chain(work_dir)
+    assert _rebuilt(before, work_dir) == list(CHAIN_OUTPUTS)
+
+
+def test_deleted_extracted_rasters_are_extracted_again(golden_case, work_dir):
+    rasters = os.path.join(work_dir, "test_extracted_rasters")
+    with BuildCache().activate():
+        _run_chain(work_dir)
+        shutil.rmtree(rasters)
+        before = _mtimes(work_dir)
+        _run_chain(work_dir)
+    assert _rebuilt(before, work_dir) == ['test_vectors.svg']
+    expected = os.path.join(golden_case, "test_extracted_rasters")
+    assert sorted(os.listdir(rasters)) == sorted(os.listdir(expected))
+
+
+def test_a_deleted_store_object_is_stored_again(work_dir):
+    from decomposition import remove_raster_from_svg
+    from svg_rasters import RasterStore
+
+    store = RasterStore(os.path.join(work_dir, "store"))
+    svg_path = os.path.join(work_dir, "test.svg")
+    with BuildCache().activate() as cache:
+        output = remove_raster_from_svg(svg_path, raster_store=store)
+        objects = [path for path in cache.extra_paths(output) if path.startswith(store.objects_dir)]
+        assert objects
+        os.remove(objects[0])
+        remove_raster_from_svg(svg_path, raster_store=store)
+    assert os.path.exists(objects[0])
+
+
+def test_pipeline_resumes_from_an_up_to_date_intermediate(golden_case, work_dir):
+    from decomposition import run_svg_pipeline
+
+    def run():
+        with BuildCache().activate():
+            return run_svg_pipeline(os.path.join(work_dir, "test.svg"), output_dir=output_dir,
+                                    write_intermediates={'raster', 'greyscale'})
+
+    output_dir = os.path.join(work_dir, "pipeline")
+    outputs = run()
+    names = {stage: os.path.basename(path) for stage, path in outputs.items()}
+    written = lambda: {stage: os.stat(path).st_mtime_ns for stage, path in outputs.items()}
+
+    before = written()
+    run()
+    assert written() == before
+
+    os.utime(outputs['geometric'], ns=(0, 0))
+    before = written()
+    run()
+    assert [stage for stage, mtime in written().items() if mtime != before[stage]] == ['geometric']
+
+    shutil.rmtree(os.path.join(output_dir, "test_extracted_rasters"))
+    before = written()
+    run()
+    assert all(mtime != before[stage] for stage, mtime in written().items())
+    assert os.listdir(os.path.join(output_dir, "test_extracted_rasters"))
+    for stage, name in names.items():
+        assert filecmp.cmp(outputs[stage], os.path.join(golden_case, name), shallow=False)
+
+
+def _store_entries(directory: str, worker: int, count: int) -> int:
+    cache = BuildCache(version='test')
+    for number in range(count):
+        path = os.path.join(directory, f"out_{worker}_{number}.svg")
+        with open(path, 'w') as f:
+            f.write(str(number))
+        cache.store(path, f"key_{worker}_{number}", None)
+    return worker
+
+
+def test_concurrent_writers_keep_every_manifest_entry(tmp_path):
+    workers, count = 4, 25
+    with ProcessPoolExecutor(workers) as pool:
+        list(pool.map(_store_entries, [str(tmp_path)] * workers, range(workers), [count] * workers))
+    with open(tmp_path / MANIFEST_NAME) as f:
+        entries = json.load(f)['outputs']
+    assert len(entries) == workers * count
+    assert entries['out_3_24.svg']['key'] == 'key_3_24'
+
+
+def test_outlines_stage_tracks_its_colors_folder(work_dir):
+    from pipeline_runner import process_document
+
+    def run(**options):
+        result = process_document(os.path.join(work_dir, "test.svg"), output_dir, ['raster', 'outlines'],
+                                  incremental=True, **options)
+        return os.stat(result['outputs']['outlines']).st_mtime_ns
+
+    output_dir = os.path.join(work_dir, "out")
+    colors = os.path.join(output_dir, "test_vectors_extracted_colors")
+    built = run()
+    assert os.listdir(colors)
+    assert run() == built
+
+    shutil.rmtree(colors)
+    rebuilt = run()
+    assert rebuilt != built
+    assert os.listdir(colors)
+
+    shutil.rmtree(colors)
+    assert run(save_colors=False) != rebuilt
+    assert not os.path.exists(colors)
@@ -0,0 +1,45 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from conftest import GOLDEN_CASES, MODULE_DIR
+
+
+@pytest.fixture
+def same_basenames(tmp_path) -> list:
+    inputs = []
+    for number, case in enumerate(GOLDEN_CASES):
+        folder = tmp_path / f"in{number}"
+        folder.mkdir()
+        shutil.copy(os.path.join(MODULE_DIR, case, "test.svg"), folder)
+        inputs.append(str(folder / "test.svg"))
+    return inputs
+
+
+def test_planned_outputs_of_same_basenames_overlap_in_a_flat_layout(same_basenames, tmp_path):
+    from pipeline_runner import planned_outputs
+
+    out = str(tmp_path / "out")
+    first, second = (planned_outputs(path, out, stages=['raster', 'outlines']) for path in same_basenames)
+    assert first == second
+    assert os.path.join(out, "test_vectors_outlines.svg") in first
+    assert os.path.join(out, "test_extracted_rasters") in first
+
+
+def test_cli_rejects_colliding_documents(same_basenames, tmp_path, capsys):
+    from cdr_decomposition.cli import main
+
+    status = main(same_basenames + ['--layout', 'flat', '-o', str(tmp_path / "out"), '--stages', 'raster',
+                                    '--jobs', '1'])
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+    assert status == 1
+    assert [event['event'] for event in events] == ['start', 'document', 'document', 'done']
+    documents = sorted((event for event in events if event['event'] == 'document'), key=lambda event: event['ok'])
+    assert documents[0]['error'] == f"Outputs collide with {same_basenames[0]}"
+    assert documents[0]['input'] == same_basenames[1]
+    assert documents[1]['ok'] and documents[1]['input'] == same_basenames[0]
+    assert events[-1]['completed'] == 1 and events[-1]['failed'] == 1
+    assert sorted(os.listdir(tmp_path / "out")) == ['test_extracted_rasters', 'test_vectors.svg']
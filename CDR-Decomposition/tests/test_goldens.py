@@ -0,0 +1,42 @@
+import filecmp
+import os
+import shutil
+
+from conftest import GOLDEN_OUTPUTS
+
+
+def _assert_same_rasters(expected, folder):
+    names = sorted(os.listdir(expected))
+    assert sorted(os.listdir(folder)) == names
+    _, mismatch, errors = filecmp.cmpfiles(expected, str(folder), names, shallow=False)
+    assert mismatch == errors == []
+
+
+def test_file_stages_reproduce_the_goldens(golden_case, tmp_path):
+    from decomposition import (convert_svg_to_greyscale, extract_bijection_bw_elements, filter_to_geometric_shapes,
+                               invert_svg_colors, remove_raster_from_svg)
+
+    shutil.copy(os.path.join(golden_case, "test.svg"), tmp_path)
+    vectors = remove_raster_from_svg(str(tmp_path / "test.svg"))
+    greyscale = convert_svg_to_greyscale(vectors)
+    bijection = extract_bijection_bw_elements(greyscale, invert_svg_colors(greyscale))
+    filter_to_geometric_shapes(bijection)
+
+    for name in GOLDEN_OUTPUTS:
+        assert filecmp.cmp(tmp_path / name, os.path.join(golden_case, name), shallow=False), name
+    _assert_same_rasters(os.path.join(golden_case, "test_extracted_rasters"), tmp_path / "test_extracted_rasters")
+
+
+def test_pipeline_reproduces_the_goldens(golden_case, tmp_path):
+    from decomposition import run_svg_pipeline
+
+    shutil.copy(os.path.join(golden_case, "test.svg"), tmp_path)
+    outputs = run_svg_pipeline(str(tmp_path / "test.svg"), output_dir=str(tmp_path / "pipeline"),
+                               write_intermediates={'raster', 'greyscale'})
+
+    assert sorted(os.path.basename(path) for path in outputs.values()) == [
+        'test_bijectionBW_geometric.svg', 'test_vectors.svg', 'test_vectors_greyscale.svg']
+    for path in outputs.values():
+        assert filecmp.cmp(path, os.path.join(golden_case, os.path.basename(path)), shallow=False), path
+    _assert_same_rasters(os.path.join(golden_case, "test_extracted_rasters"),
+                         tmp_path / "pipeline" / "test_extracted_rasters")
@@ -0,0 +1,54 @@
+import json
+import os
+
+from instrumentation import Instrumentation
+
+
+def test_pipeline_records_are_written_as_json_lines(golden_case, tmp_path):
+    from decomposition import run_svg_pipeline
+
+    metrics = Instrumentation()
+    with metrics.activate():
+        run_svg_pipeline(os.path.join(golden_case, "test.svg"), output_dir=str(tmp_path))
+    path = str(tmp_path / "metrics.jsonl")
+    metrics.write_jsonl(path)
+    metrics.write_jsonl(path)
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert records == metrics.records * 2
+    assert [record['stage'] for record in metrics.records] == [
+        'pipeline.parse', 'pipeline.raster', 'pipeline.greyscale', 'pipeline.bijection', 'pipeline.geometric']
+    for record in metrics.records:
+        assert record['document'] == 'test' and record['status'] == 'ok'
+        assert record['wall_s'] >= 0 and record['cpu_s'] >= 0
+    assert metrics.records[-1]['bytes_out'] == os.path.getsize(tmp_path / "test_bijectionBW_geometric.svg")
+    assert set(metrics.records[2]['counts']) == {'converted', 'black', 'white'}
+
+
+def test_prometheus_aggregates_records_with_the_same_labels():
+    metrics = Instrumentation()
+    metrics.records = [
+        {'stage': 'greyscale', 'document': 'test', 'status': 'ok', 'wall_s': 1.5, 'peak_rss_kb': 100},
+        {'stage': 'greyscale', 'document': 'test', 'status': 'ok', 'wall_s': 2.0, 'peak_rss_kb': 300},
+        {'stage': 'greyscale', 'document': 'test', 'status': 'ok', 'wall_s': 0.5, 'peak_rss_kb': 200},
+        {'stage': 'greyscale', 'document': 'test', 'status': 'error', 'wall_s': 0.25},
+        {'stage': 'raster', 'document': 'a "b"', 'status': 'ok', 'bytes_out': 10},
+    ]
+    lines = metrics.to_prometheus().splitlines()
+    ok = 'stage="greyscale",document="test",status="ok"'
+    error = 'stage="greyscale",document="test",status="error"'
+
+    assert f'cdr_stage_wall_seconds_sum{{{ok}}} 4.0' in lines
+    assert f'cdr_stage_wall_seconds_count{{{ok}}} 3' in lines
+    assert f'cdr_stage_wall_seconds_sum{{{error}}} 0.25' in lines
+    assert f'cdr_stage_wall_seconds_count{{{error}}} 1' in lines
+    assert f'cdr_stage_peak_rss_kilobytes{{{ok}}} 300' in lines
+    assert not any(line.startswith(f'cdr_stage_peak_rss_kilobytes{{{error}}}') for line in lines)
+    assert 'cdr_stage_bytes_out_sum{stage="raster",document="a \\"b\\"",status="ok"} 10' in lines
+    assert lines.count('# TYPE cdr_stage_wall_seconds summary') == 1
+    assert lines.count('# TYPE cdr_stage_peak_rss_kilobytes gauge') == 1
+    assert not any('cdr_stage_cpu_seconds' in line for line in lines)
+    samples = [line.rsplit(' ', 1)[0] for line in lines if not line.startswith('#')]
+    assert len(samples) == len(set(samples))
+    assert Instrumentation().to_prometheus() == ""
@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+
+import libreoffice_pool
+from libreoffice_pool import LibreOfficePool
+
+
+class FakeWorker:
+    """Stands in for a LibreOffice process: crashes on inputs named 'crash', can't be restarted."""
+
+    def __init__(self, name, libreoffice=None, startup_timeout=60.0):
+        self.name = name
+        self.alive = False
+        self.starts = 0
+
+    def start(self):
+        self.starts += 1
+        if self.starts > 1:
+            raise RuntimeError("LibreOffice did not come up")
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def stop(self):
+        self.alive = False
+
+    def convert(self, input_path, output_path, output_format, timeout=None):
+        if input_path == 'crash':
+            self.alive = False
+            raise RuntimeError("LibreOffice crashed")
+        return output_path
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(libreoffice_pool, 'LibreOfficeWorker', FakeWorker)
+    with LibreOfficePool(size=1, libreoffice='libreoffice') as pool:
+        yield pool
+
+
+def test_converts_on_a_free_worker(pool):
+    assert pool.convert('in.cdr', 'out.svg', 'svg') == 'out.svg'
+    assert pool.convert('in.cdr', 'out.pdf', 'pdf') == 'out.pdf'
+
+
+def test_losing_the_last_worker_fails_instead_of_blocking(pool):
+    with pytest.raises(RuntimeError, match="crashed"):
+        pool.convert('crash', 'out.svg', 'svg')
+    # Without the last worker, every later caller gets an error, none waits forever
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            pool.convert('in.cdr', 'out.svg', 'svg')
+
+
+def _convert_in_thread(pool, input_path, errors) -> threading.Thread:
+    def convert():
+        try:
+            pool.convert(input_path, 'out.svg', 'svg')
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=convert, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_callers_waiting_for_the_last_worker_are_woken(pool, monkeypatch):
+    converting, crash = threading.Event(), threading.Event()
+
+    def hang_then_crash(self, input_path, output_path, output_format, timeout=None):
+        converting.set()
+        crash.wait(5)
+        self.alive = False
+        raise RuntimeError("LibreOffice crashed")
+
+    monkeypatch.setattr(FakeWorker, 'convert', hang_then_crash)
+    errors = []
+    busy = _convert_in_thread(pool, 'in.cdr', errors)
+    assert converting.wait(5)
+    waiters = [_convert_in_thread(pool, 'in.cdr', errors) for _ in range(3)]
+    crash.set()
+    for thread in [busy] + waiters:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    assert len(errors) == 4
+
+
+def test_closing_wakes_waiting_callers(pool):
+    pool._idle.get()
+    errors = []
+    waiter = _convert_in_thread(pool, 'in.cdr', errors)
+    pool.close()
+    waiter.join(timeout=5)
+    assert not waiter.is_alive()
+    assert len(errors) == 1
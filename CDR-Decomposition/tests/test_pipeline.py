@@ -0,0 +1,64 @@
+import filecmp
+import os
+import shutil
+
+import pytest
+
+from build_cache import BuildCache
+
+STAGES = ('raster', 'greyscale', 'invert', 'bijection', 'geometric')
+
+
+@pytest.fixture
+def svg_path(golden_case, tmp_path):
+    shutil.copy(os.path.join(golden_case, "test.svg"), tmp_path)
+    return str(tmp_path / "test.svg")
+
+
+@pytest.mark.parametrize("resume_after", STAGES[:-1])
+def test_resumed_pipeline_matches_a_cold_run(svg_path, tmp_path, resume_after):
+    from decomposition import run_svg_pipeline
+
+    cold = run_svg_pipeline(svg_path, STAGES, output_dir=str(tmp_path / "cold"), write_intermediates=True)
+
+    output_dir = str(tmp_path / "resumed")
+    with BuildCache().activate():
+        first = run_svg_pipeline(svg_path, STAGES, output_dir=output_dir, write_intermediates=True)
+        later = STAGES[STAGES.index(resume_after) + 1:]
+        for name in later:
+            os.remove(first[name])
+        kept = {name: os.stat(first[name]).st_mtime_ns for name in STAGES if name not in later}
+        resumed = run_svg_pipeline(svg_path, STAGES, output_dir=output_dir, write_intermediates=True)
+
+    assert {name: os.stat(resumed[name]).st_mtime_ns for name in kept} == kept
+    for name in STAGES:
+        assert os.path.basename(resumed[name]) == os.path.basename(cold[name])
+        assert filecmp.cmp(resumed[name], cold[name], shallow=False), name
+    assert resumed['geometric'].stats == cold['geometric'].stats
+
+
+def test_stages_write_no_files_unless_asked(svg_path, tmp_path):
+    from decomposition import PIPELINE_STAGES, load_svg_document, run_svg_pipeline
+    from svg_stats import SVGStats
+
+    output_dir = tmp_path / "stages"
+    output_dir.mkdir()
+    context = {
+        'output_dir': str(output_dir),
+        'save_rasters': False,
+        'raster_store': None,
+        'black_threshold': 50,
+        'white_threshold': 200,
+        'documents': {},
+        'extra_outputs': [],
+    }
+    doc = load_svg_document(svg_path)
+    for name in STAGES:
+        context['stats'] = SVGStats()
+        doc = context['documents'][name] = PIPELINE_STAGES[name](doc, context)
+    assert os.listdir(output_dir) == []
+    assert context['extra_outputs'] == []
+
+    outputs = run_svg_pipeline(svg_path, STAGES, output_dir=str(tmp_path / "pipeline"), save_rasters=False)
+    assert list(outputs) == ['geometric']
+    assert os.listdir(tmp_path / "pipeline") == ['test_bijectionBW_geometric.svg']
@@ -0,0 +1,36 @@
+import filecmp
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("numpy")
+
+STAGES = ('raster', 'greyscale', 'invert', 'bijection', 'geometric')
+
+
+@pytest.mark.parametrize("black_threshold, white_threshold", [(50, 200), (30, 220)])
+def test_numpy_backend_matches_the_scalar_one(golden_case, tmp_path, black_threshold, white_threshold):
+    from decomposition import run_svg_pipeline
+
+    shutil.copy(os.path.join(golden_case, "test.svg"), tmp_path)
+    runs = {
+        use_numpy: run_svg_pipeline(str(tmp_path / "test.svg"), STAGES, output_dir=str(tmp_path / str(use_numpy)),
+                                    write_intermediates=True, save_rasters=False, use_numpy=use_numpy,
+                                    black_threshold=black_threshold, white_threshold=white_threshold)
+        for use_numpy in (False, True)
+    }
+    for name in STAGES:
+        assert filecmp.cmp(runs[True][name], runs[False][name], shallow=False), name
+        assert runs[True][name].stats == runs[False][name].stats, name
+
+
+def test_numpy_file_stages_match_the_goldens(golden_case, tmp_path):
+    from decomposition import convert_svg_to_greyscale, extract_bijection_bw_elements, invert_svg_colors
+
+    shutil.copy(os.path.join(golden_case, "test_vectors.svg"), tmp_path)
+    greyscale = convert_svg_to_greyscale(str(tmp_path / "test_vectors.svg"), use_numpy=True)
+    inverted = invert_svg_colors(greyscale, use_numpy=True)
+    bijection = extract_bijection_bw_elements(greyscale, inverted)
+    for path in (greyscale, inverted, bijection):
+        assert filecmp.cmp(path, os.path.join(golden_case, os.path.basename(path)), shallow=False), path
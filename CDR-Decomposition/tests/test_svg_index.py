@@ -0,0 +1,60 @@
+import os
+import random
+
+from svg_index import SVGIndex
+from svg_stats import SVGStats
+from svg_xml import parse_svg
+
+
+def _parents(root) -> dict:
+    return {child: parent for parent in root.iter() for child in parent}
+
+
+def _ancestors(elem, parents: dict):
+    while elem in parents:
+        elem = parents[elem]
+        yield elem
+
+
+def _check_against_a_fresh_walk(index, stats, elements):
+    parents = _parents(index.root)
+    attached = set(index.root.iter())
+    for elem in elements:
+        assert index.is_attached(elem) == (elem in attached)
+        assert index.parent_of(elem) is parents.get(elem)
+    fresh = SVGStats()
+    fresh.add_subtree(index.root)
+    assert stats.as_dict() == fresh.as_dict()
+
+
+def test_removing_nested_elements_matches_a_fresh_walk(golden_case):
+    root = parse_svg(os.path.join(golden_case, "test.svg")).getroot()
+    elements = list(root.iter())
+    original_parents = _parents(root)
+    index = SVGIndex(root)
+    stats = SVGStats()
+    stats.add_subtree(root)
+    rng = random.Random(0)
+
+    # Parents and their descendants picked together: only the outermost ones count
+    chosen = [elem for elem in elements[1:] if rng.random() < 0.1]
+    picked = set(chosen)
+    outermost = [elem for elem in chosen if not picked.intersection(_ancestors(elem, original_parents))]
+    assert len(outermost) < len(chosen)
+    removed = []
+
+    def on_remove(elem):
+        removed.append(elem)
+        stats.discard_subtree(elem)
+
+    assert index.remove_all(chosen, on_remove=on_remove) == len(outermost)
+    assert removed == outermost
+    _check_against_a_fresh_walk(index, stats, elements)
+
+    for elem in rng.sample(elements[1:], 200):
+        attached = index.is_attached(elem)
+        assert index.remove(elem) == attached
+        if attached:
+            stats.discard_subtree(elem)
+    _check_against_a_fresh_walk(index, stats, elements)
+    assert index.parent_of(root) is None and not index.remove(root)
@@ -0,0 +1,100 @@
+import pytest
+
+from svg_paths import classify_path, classify_points, parse_points, path_subpaths, tokenize_path
+
+
+def test_tokenize_splits_numbers_that_run_together():
+    assert tokenize_path("M1.5.5L-2-3") == [('M', (1.5, 0.5)), ('L', (-2.0, -3.0))]
+    assert tokenize_path("m0,0 1e1,0") == [('m', (0.0, 0.0)), ('l', (10.0, 0.0))]
+
+
+def test_tokenize_makes_implicit_repeats_explicit():
+    assert tokenize_path("M 0,0 10,0 10,10 H 0 0 Z") == [
+        ('M', (0.0, 0.0)), ('L', (10.0, 0.0)), ('L', (10.0, 10.0)),
+        ('H', (0.0,)), ('H', (0.0,)), ('Z', ()),
+    ]
+
+
+@pytest.mark.parametrize('d', ["L 0,0", "0,0", "M 0", "M 0,0 L 1", "M 0,0 Z 1", "M 0,0 # 1,1"])
+def test_tokenize_rejects_malformed_data(d):
+    with pytest.raises(ValueError):
+        tokenize_path(d)
+
+
+def test_subpaths_follow_relative_commands_and_closes():
+    subpaths, has_curves = path_subpaths("m 10,10 h 5 v 5 h -5 z m 20,0 l 1,1")
+    assert not has_curves
+    assert subpaths == [
+        ([(10.0, 10.0), (15.0, 10.0), (15.0, 15.0), (10.0, 15.0)], True),
+        ([(30.0, 10.0), (31.0, 11.0)], False),
+    ]
+
+
+def test_subpaths_report_curves():
+    _, has_curves = path_subpaths("M 0,0 Q 5,5 10,0")
+    assert has_curves
+
+
+@pytest.mark.parametrize('d, shape', [
+    ("M 0,0 L 10,0", 'lines'),
+    ("M 0,0 L 5,0 L 10,0", 'lines'),
+    ("M 0,0 L 10,0 L 5,0", 'lines'),
+    ("M 0,0 L 10,0 Z", 'lines'),
+    ("M 0,0 L 10,0 L 0,0 L 10,0", 'lines'),
+    ("M 0,0 H 10 V 10 H 0 Z", 'squares'),
+    ("M 0,0 h 20 v 10 h -20 z", 'rectangles'),
+    ("M 0,0 L 20,0 L 20,10 L 0,10 L 0,0", 'rectangles'),
+    ("M 0,0 L 10,0 L 20,0 L 20,10 L 0,10 Z", 'rectangles'),
+    ("M 5,0 L 10,5 L 5,10 L 0,5 Z", 'squares'),
+    ("M 0,0 L 8,6 L 5,10 L -3,4 Z", 'rectangles'),
+    ("M 0,0 L 10,0 L 10,10", None),
+    ("M 0,0 L 10,0 L 5,0.5", None),
+    ("M 0,0 L 10,0 L 12,10 L 2,10 Z", None),
+    ("M 0,0 L 10,0 L 10,10 L 0,10 Z M 20,20 L 30,20", None),
+    ("M 0,0 C 0,5 10,5 10,0", None),
+    ("M 0,0 L 0,0", None),
+    ("M 0,0 L x", None),
+])
+def test_classify_path(d, shape):
+    assert classify_path(d) == shape
+
+
+@pytest.mark.parametrize('d, points', [
+    ("M 5,0 L 10,5 L 5,10 L 0,5 Z", "5,0 10,5 5,10 0,5"),
+    ("M 0,0 L 8,6 L 5,10 L -3,4 Z", "0 0 8 6 5 10 -3 4"),
+    ("M 0,0 L 10,0 L 5,0 Z", "0,0 10,0 5,0"),
+    ("M 0,0 L 10,0 L 10,10 L 0,10 L 2,2 Z", "0,0 10,0 10,10 0,10 2,2"),
+])
+def test_polygons_classify_like_closed_paths(d, points):
+    assert classify_points(points, True) == classify_path(d)
+
+
+@pytest.mark.parametrize('d, points', [
+    ("M 0,0 L 10,0", "0,0 10,0"),
+    ("M 0,0 L 10,0 L 5,0", "0,0 10,0 5,0"),
+    ("M 0,0 L 4,0 L 4,2 L 0,2 L 0,0", "0,0 4,0 4,2 0,2 0,0"),
+    ("M 0,0 L 10,0 L 10,10", "0,0 10,0 10,10"),
+])
+def test_polylines_classify_like_open_paths(d, points):
+    assert classify_points(points, False) == classify_path(d)
+
+
+def test_points_that_cant_be_parsed_are_not_classified():
+    with pytest.raises(ValueError):
+        parse_points("0,0 10")
+    assert classify_points("0,0 10", True) is None
+    assert classify_points("0,0 a,b", False) is None
+    assert classify_points("0,0", True) is None
+
+
+@pytest.mark.parametrize('tag, attributes', [
+    ('path', {'d': "M 5,0 L 10,5 L 5,10 L 0,5 Z"}),
+    ('polygon', {'points': "5,0 10,5 5,10 0,5"}),
+    ('polyline', {'points': "5,0 10,5 5,10 0,5 5,0"}),
+])
+def test_geometric_filter_keeps_a_rotated_square_however_it_is_drawn(tag, attributes):
+    import xml.etree.ElementTree as ET
+    from decomposition import _analyze_shape_type
+
+    analysis = _analyze_shape_type(ET.Element(tag, attributes))
+    assert analysis['keep'] and analysis['type'] == 'squares'
@@ -0,0 +1,115 @@
+import base64
+import filecmp
+import hashlib
+import os
+import random
+import shutil
+
+import pytest
+
+from svg_rasters import (RasterStore, data_url_mime_type, decode_data_url_to_file, hash_data_url,
+                         iter_data_url_bytes)
+
+
+def _data_url(payload: bytes, mime: str = 'image/png', wrap: int = 0) -> str:
+    encoded = base64.b64encode(payload).decode()
+    if wrap:
+        # Exporters break long payloads into lines
+        encoded = '\n'.join(encoded[i:i + wrap] for i in range(0, len(encoded), wrap))
+    return f"data:{mime};base64,{encoded}"
+
+
+PAYLOAD = random.Random(9).randbytes(10_000)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 4, 7, 1000, 1 << 20])
+@pytest.mark.parametrize('wrap', [0, 76])
+def test_decoded_chunks_join_to_the_payload(chunk_size, wrap):
+    href = _data_url(PAYLOAD, wrap=wrap)
+    assert b''.join(iter_data_url_bytes(href, chunk_size)) == PAYLOAD
+    assert hash_data_url(href, chunk_size) == (len(PAYLOAD), hashlib.sha256(PAYLOAD).hexdigest())
+
+
+@pytest.mark.parametrize('payload', [b'', b'a', b'ab', b'abc'])
+def test_short_payloads_round_trip(payload, tmp_path):
+    path = str(tmp_path / "image.bin")
+    assert decode_data_url_to_file(_data_url(payload), path, chunk_size=4) == (len(payload), hashlib.sha256(payload).hexdigest())
+    with open(path, 'rb') as f:
+        assert f.read() == payload
+
+
+def test_decoding_into_a_file_round_trips(tmp_path):
+    path = str(tmp_path / "image.png")
+    size, digest = decode_data_url_to_file(_data_url(PAYLOAD, wrap=64), path, chunk_size=1001)
+    with open(path, 'rb') as f:
+        assert f.read() == PAYLOAD
+    assert (size, digest) == (len(PAYLOAD), hashlib.sha256(PAYLOAD).hexdigest())
+
+
+def test_a_truncated_payload_leaves_no_file_behind(tmp_path):
+    path = tmp_path / "image.png"
+    with pytest.raises(ValueError):
+        decode_data_url_to_file(_data_url(PAYLOAD)[:-1], str(path), chunk_size=1000)
+    assert not path.exists()
+
+
+def test_mime_type():
+    assert data_url_mime_type(_data_url(b'x', 'image/jpeg')) == 'image/jpeg'
+
+
+def test_store_keeps_each_image_once(tmp_path):
+    store = RasterStore(str(tmp_path / "store"))
+    first = store.add_data_url(_data_url(PAYLOAD), 'png')
+    again = store.add_data_url(_data_url(PAYLOAD, wrap=76), 'png')
+    other = store.add_data_url(_data_url(PAYLOAD[1:]), 'png')
+
+    digest = hashlib.sha256(PAYLOAD).hexdigest()
+    assert first == {'sha256': digest, 'path': store.path_for(digest, 'png'), 'size': len(PAYLOAD), 'new': True}
+    assert again == dict(first, new=False)
+    assert other['new'] and other['path'] != first['path']
+    assert first['path'] == os.path.join(store.objects_dir, digest[:2], f"{digest}.png")
+    with open(first['path'], 'rb') as f:
+        assert f.read() == PAYLOAD
+    # No temporary files are left next to the objects
+    assert sorted(os.listdir(os.path.dirname(first['path']))) == [os.path.basename(first['path'])]
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_extracted_rasters_match_the_committed_ones(golden_case, tmp_path, streaming):
+    from decomposition import remove_raster_from_svg
+
+    shutil.copy(os.path.join(golden_case, "test.svg"), tmp_path)
+    output = remove_raster_from_svg(str(tmp_path / "test.svg"), streaming=streaming)
+    assert filecmp.cmp(output, os.path.join(golden_case, "test_vectors.svg"), shallow=False)
+    expected = os.path.join(golden_case, "test_extracted_rasters")
+    names = sorted(os.listdir(expected))
+    assert sorted(os.listdir(tmp_path / "test_extracted_rasters")) == names
+    _, mismatch, errors = filecmp.cmpfiles(expected, str(tmp_path / "test_extracted_rasters"), names, shallow=False)
+    assert mismatch == errors == []
+
+
+def test_raster_store_holds_the_committed_images(golden_case, tmp_path):
+    from decomposition import remove_raster_from_svg
+
+    expected = os.path.join(golden_case, "test_extracted_rasters")
+    images = {}
+    for name in os.listdir(expected):
+        if not name.endswith('_metadata.txt'):
+            with open(os.path.join(expected, name), 'rb') as f:
+                data = f.read()
+            images[hashlib.sha256(data).hexdigest()] = data
+
+    store = RasterStore(str(tmp_path / "store"))
+    for run in ("first", "second"):
+        os.makedirs(tmp_path / run)
+        shutil.copy(os.path.join(golden_case, "test.svg"), tmp_path / run)
+        output = remove_raster_from_svg(str(tmp_path / run / "test.svg"), raster_store=store)
+        assert filecmp.cmp(output, os.path.join(golden_case, "test_vectors.svg"), shallow=False)
+
+    stored = {}
+    for folder, _, names in os.walk(store.objects_dir):
+        for name in names:
+            with open(os.path.join(folder, name), 'rb') as f:
+                stored[name.split('.')[0]] = f.read()
+    # Both runs share one copy of each distinct image
+    assert stored == images
@@ -0,0 +1,109 @@
+import math
+import xml.etree.ElementTree as ET
+
+from svg_segments import _segment_of, consolidate_segments
+from svg_spatial import iter_drawn_shapes
+
+SVG_NS = "http://www.w3.org/2000/svg"
+
+
+def _svg(*shapes, **group_attributes) -> ET.Element:
+    """A root with one group holding (tag, attributes) shapes in drawing order."""
+    root = ET.Element(f"{{{SVG_NS}}}svg")
+    group = ET.SubElement(root, f"{{{SVG_NS}}}g", {name.replace('_', '-'): value for name, value in group_attributes.items()})
+    for tag, attributes in shapes:
+        ET.SubElement(group, f"{{{SVG_NS}}}{tag}", {name: str(value) for name, value in attributes.items()})
+    return root
+
+
+def _line(x1, y1, x2, y2, **attributes) -> tuple:
+    return 'line', dict(x1=x1, y1=y1, x2=x2, y2=y2, **attributes)
+
+
+def _segments(root) -> list:
+    return [_segment_of(elem) for elem, _ in iter_drawn_shapes(root) if _segment_of(elem) is not None]
+
+
+def _distance_to_segment(point, segment) -> float:
+    (x1, y1), (x2, y2) = segment
+    dx, dy = x2 - x1, y2 - y1
+    t = max(0.0, min(1.0, ((point[0] - x1) * dx + (point[1] - y1) * dy) / (dx * dx + dy * dy)))
+    return math.dist(point, (x1 + t * dx, y1 + t * dy))
+
+
+def test_touching_collinear_segments_merge_into_the_last():
+    root = _svg(_line(0, 0, 10, 0, id='a'), _line(10, 0, 20, 0, id='b'), _line(30, 0, 20.5, 0, id='c'), stroke='#000')
+    counts = consolidate_segments(root, tolerance=1.0)
+    assert counts == {'segments': 3, 'merged': 2, 'duplicates': 0}
+    [elem] = [elem for elem, _ in iter_drawn_shapes(root)]
+    assert elem.get('id') == 'c'
+    assert sorted(_segment_of(elem)) == [(0.0, 0.0), (30.0, 0.0)]
+
+
+def test_segments_further_apart_than_the_tolerance_stay():
+    root = _svg(_line(0, 0, 10, 0), _line(11.5, 0, 20, 0), _line(0, 2, 10, 2))
+    assert consolidate_segments(root, tolerance=1.0)['merged'] == 0
+    assert len(_segments(root)) == 3
+
+
+def test_only_segments_drawn_alike_merge():
+    root = _svg(_line(0, 0, 10, 0, stroke='#000'), _line(10, 0, 20, 0, stroke='#fff'),
+                _line(20, 0, 30, 0, stroke='#fff', transform='scale(1)'))
+    assert consolidate_segments(root)['merged'] == 0
+
+
+def test_lines_and_paths_merge_with_their_own_kind():
+    root = _svg(_line(0, 0, 10, 0), ('path', {'d': "M 10,0 L 20,0"}), ('path', {'d': "m 20,0 l 10,0"}))
+    assert consolidate_segments(root)['merged'] == 1
+    assert sorted(map(sorted, _segments(root))) == [[(0.0, 0.0), (10.0, 0.0)], [(10.0, 0.0), (30.0, 0.0)]]
+
+
+def test_segments_with_a_shape_drawn_between_them_stay_apart():
+    # Stretching the first line over the second would paint it below the rect
+    root = _svg(_line(0, 0, 10, 0), ('rect', {'x': 12, 'y': -1, 'width': 4, 'height': 2}), _line(10, 0, 20, 0))
+    assert consolidate_segments(root)['merged'] == 0
+
+
+def test_merges_follow_drawing_order_not_position():
+    root = _svg(_line(20, 0, 30, 0), _line(0, 0, 10, 0), _line(10, 0, 20, 0))
+    assert consolidate_segments(root)['merged'] == 2
+    assert [sorted(segment) for segment in _segments(root)] == [[(0.0, 0.0), (30.0, 0.0)]]
+
+
+def test_a_curving_chain_keeps_every_vertex_within_tolerance():
+    # Chords of a flat parabola: neighbours are nearly parallel, so they fall
+    # in one direction group, but the curve rises 20 units over its length
+    points = [(100 * i, (100 * i) ** 2 / 8e7) for i in range(401)]
+    root = _svg(*[_line(*start, *end) for start, end in zip(points, points[1:])])
+    counts = consolidate_segments(root, tolerance=1.0)
+    remaining = _segments(root)
+    assert counts['merged'] > 0
+    assert len(remaining) > 1
+    for point in points:
+        assert min(_distance_to_segment(point, segment) for segment in remaining) <= 1.0 + 1e-9
+
+
+def test_a_staircase_of_offsets_does_not_chain_past_the_tolerance():
+    # Each segment is 0.6 across from the last; grouping from the first of
+    # a band stops them all sliding into one merged segment
+    root = _svg(*[_line(10 * i, 0.6 * i, 10 * i + 10, 0.6 * i) for i in range(6)])
+    consolidate_segments(root, tolerance=1.0)
+    remaining = _segments(root)
+    assert len(remaining) > 1
+    for i in range(6):
+        for x in (10 * i, 10 * i + 10):
+            assert min(_distance_to_segment((x, 0.6 * i), segment) for segment in remaining) <= 1.0
+
+
+def test_duplicate_shapes_keep_the_last_drawn():
+    root = _svg(('rect', {'id': 'first', 'x': 0, 'y': 0, 'width': 5, 'height': 5}),
+                ('circle', {'cx': 9, 'cy': 9, 'r': 1}),
+                ('rect', {'id': 'second', 'x': 0, 'y': 0, 'width': 5, 'height': 5}))
+    assert consolidate_segments(root)['duplicates'] == 1
+    assert [elem.get('id') for elem in root.iter(f"{{{SVG_NS}}}rect")] == ['second']
+
+
+def test_translucent_duplicates_are_kept():
+    rect = ('rect', {'x': 0, 'y': 0, 'width': 5, 'height': 5})
+    root = _svg(rect, rect, opacity='0.5')
+    assert consolidate_segments(root)['duplicates'] == 0
@@ -0,0 +1,152 @@
+import math
+import random
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from svg_spatial import SPATIAL_INDEX_VERSION, SpatialIndex, spatial_index_path
+
+
+def _random_items(seed: int, count: int = 300) -> list:
+    """Lines and rectangles on an integer grid, so touching outlines are exact."""
+    rng = random.Random(seed)
+    items = []
+    for order in range(count):
+        x, y = rng.randint(0, 2000), rng.randint(0, 2000)
+        if rng.random() < 0.5:
+            end = (x + rng.randint(-150, 150), y + rng.randint(-150, 150))
+            items.append({'order': order, 'tag': 'line', 'points': [(x, y), end], 'closed': False})
+        else:
+            width, height = rng.randint(0, 120), rng.randint(0, 120)
+            points = [(x, y), (x + width, y), (x + width, y + height), (x, y + height)]
+            items.append({'order': order, 'tag': 'rect', 'points': points, 'closed': True})
+    return items
+
+
+def _segments(item) -> list:
+    points = item['points']
+    if len(points) == 1:
+        return [(points[0], points[0])]
+    pairs = list(zip(points, points[1:]))
+    if item['closed']:
+        pairs.append((points[-1], points[0]))
+    return pairs
+
+
+def _cross(a, b, c) -> float:
+    return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+
+def _within(a, b, c) -> bool:
+    return min(a[0], b[0]) <= c[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= c[1] <= max(a[1], b[1])
+
+
+def _touch(p1, p2, q1, q2) -> bool:
+    d1, d2 = _cross(q1, q2, p1), _cross(q1, q2, p2)
+    d3, d4 = _cross(p1, p2, q1), _cross(p1, p2, q2)
+    if ((d1 > 0) != (d2 > 0) and d1 and d2) and ((d3 > 0) != (d4 > 0) and d3 and d4):
+        return True
+    return ((d1 == 0 and _within(q1, q2, p1)) or (d2 == 0 and _within(q1, q2, p2))
+            or (d3 == 0 and _within(p1, p2, q1)) or (d4 == 0 and _within(p1, p2, q2)))
+
+
+def _distance(point, item) -> float:
+    best = math.inf
+    for start, end in _segments(item):
+        dx, dy = end[0] - start[0], end[1] - start[1]
+        length = dx * dx + dy * dy
+        t = 0.0 if length == 0 else max(0.0, min(1.0, ((point[0] - start[0]) * dx + (point[1] - start[1]) * dy) / length))
+        best = min(best, math.dist(point, (start[0] + t * dx, start[1] + t * dy)))
+    return best
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_intersections_match_brute_force(seed):
+    index = SpatialIndex(_random_items(seed))
+    items = index.items
+    expected = [
+        (items[i]['order'], items[j]['order'])
+        for i in range(len(items)) for j in range(i + 1, len(items))
+        if any(_touch(*first, *second) for first in _segments(items[i]) for second in _segments(items[j]))
+    ]
+    assert expected
+    assert [(first['order'], second['order']) for first, second in index.intersections()] == expected
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_intersecting_matches_brute_force(seed):
+    index = SpatialIndex(_random_items(seed))
+    for item in index.items[::25]:
+        expected = [other['order'] for other in index.items if other is not item
+                    and any(_touch(*first, *second) for first in _segments(item) for second in _segments(other))]
+        assert [other['order'] for other in index.intersecting(item)] == expected
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_nearest_matches_brute_force(seed):
+    index = SpatialIndex(_random_items(seed))
+    rng = random.Random(seed)
+    queries = [(rng.uniform(-200, 2200), rng.uniform(-200, 2200)) for _ in range(100)]
+    # Far outside every cell, where the rings are given up for a full scan
+    queries.append((1e6, -1e6))
+    for x, y in queries:
+        for count in (1, 4):
+            expected = sorted(_distance((x, y), item) for item in index.items)[:count]
+            found = index.nearest(x, y, count)
+            assert [distance for distance, _ in found] == pytest.approx(expected)
+            for distance, item in found:
+                assert distance == pytest.approx(_distance((x, y), item))
+
+
+def test_window_matches_brute_force():
+    index = SpatialIndex(_random_items(4))
+    rng = random.Random(4)
+    for _ in range(50):
+        x0, y0 = rng.uniform(-100, 2100), rng.uniform(-100, 2100)
+        x1, y1 = x0 + rng.uniform(0, 600), y0 + rng.uniform(0, 600)
+        expected = [item['order'] for item in index.items
+                    if item['bbox'][0] <= x1 and item['bbox'][2] >= x0 and item['bbox'][1] <= y1 and item['bbox'][3] >= y0]
+        assert [item['order'] for item in index.window(x1, y1, x0, y0)] == expected
+
+
+def test_queries_on_an_empty_index():
+    index = SpatialIndex([])
+    assert index.nearest(0, 0) == []
+    assert index.intersections() == []
+    assert index.window(0, 0, 10, 10) == []
+
+
+def test_from_tree_applies_transforms_and_leaves_out_defs():
+    root = ET.fromstring(
+        '<svg xmlns="http://www.w3.org/2000/svg">'
+        '<defs><rect x="0" y="0" width="5" height="5"/></defs>'
+        '<g transform="translate(100,0)"><line x1="0" y1="0" x2="10" y2="0"/></g>'
+        '<path d="M 0,0 L 0,10 M 20,0 L 20,10"/>'
+        '</svg>'
+    )
+    index = SpatialIndex.from_tree(root)
+    assert [(item['tag'], item['points']) for item in index.items] == [
+        ('line', [(100.0, 0.0), (110.0, 0.0)]),
+        ('path', [(0.0, 0.0), (0.0, 10.0)]),
+        ('path', [(20.0, 0.0), (20.0, 10.0)]),
+    ]
+    elements = list(root.iter())
+    assert elements[index.items[0]['order']].tag.endswith('line')
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = SpatialIndex(_random_items(5, count=40))
+    path = spatial_index_path(str(tmp_path / "test_bijectionBW_geometric.svg"))
+    assert path.endswith("test_bijectionBW_geometric.spatial.json")
+    loaded = SpatialIndex.load(index.save(path))
+    assert loaded.items == index.items
+    assert loaded.cell_size == index.cell_size
+
+
+def test_load_rejects_missing_and_foreign_files(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        SpatialIndex.load(str(tmp_path / "missing.spatial.json"))
+    path = tmp_path / "old.spatial.json"
+    path.write_text('{"version": %d, "cell_size": 1, "items": []}' % (SPATIAL_INDEX_VERSION + 1))
+    with pytest.raises(ValueError):
+        SpatialIndex.load(str(path))
@@ -0,0 +1,42 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from svg_stream import stream_filter_svg
+
+DOCUMENT = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink"'
+    ' xmlns:ooo="http://xml.openoffice.org/svg/export" xmlns:dc="http://purl.org/dc/elements/1.1/"'
+    ' xml:space="preserve" ooo:meta="a&amp;b">\n'
+    ' <dc:title>Tom &amp; "Jerry" &lt;3</dc:title>\n'
+    ' <g id="drop"><rect x="0" y="0" width="1" height="1"/></g>tail\n'
+    ' <g class="keep" data-note="line&#10;break&#9;tab&#13;cr &quot;q&quot; &lt;&gt;">\n'
+    '  <use xlink:href="#shape"/>\n'
+    '  <path d="M 0,0 L 1,1" ooo:name="é"/>\n'
+    '  <text>a &gt; b</text>\n'
+    ' </g>\n'
+    ' <rect/>\n'
+    '</svg>\n'
+)
+
+
+def _drop(elem):
+    return elem.get('id') == 'drop'
+
+
+@pytest.mark.parametrize('drop', [lambda elem: False, _drop])
+def test_streamed_output_matches_tree_write(tmp_path, drop):
+    source = tmp_path / "in.svg"
+    source.write_text(DOCUMENT, encoding='utf-8')
+
+    tree = ET.parse(source)
+    for parent in list(tree.getroot().iter()):
+        for child in list(parent):
+            if drop(child):
+                parent.remove(child)
+    tree.write(tmp_path / "tree.svg", encoding='utf-8', xml_declaration=True)
+
+    counts = stream_filter_svg(str(source), str(tmp_path / "stream.svg"), drop)
+    assert (tmp_path / "stream.svg").read_bytes() == (tmp_path / "tree.svg").read_bytes()
+    assert counts['dropped'] == (1 if drop is _drop else 0)
@@ -0,0 +1,94 @@
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from build_cache import BuildCache
+from svg_traversal import SKIP_SUBTREES, skipping
+from svg_xml import parse_svg
+
+STAGES = ('raster', 'greyscale', 'invert', 'bijection', 'geometric')
+
+SVG = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100">
+  <defs>
+    <font id="font" horiz-adv-x="500">
+      <glyph unicode="A" fill="#ff0000" d="M 0 0 C 10 20 30 40 50 60 Z"/>
+      <missing-glyph fill="#00ff00" d="M 0 0 L 10 10 Z"/>
+    </font>
+    <clipPath id="clip">
+      <rect x="0" y="0" width="50" height="50" fill="#3366cc" stroke="#ffffff"/>
+      <circle cx="25" cy="25" r="10" fill="#999999"/>
+    </clipPath>
+  </defs>
+  <rect x="10" y="10" width="80" height="80" fill="#ffffff" stroke="#000000"/>
+  <line x1="0" y1="0" x2="100" y2="100" stroke="#000000"/>
+  <path d="M 10 10 C 20 40 60 80 90 90" fill="#336699" stroke="#777777" clip-path="url(#clip)"/>
+</svg>
+"""
+
+SKIPPED_IDS = ('font', 'clip')
+
+
+def _subtrees(path) -> dict:
+    root = parse_svg(path).getroot()
+    return {elem.get('id'): ET.tostring(elem) for elem in root.iter() if elem.get('id') in SKIPPED_IDS}
+
+
+def _outputs(svg_path, output_dir) -> dict:
+    from cdr_decomposition import load_module
+    from decomposition import run_svg_pipeline
+
+    cdr_pdf = load_module('cdr_pdf')
+    outputs = dict(run_svg_pipeline(svg_path, STAGES, output_dir=output_dir, write_intermediates=True))
+    outputs['outlines'] = cdr_pdf.remove_colors_from_svg(outputs['raster'], save_colors=False)
+    outputs['bw'] = cdr_pdf.create_black_white_svg(outputs['raster'])
+    return outputs
+
+
+@pytest.fixture
+def svg_path(tmp_path):
+    path = tmp_path / "test.svg"
+    path.write_text(SVG)
+    return str(path)
+
+
+def test_skipped_subtrees_pass_through_every_stage(svg_path, tmp_path):
+    original = _subtrees(svg_path)
+    with skipping(SKIP_SUBTREES):
+        outputs = _outputs(svg_path, str(tmp_path / "skipped"))
+    for name, path in outputs.items():
+        assert _subtrees(path) == original, name
+
+
+def test_an_empty_policy_processes_every_subtree(svg_path, tmp_path):
+    original = _subtrees(svg_path)
+    with skipping(''):
+        outputs = _outputs(svg_path, str(tmp_path / "processed"))
+    # The raster stage only removes images, so there is nothing for it to change
+    del outputs['raster']
+    for name, path in outputs.items():
+        assert _subtrees(path) != original, name
+
+
+def test_cache_keys_follow_the_policy(svg_path, tmp_path):
+    from decomposition import run_svg_pipeline
+
+    cache = BuildCache()
+    keys = {}
+    for policy in (SKIP_SUBTREES, '', 'font', 'clipPath, font', ['font', 'clipPath']):
+        with skipping(policy):
+            keys[str(policy)] = cache.file_key('greyscale', [svg_path], black_threshold=50)
+    assert len({keys[str(SKIP_SUBTREES)], keys[''], keys['font'], keys['clipPath, font']}) == 4
+    assert keys['clipPath, font'] == keys[str(['font', 'clipPath'])]
+
+    def run():
+        with cache.activate():
+            output = run_svg_pipeline(svg_path, output_dir=str(tmp_path / "cached"))['geometric']
+        return os.stat(output).st_mtime_ns
+
+    with skipping(SKIP_SUBTREES):
+        built = run()
+        assert run() == built
+    with skipping(''):
+        assert run() != built
@@ -0,0 +1,39 @@
+import filecmp
+import os
+import shutil
+
+import pytest
+
+from reporting import last_counts
+from threshold_sweep import SWEEP_STAGES, ThresholdSweep
+
+
+def _direct_chain(vectors: str, black_threshold: int, white_threshold: int) -> dict:
+    from decomposition import convert_svg_to_greyscale, extract_bijection_bw_elements, filter_to_geometric_shapes
+
+    greyscale = convert_svg_to_greyscale(vectors, black_threshold=black_threshold, white_threshold=white_threshold)
+    chain = {'greyscale': (greyscale, last_counts('greyscale'))}
+    bijection = extract_bijection_bw_elements(greyscale)
+    chain['bijection'] = (bijection, last_counts('bijection'))
+    chain['geometric'] = (filter_to_geometric_shapes(bijection), last_counts('geometric'))
+    return chain
+
+
+@pytest.mark.parametrize("black_threshold, white_threshold", [(50, 200), (30, 220)])
+def test_sweep_row_matches_the_direct_chain(golden_case, tmp_path, black_threshold, white_threshold):
+    shutil.copy(os.path.join(golden_case, "test_vectors.svg"), tmp_path)
+    vectors = str(tmp_path / "test_vectors.svg")
+    sweep = ThresholdSweep(vectors)
+    rows = sweep.run([black_threshold, 60], [white_threshold])
+    row = rows[0]
+    written = sweep.write(black_threshold, white_threshold, str(tmp_path / "sweep"))
+
+    chain = _direct_chain(vectors, black_threshold, white_threshold)
+    for name in SWEEP_STAGES:
+        path, counts = chain[name]
+        assert row['counts'][name] == counts, name
+        assert row['elements'][name] == path.stats['elements'], name
+        assert filecmp.cmp(written[name], path, shallow=False), name
+    assert row['die_lines'] == chain['greyscale'][1]['black']
+    assert row['bijection_elements'] == chain['bijection'][1]['perfect_bijection_elements']
+    assert row['geometric_elements'] == chain['geometric'][1]['kept_elements']
@@ -0,0 +1,182 @@
+import itertools
+import os
+
+from decomposition import PIPELINE_STAGES, collect_greyscale_palette, load_svg_document
+from reporting import last_counts, quiet, summary
+from svg_colors import GreyscaleLUT
+from svg_stats import SVGStats, stage_result
+from svg_xml import PARSE_ERRORS
+
+#usage python3 threshold_sweep.py test_vectors.svg [--black 30,40,50,60] [--white 180,200,220] [--write 50,200]
+
+# The part of the chain that depends on the thresholds
+SWEEP_STAGES = ('greyscale', 'bijection', 'geometric')
+
+
+class ThresholdSweep:
+    """
+    Try many black/white threshold pairs on one vector SVG with a single parse.
+
+    The greyscale stage maps every color through to_greyscale, so its output
+    only depends on what each distinct color of the document's palette turns
+    into. Threshold pairs that treat the whole palette alike give the same
+    greyscale, bijection and geometric outputs; each such variant runs once,
+    on a copy of the parsed tree, and nothing is written until asked for.
+
+    Usage:
+        sweep = ThresholdSweep("test_vectors.svg")
+        for row in sweep.run(range(30, 80, 10), (180, 200, 220)):
+            print(row['black_threshold'], row['white_threshold'], row['die_lines'], row['geometric_elements'])
+        sweep.write(60, 200)
+    """
+
+    def __init__(self, svg_path: str, use_numpy: bool = False):
+        """
+        Args:
+            svg_path: Path to the vector-only SVG (the 'raster' stage output)
+            use_numpy: Run the greyscale stage on the NumPy columnar backend
+
+        Raises:
+            FileNotFoundError: If the SVG doesn't exist
+            RuntimeError: If the SVG can't be parsed
+        """
+        svg_path = os.path.abspath(svg_path)
+        if not os.path.exists(svg_path):
+            raise FileNotFoundError(f"SVG file not found: {svg_path}")
+        try:
+            self.document = load_svg_document(svg_path)
+        except PARSE_ERRORS as e:
+            raise RuntimeError(f"Failed to parse SVG file: {e}")
+        self.svg_path = svg_path
+        self.use_numpy = use_numpy
+        self.palette = collect_greyscale_palette(self.document.root)
+        self._variants = {}  # Palette signature -> report of that variant
+
+    def signature(self, black_threshold: int, white_threshold: int) -> tuple:
+        """
+        What the pair turns each palette color into. Gradient stops are
+        converted twice by the greyscale stage, so the second conversion is
+        part of the signature too.
+        """
+        lut = GreyscaleLUT(self.palette, black_threshold, white_threshold)
+        return tuple((lut[color], lut[lut[color][0]]) for color in self.palette)
+
+    def evaluate(self, black_threshold: int, white_threshold: int) -> dict:
+        """
+        Report what one threshold pair does to the document.
+
+        Returns:
+            Dict with 'black_threshold', 'white_threshold', 'variant' (pairs with
+            the same number give identical outputs), 'die_lines' and
+            'backgrounds' (colors made pure black / white), 'converted',
+            'bijection_elements', 'geometric_elements', 'elements' (stage ->
+            element count of its output) and 'counts' (stage -> its counters)
+        """
+        signature = self.signature(black_threshold, white_threshold)
+        variant = self._variants.get(signature)
+        if variant is None:
+            outputs = self._run_chain(black_threshold, white_threshold)
+            variant = {
+                'variant': len(self._variants),
+                'die_lines': outputs['counts']['greyscale']['black'],
+                'backgrounds': outputs['counts']['greyscale']['white'],
+                'converted': outputs['counts']['greyscale']['converted'],
+                'bijection_elements': outputs['counts']['bijection']['perfect_bijection_elements'],
+                'geometric_elements': outputs['counts']['geometric']['kept_elements'],
+                'elements': {name: stats['elements'] for name, stats in outputs['stats'].items()},
+                'counts': outputs['counts'],
+            }
+            self._variants[signature] = variant
+        return {'black_threshold': black_threshold, 'white_threshold': white_threshold, **variant}
+
+    def run(self, black_thresholds, white_thresholds) -> list:
+        """
+        Evaluate every combination of the given thresholds.
+
+        Returns:
+            List of evaluate() reports, in grid order
+        """
+        rows = [self.evaluate(black, white) for black, white in itertools.product(black_thresholds, white_thresholds)]
+        summary(f"✅ Swept {len(rows)} threshold pairs over a palette of {len(self.palette)} colors: "
+                f"{len(self._variants)} distinct outputs")
+        return rows
+
+    def write(self, black_threshold: int, white_threshold: int, output_dir: str = None) -> dict:
+        """
+        Write the outputs of one threshold pair under their usual names.
+
+        Args:
+            black_threshold: Greyscale luminance threshold for pure black (0-255)
+            white_threshold: Greyscale luminance threshold for pure white (0-255)
+            output_dir: Directory for the files (defaults to a folder next to
+                the input named after the thresholds, e.g. test_vectors_b50_w200)
+
+        Returns:
+            Dict mapping 'greyscale', 'bijection' and 'geometric' to StageResults
+        """
+        if output_dir is None:
+            output_dir = os.path.join(os.path.dirname(self.svg_path),
+                                      f"{self.document.name}_b{black_threshold}_w{white_threshold}")
+        os.makedirs(output_dir, exist_ok=True)
+        outputs = self._run_chain(black_threshold, white_threshold, output_dir)
+        summary(f"📄 Thresholds {black_threshold}/{white_threshold} written to: {output_dir}")
+        return outputs['written']
+
+    def _run_chain(self, black_threshold: int, white_threshold: int, output_dir: str = None) -> dict:
+        context = {
+            'black_threshold': black_threshold,
+            'white_threshold': white_threshold,
+            'use_numpy': self.use_numpy,
+            'documents': {},
+        }
+        outputs = {'stats': {}, 'counts': {}, 'written': {}}
+        doc = self.document.copy()
+        with quiet():
+            for name in SWEEP_STAGES:
+                stats = context['stats'] = SVGStats()
+                doc = PIPELINE_STAGES[name](doc, context)
+                context['documents'][name] = doc
+                outputs['counts'][name] = last_counts(name)
+                if output_dir is None:
+                    outputs['stats'][name] = stats.as_dict()
+                else:
+                    output_path = doc.write(os.path.join(output_dir, f"{doc.name}.svg"))
+                    outputs['written'][name] = stage_result(output_path, stats, last_counts(name))
+                    outputs['stats'][name] = outputs['written'][name].stats
+        return outputs
+
+
+if __name__ == "__main__":
+    import argparse
+
+    def _numbers(text):
+        return [int(value) for value in text.split(',')]
+
+    def _threshold_pair(text):
+        try:
+            pair = _numbers(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"expected BLACK,WHITE as two integers, got {text!r}")
+        if len(pair) != 2:
+            raise argparse.ArgumentTypeError(f"expected BLACK,WHITE as two integers, got {text!r}")
+        if not all(0 <= value <= 255 for value in pair):
+            raise argparse.ArgumentTypeError(f"thresholds must be between 0 and 255, got {text!r}")
+        return tuple(pair)
+
+    parser = argparse.ArgumentParser(description="Compare greyscale threshold pairs on a vector SVG.")
+    parser.add_argument("svg", help="Vector-only SVG (output of remove_raster_from_svg)")
+    parser.add_argument("--black", type=_numbers, default=[30, 40, 50, 60, 70], help="Comma-separated black thresholds")
+    parser.add_argument("--white", type=_numbers, default=[180, 200, 220], help="Comma-separated white thresholds")
+    parser.add_argument("--write", type=_threshold_pair, action="append", default=[], metavar="BLACK,WHITE",
+                        help="Write the outputs of this pair (repeatable)")
+    parser.add_argument("--numpy", action="store_true", help="Convert colors with the NumPy columnar backend")
+    args = parser.parse_args()
+
+    sweep = ThresholdSweep(args.svg, use_numpy=args.numpy)
+    rows = sweep.run(args.black, args.white)
+    print(f"{'black':>5} {'white':>5} {'variant':>7} {'die-lines':>9} {'backgrounds':>11} {'bijection':>9} {'geometric':>9}")
+    for row in rows:
+        print(f"{row['black_threshold']:>5} {row['white_threshold']:>5} {row['variant']:>7} {row['die_lines']:>9} "
+              f"{row['backgrounds']:>11} {row['bijection_elements']:>9} {row['geometric_elements']:>9}")
+    for black, white in args.write:
+        sweep.write(black, white)